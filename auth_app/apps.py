@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AuthAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "auth_app"
+
+    def ready(self):
+        # registers the background export job
+        from . import exports  # noqa: F401
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .async_views import task_overview, task_trends, user_performance
+
+
+# native async analytics endpoints, mounted under /api/async/auth-routes/
+urlpatterns = [
+    path("analytics/overview/", task_overview, name="async_task_overview"),
+    path("analytics/user-performance/", user_performance),
+    path("analytics/trends/", task_trends),
+]
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+
+from task_app.async_api import async_api_view, json_response
+from task_app.stats import aget_user_stats
+
+
+# async (ASGI) variants of the analytics views, mounted under /api/async/auth-routes/
+
+
+@async_api_view
+async def task_overview(request):
+    stats = await aget_user_stats(request.user.id)
+
+    return json_response({
+        "status_counts": [{"status": k, "total": v} for k, v in stats["status"].items()],
+        "priority_counts": [{"priority": k, "total": v} for k, v in stats["priority"].items()],
+    })
+
+
+@async_api_view
+async def user_performance(request):
+    done_by = (await aget_user_stats(request.user.id))["done_by"]
+
+    assignee_ids = [int(k) for k in done_by if k]
+    usernames = {}
+    if assignee_ids:
+        async for user_id, username in User.objects.filter(id__in=assignee_ids).values_list("id", "username"):
+            usernames[user_id] = username
+    data = [
+        {"assigned_to__username": usernames.get(int(k)) if k else None, "total": v}
+        for k, v in done_by.items()
+    ]
+
+    return json_response(data)
+
+
+@async_api_view
+async def task_trends(request):
+    days = (await aget_user_stats(request.user.id))["day"]
+
+    return json_response([{"day": day, "total": days[day]} for day in sorted(days)])
@@ -0,0 +1,148 @@
+import csv
+import tempfile
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from task_app.jobs import job
+from task_app.models import Task
+
+
+# streaming task export: rows are read with .iterator(chunk_size=...) and
+# rendered one at a time, so memory does not grow with the number of tasks
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "json": ("application/json", "json"),
+}
+EXPORT_COLUMNS = [field.attname for field in Task._meta.concrete_fields]
+CHUNK_SIZE = 2000
+# flush rendered rows to the client in pieces of roughly this many bytes
+BUFFER_SIZE = 64 * 1024
+
+
+def parse_columns(value):
+    if not value:
+        return list(EXPORT_COLUMNS)
+    columns = list(dict.fromkeys(c.strip() for c in value.split(",") if c.strip()))
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+    if unknown or not columns:
+        raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(EXPORT_COLUMNS)}"})
+    return columns
+
+
+# "2025-11-24" or a full ISO datetime; a bare end date covers the whole day
+def parse_bound(name, value, end=False):
+    if not value:
+        return None
+    # well-formed but impossible dates (2025-02-30) raise ValueError
+    try:
+        moment = parse_datetime(value)
+        day = None if moment else parse_date(value)
+    except ValueError:
+        moment = day = None
+    if moment is None:
+        if day is None:
+            raise ValidationError({name: "Use YYYY-MM-DD or an ISO 8601 datetime."})
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+        if end:
+            moment -= timedelta(microseconds=1)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+# tasks the user created or is assigned, optionally by created_at range
+def user_tasks(user_id, start=None, end=None):
+    tasks = Task.objects.filter(Q(created_by_id=user_id) | Q(assigned_to_id=user_id))
+    if start:
+        tasks = tasks.filter(created_at__gte=start)
+    if end:
+        tasks = tasks.filter(created_at__lte=end)
+    return tasks
+
+
+def export_rows(queryset, columns):
+    return queryset.values_list(*columns).order_by("id").iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([v.isoformat() if hasattr(v, "isoformat") else v for v in row])
+
+
+def render_ndjson(rows, columns):
+    encoder = JSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def render_json(rows, columns):
+    encoder = JSONEncoder()
+    yield "["
+    first = True
+    for row in rows:
+        yield ("" if first else ",") + encoder.encode(dict(zip(columns, row)))
+        first = False
+    yield "]"
+
+
+RENDERERS = {"csv": render_csv, "ndjson": render_ndjson, "json": render_json}
+
+
+# join small pieces into larger writes, optionally gzip-compressing on the fly
+def encode_stream(pieces, compress=False):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= BUFFER_SIZE:
+            data = "".join(buffer).encode()
+            buffer, size = [], 0
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    data = "".join(buffer).encode()
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+# ?background=true: the same export written to storage by the job worker;
+# payload {"export_format", "fields", "start_date", "end_date"} as sent by the client
+@job("export_tasks", priority=5)
+def export_to_file(job):
+    payload = job.payload
+    export_format = payload["export_format"]
+    columns = payload["fields"]
+    tasks = user_tasks(
+        job.created_by_id,
+        parse_bound("start_date", payload.get("start_date")),
+        parse_bound("end_date", payload.get("end_date"), end=True),
+    )
+    content_type, extension = EXPORT_FORMATS[export_format]
+    with tempfile.TemporaryFile() as buffer:
+        for data in encode_stream(RENDERERS[export_format](export_rows(tasks, columns), columns)):
+            buffer.write(data)
+        size = buffer.tell()
+        buffer.seek(0)
+        name = default_storage.save(f"exports/{job.pk}/tasks.{extension}", File(buffer))
+    return {"file": name, "filename": f"tasks.{extension}", "content_type": content_type, "size": size}
@@ -27,3 +27,23 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email","last_login","date_joined","assigned_tasks"]
 
 
+# lightweight user directory entry (no nested tasks)
+class UserDirectorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username", "email"]
+
+
+# directory entry with assigned task counts annotated by AllUsersView
+class UserTaskSummarySerializer(UserDirectorySerializer):
+    task_summary = serializers.SerializerMethodField()
+
+    class Meta(UserDirectorySerializer.Meta):
+        fields = UserDirectorySerializer.Meta.fields + ["task_summary"]
+
+    def get_task_summary(self, obj):
+        return {
+            "assigned": obj.assigned_count,
+            "open": obj.open_count,
+            "done": obj.done_count,
+        }
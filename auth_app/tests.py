@@ -1,3 +1,99 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app.benchmark import Endpoint, EndpointBenchmarkMixin, SeededClientMixin
+from task_app.models import Task
+from task_app.tags import set_task_tags
+
+
+API = "/api/auth-routes"
+ASYNC_API = "/api/async/auth-routes"
+
+
+class AuthEndpointBenchmarkTests(EndpointBenchmarkMixin, TestCase):
+
+    def get_endpoints(self):
+        owner = self.data.owner
+        refresh = str(RefreshToken.for_user(owner))
+
+        return [
+            Endpoint("auth-register", "post", f"{API}/register/", lambda i: {
+                "username": f"new-user-{i}", "email": f"new{i}@example.com",
+                "password": self.data.password, "password2": self.data.password,
+            }, status=201),
+            Endpoint("auth-login", "post", f"{API}/login/", {"username": owner.username, "password": self.data.password}),
+            Endpoint("auth-refresh", "post", f"{API}/refresh/", {"refresh": refresh}),
+            Endpoint("auth-user-profile", "get", f"{API}/user-profile/"),
+            Endpoint("auth-all-users", "get", f"{API}/all-users/"),
+            Endpoint("auth-all-users-directory", "get", f"{API}/all-users/?mode=directory&include=task_summary&page=1"),
+            Endpoint("analytics-overview", "get", f"{API}/analytics/overview/"),
+            Endpoint("analytics-user-performance", "get", f"{API}/analytics/user-performance/"),
+            Endpoint("analytics-trends", "get", f"{API}/analytics/trends/"),
+            Endpoint("analytics-export-json", "get", f"{API}/analytics/export/"),
+            Endpoint("async-analytics-overview", "get", f"{ASYNC_API}/analytics/overview/"),
+            Endpoint("async-analytics-user-performance", "get", f"{ASYNC_API}/analytics/user-performance/"),
+            Endpoint("async-analytics-trends", "get", f"{ASYNC_API}/analytics/trends/"),
+            Endpoint("analytics-export-csv", "get", f"{API}/analytics/export/?export_format=csv&fields=id,title,status"),
+            Endpoint("analytics-export-background", "get", f"{API}/analytics/export/?export_format=csv&background=true", status=202),
+            Endpoint("analytics-recompute", "post", f"{API}/analytics/recompute/", status=202),
+        ]
+
+
+class ExportBoundTests(SeededClientMixin, TestCase):
+
+    def test_impossible_dates_are_rejected(self):
+        for query in ("start_date=2025-02-30", "end_date=2025-13-01", "start_date=2025-02-30T10:00:00", "start_date=soon"):
+            response = self.client.get(f"{API}/analytics/export/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn(query.split("=")[0], response.json())
+
+
+# ?mode=directory, ?include=task_summary, ?search= and ?page= on all-users
+class AllUsersTests(SeededClientMixin, TestCase):
+
+    def get(self, query=""):
+        response = self.client.get(f"{API}/all-users/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_directory_mode_and_task_summary(self):
+        users = self.get("?mode=directory")
+        self.assertEqual([u["username"] for u in users], sorted(u.username for u in self.data.users))
+        self.assertEqual(set(users[0]), {"id", "username", "email"})
+
+        user = self.data.users[1]
+        Task.objects.filter(pk=user.assigned_tasks.filter(status="done").first().pk).update(is_deleted=True)
+        live = user.assigned_tasks.filter(is_deleted=False)
+        summary = next(u for u in self.get("?mode=directory&include=task_summary") if u["id"] == user.id)["task_summary"]
+        self.assertEqual(summary, {
+            "assigned": live.count(),
+            "open": live.exclude(status__in=["done", "archived"]).count(),
+            "done": live.filter(status="done").count(),
+        })
+
+    def test_search_and_pagination(self):
+        self.assertEqual([u["username"] for u in self.get("?mode=directory&search=bench1")], ["bench1"])
+        self.assertEqual([u["username"] for u in self.get("?search=bench2@example")], ["bench2"])
+        # a plain list unless the client asks for a page
+        self.assertIsInstance(self.get(), list)
+        page = self.get("?mode=directory&page_size=2")
+        self.assertEqual((page["count"], len(page["results"])), (3, 2))
+        self.assertEqual([u["username"] for u in self.get("?mode=directory&page=2&page_size=2")["results"]], ["bench2"])
+
+    def test_nested_mode_queries_do_not_grow_with_users_and_tasks(self):
+        def count():
+            with CaptureQueriesContext(connection) as queries:
+                users = self.get()
+            self.assertTrue(all("assigned_tasks" in u for u in users))
+            return len(queries)
+
+        before = count()
+        for i in range(3):
+            extra = User.objects.create_user(f"extra{i}", f"extra{i}@example.com", "x")
+            task = Task.objects.create(title=f"extra {i}", created_by=self.data.owner, assigned_to=extra)
+            set_task_tags(task, [f"extra-{i}", "shared"])
+        self.assertEqual(count(), before)
 
-# Create your tests here.
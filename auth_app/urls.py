@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import (RegisterView, CurrentUserView , AllUsersView, task_overview, user_performance, task_trends, export_tasks)
+from .views import (RegisterView, CurrentUserView , AllUsersView, task_overview, user_performance, task_trends, export_tasks, recompute_stats)
 
 
 urlpatterns = [
@@ -22,6 +22,7 @@ urlpatterns = [
     path('analytics/user-performance/', user_performance),
     path('analytics/trends/', task_trends),
     path('analytics/export/', export_tasks),
+    path('analytics/recompute/', recompute_stats),
 ]
 
 
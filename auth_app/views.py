@@ -2,13 +2,21 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth.models import User
-from .serializers import RegisterSerializer, UserSerializer
+from .serializers import RegisterSerializer, UserSerializer, UserDirectorySerializer, UserTaskSummarySerializer
 from rest_framework import viewsets
 from rest_framework.decorators import api_view, permission_classes
-from django.db.models import Count
-from django.db.models.functions import TruncDate
+from django.db.models import Count, Prefetch, prefetch_related_objects
+from rest_framework.filters import SearchFilter
+from rest_framework.pagination import PageNumberPagination
 from task_app.models import Task
 from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from task_app.stats import get_user_stats
+from task_management.replicas import replica_reads
+from task_app.jobs import enqueue
+from task_app.serializers import JobSerializer
+from .exports import EXPORT_FORMATS, RENDERERS, encode_stream, export_rows, parse_bound, parse_columns, user_tasks
 
 
 class RegisterView(generics.CreateAPIView):
@@ -17,86 +25,163 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
 
 
+# UserSerializer nests assigned_tasks; load them with their users and tags
+# in a fixed number of queries instead of one per task
+def assigned_tasks_prefetch():
+    tasks = Task.objects.select_related("assigned_to", "created_by").prefetch_related("tags")
+    return Prefetch("assigned_tasks", queryset=tasks)
+
+
 class CurrentUserView(generics.RetrieveAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        prefetch_related_objects([user], assigned_tasks_prefetch())
+        return user
     
     
+# paginates only when the client asks for it (?page= or ?page_size=),
+# so existing callers still get the plain list
+class OptionalPageNumberPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+# ?mode=directory returns id/username/email only; add ?include=task_summary
+# for assigned task counts from one annotated query. The default nested
+# mode prefetches tasks, their users and tags in a fixed number of queries.
 class AllUsersView(viewsets.ReadOnlyModelViewSet):
-    queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
-
-    # Disable pagination
-    pagination_class = None
+    pagination_class = OptionalPageNumberPagination
+    filter_backends = [SearchFilter]
+    search_fields = ["username", "email"]
+
+    def get_mode(self):
+        return self.request.query_params.get("mode", "nested").lower()
+
+    def wants_summary(self):
+        include = self.request.query_params.get("include", "")
+        return "task_summary" in [part.strip() for part in include.split(",")]
+
+    def get_queryset(self):
+        qs = User.objects.order_by("username")
+        if self.get_mode() == "directory":
+            qs = qs.only("id", "username", "email")
+            if self.wants_summary():
+                live = Q(assigned_tasks__is_deleted=False)
+                qs = qs.annotate(
+                    assigned_count=Count("assigned_tasks", filter=live),
+                    open_count=Count("assigned_tasks", filter=live & ~Q(assigned_tasks__status__in=["done", "archived"])),
+                    done_count=Count("assigned_tasks", filter=live & Q(assigned_tasks__status="done")),
+                )
+            return qs
+        return qs.prefetch_related(assigned_tasks_prefetch())
+
+    def get_serializer_class(self):
+        if self.get_mode() == "directory":
+            return UserTaskSummarySerializer if self.wants_summary() else UserDirectorySerializer
+        return UserSerializer
     
     
 
 
 #  TASK OVERVIEW (STATUS + PRIORITY COUNTS)
+# dashboards may read from a replica (task_management/replicas.py)
+# served from the materialized counters (task_app/stats.py); soft-deleted tasks are not counted
+@replica_reads()
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def task_overview(request):
-    user = request.user
-    print("user",user)
-
-    # Only user's tasks (created by or assigned to)
-    base_qs = Task.objects.filter(
-        Q(created_by=user) | Q(created_by=user)
-    )
-
-    # Group by status
-    status_counts = base_qs.values("status").annotate(total=Count("id"))
-
-    # Group by priority
-    priority_counts = base_qs.values("priority").annotate(total=Count("id"))
+    stats = get_user_stats(request.user.id)
 
     return Response({
-        "status_counts": status_counts,
-        "priority_counts": priority_counts
+        "status_counts": [{"status": k, "total": v} for k, v in stats["status"].items()],
+        "priority_counts": [{"priority": k, "total": v} for k, v in stats["priority"].items()],
     })
 
 
 #  USER PERFORMANCE (HOW MANY TASKS YOU COMPLETED)
+@replica_reads()
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def user_performance(request):
-    user = request.user
+    done_by = get_user_stats(request.user.id)["done_by"]
 
-    data = Task.objects.filter(
-        created_by=user,
-        status="done"
-    ).values("assigned_to__username").annotate(total=Count("id"))
+    assignee_ids = [int(k) for k in done_by if k]
+    usernames = dict(User.objects.filter(id__in=assignee_ids).values_list("id", "username")) if assignee_ids else {}
+    data = [
+        {"assigned_to__username": usernames.get(int(k)) if k else None, "total": v}
+        for k, v in done_by.items()
+    ]
 
     return Response(data)
 
 
 #  TRENDS (TASKS CREATED PER DAY)
+@replica_reads()
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def task_trends(request):
-    user = request.user
+    days = get_user_stats(request.user.id)["day"]
 
-    daily = Task.objects.filter(
-        Q(created_by=user) | Q(assigned_to=user)
-    ).annotate(
-        day=TruncDate("created_at")
-    ).values("day").annotate(total=Count("id")).order_by("day")
+    daily = [{"day": day, "total": days[day]} for day in sorted(days)]
 
     return Response(daily)
 
 
 #  EXPORT TASKS (ONLY USER TASKS)
+# streamed: ?export_format=json|csv|ndjson, ?fields=id,title,..., ?start_date=&end_date=
+# (created_at range), gzip when the client sends Accept-Encoding: gzip;
+# ?background=true writes the file in a job instead and answers 202 with the job
+# (GET /api/tasks-routes/jobs/<id>/ for its status, .../download/ for the file)
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def export_tasks(request):
     user = request.user
-
-    tasks = Task.objects.filter(
-        Q(created_by=user) | Q(assigned_to=user)
-    ).values()
-
-    return Response(list(tasks))
+    params = request.query_params
+
+    export_format = params.get("export_format", "json").lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationError({"export_format": f"Choose one of: {', '.join(EXPORT_FORMATS)}"})
+    columns = parse_columns(params.get("fields"))
+    start = parse_bound("start_date", params.get("start_date"))
+    end = parse_bound("end_date", params.get("end_date"), end=True)
+
+    if params.get("background", "false").lower() in ("true", "1", "yes"):
+        job = enqueue("export_tasks", {
+            "export_format": export_format,
+            "fields": columns,
+            "start_date": params.get("start_date"),
+            "end_date": params.get("end_date"),
+        }, user=user)
+        return Response(JobSerializer(job, context={"request": request}).data, status=status.HTTP_202_ACCEPTED)
+
+    tasks = user_tasks(user.id, start, end)
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    compress = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+    pieces = RENDERERS[export_format](export_rows(tasks, columns), columns)
+    response = StreamingHttpResponse(encode_stream(pieces, compress=compress), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="tasks.{extension}"'
+    response["Vary"] = "Accept-Encoding"
+    if compress:
+        response["Content-Encoding"] = "gzip"
+    return response
+
+
+# recompute the caller's dashboard counters in the background (drift repair)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def recompute_stats(request):
+    user = request.user
+    job = enqueue("rebuild_stats", {"user_ids": [user.id]}, user=user, key=f"rebuild_stats:{user.id}")
+    return Response(JobSerializer(job, context={"request": request}).data, status=status.HTTP_202_ACCEPTED)
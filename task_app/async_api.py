@@ -0,0 +1,57 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+# helpers for the native async (ASGI) read endpoints
+# DRF views are synchronous, so these views authenticate and render on their
+# own while keeping the JSON output of the DRF endpoints they mirror.
+
+JSON_PARAMS = {"separators": (",", ":"), "ensure_ascii": False}
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder, json_dumps_params=JSON_PARAMS)
+
+
+def error_response(detail, status):
+    return json_response(detail if isinstance(detail, dict) else {"detail": detail}, status=status)
+
+
+# JWT validation is CPU only; the user row is read with the async ORM
+async def authenticate(request):
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if header is None:
+        return None
+    raw_token = auth.get_raw_token(header)
+    if raw_token is None:
+        return None
+    token = auth.get_validated_token(raw_token)
+    user_id = token.get(jwt_settings.USER_ID_CLAIM)
+    user = await get_user_model().objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None or (jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active):
+        return None
+    return user
+
+
+# GET-only, authenticated async view; DRF exceptions become JSON errors
+def async_api_view(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return error_response(f'Method "{request.method}" not allowed.', 405)
+        try:
+            user = await authenticate(request)
+            if user is None:
+                return error_response("Authentication credentials were not provided.", 401)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return error_response(exc.detail, exc.status_code)
+    return wrapper
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from .views.AsyncViews import comment_list, file_list, task_detail, task_list
+
+
+# native async read endpoints, mounted under /api/async/tasks-routes/
+urlpatterns = [
+    path("tasks/", task_list, name="async-tasks-list"),
+    path("tasks/<int:pk>/", task_detail, name="async-tasks-detail"),
+    path("comments/", comment_list, name="async-comments-list"),
+    path("file-upload/", file_list, name="async-task-files-list"),
+]
@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Comment, FileAttachment, Tag, Task
+from .response_cache import get_response_cache
+from .search import index_tasks
+from .stats import rebuild_stats
+
+
+# endpoint benchmark harness used by the app test suites
+# seeds synthetic data, drives each route through the test client and records
+# p50/p95 latency, SQL query count and peak Python memory per endpoint.
+# Query counts are compared with BASELINE_PATH; set UPDATE_QUERY_BASELINE=1
+# to rewrite it and BENCHMARK_REPORT=1 to print the measurements.
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+SEED_DEFAULTS = {
+    "users": 3,
+    "tasks": 20,
+    "tags": 5,
+    "comments": 2,
+    "attachments": 1,
+}
+
+
+def seed_size(name):
+    return int(os.getenv(f"BENCHMARK_{name.upper()}", SEED_DEFAULTS[name]))
+
+
+class SeedData:
+    password = "bench-pass-123"
+
+    def __init__(self):
+        self.users, self.tasks, self.tags, self.comments, self.attachments = [], [], [], [], []
+
+    @property
+    def owner(self):
+        return self.users[0]
+
+    def owner_tasks(self):
+        return [t for t in self.tasks if t.created_by_id == self.owner.id]
+
+
+# bulk insert users, tasks, tags, comments and attachments
+def seed(users=None, tasks=None, tags=None, comments=None, attachments=None):
+    users = users if users is not None else seed_size("users")
+    tasks = tasks if tasks is not None else seed_size("tasks")
+    tags = tags if tags is not None else seed_size("tags")
+    comments = comments if comments is not None else seed_size("comments")
+    attachments = attachments if attachments is not None else seed_size("attachments")
+
+    data = SeedData()
+    data.users = [User.objects.create_user(f"bench{i}", f"bench{i}@example.com", data.password) for i in range(users)]
+    data.tags = Tag.objects.bulk_create([Tag(name=f"bench-tag-{i}") for i in range(tags)])
+
+    statuses = [s for s, _ in Task.STATUS_CHOICES]
+    priorities = [p for p, _ in Task.PRIORITY_CHOICES]
+    data.tasks = Task.objects.bulk_create([
+        Task(
+            title=f"Benchmark task {u.id}-{i}",
+            description=f"Synthetic task {i} for {u.username}",
+            status=statuses[i % len(statuses)],
+            priority=priorities[i % len(priorities)],
+            created_by=u,
+            assigned_to=data.users[(n + i) % len(data.users)],
+        )
+        for n, u in enumerate(data.users)
+        for i in range(tasks)
+    ])
+    if data.tags:
+        Through = Task.tags.through
+        Through.objects.bulk_create([
+            Through(task_id=t.id, tag_id=data.tags[(i + j) % len(data.tags)].id)
+            for i, t in enumerate(data.tasks)
+            for j in range(min(2, len(data.tags)))
+        ])
+    data.comments = Comment.objects.bulk_create([
+        Comment(task=t, author=data.users[i % len(data.users)], content=f"comment {i}")
+        for t in data.tasks
+        for i in range(comments)
+    ])
+    data.attachments = FileAttachment.objects.bulk_create([
+        FileAttachment(
+            task=t,
+            uploaded_by=t.created_by,
+            file=f"task_files/bench/{t.id}-{i}.txt",
+            filename=f"{t.id}-{i}.txt",
+            content_type="text/plain",
+            size=16,
+        )
+        for t in data.tasks
+        for i in range(attachments)
+    ])
+    index_tasks([t.id for t in data.tasks])
+    rebuild_stats()
+    return data
+
+
+# path and data may be callables taking the iteration number,
+# for endpoints that consume an object per request (delete, assign, ...)
+class Endpoint:
+
+    def __init__(self, name, method, path, data=None, format="json", status=200, headers=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.format = format
+        self.status = status
+        self.headers = headers or {}
+
+    def resolve(self, value, i):
+        return value(i) if callable(value) else value
+
+
+Measurement = namedtuple("Measurement", ["name", "p50_ms", "p95_ms", "queries", "peak_kb"])
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Benchmark:
+    iterations = int(os.getenv("BENCHMARK_ITERATIONS", 5))
+
+    def __init__(self, client=None):
+        self.client = client or APIClient()
+        self.results = {}
+        self.counter = 0
+
+    def request(self, endpoint):
+        i = self.counter
+        self.counter += 1
+        method = getattr(self.client, endpoint.method.lower())
+        kwargs = {"format": endpoint.format} if endpoint.format else {}
+        response = method(endpoint.resolve(endpoint.path, i), endpoint.resolve(endpoint.data, i), **kwargs, **endpoint.headers)
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+        if response.status_code != endpoint.status:
+            raise AssertionError(
+                f"{endpoint.name}: expected {endpoint.status}, got {response.status_code}: {getattr(response, 'data', '')}"
+            )
+        return response
+
+    def run(self, endpoint, iterations=None):
+        iterations = iterations or self.iterations
+        self.counter = 0
+        self.request(endpoint)  # warm-up
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            self.request(endpoint)
+            samples.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                self.request(endpoint)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = Measurement(
+            name=endpoint.name,
+            p50_ms=statistics.median(samples),
+            p95_ms=percentile(samples, 95),
+            queries=len(ctx.captured_queries),
+            peak_kb=peak / 1024,
+        )
+        self.results[endpoint.name] = result
+        return result
+
+    def run_all(self, endpoints):
+        for endpoint in endpoints:
+            self.run(endpoint)
+        return self.results
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        stream.write(f"\n{'endpoint':40} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'peak KB':>9}\n")
+        for r in self.results.values():
+            stream.write(f"{r.name:40} {r.p50_ms:8.2f} {r.p95_ms:8.2f} {r.queries:8d} {r.peak_kb:9.1f}\n")
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = load_baseline(path)
+    baseline.update({name: r.queries for name, r in results.items()})
+    path.write_text(json.dumps(dict(sorted(baseline.items())), indent=2) + "\n")
+
+
+# names of endpoints whose query count went up (or that have no baseline yet)
+def check_baseline(results, path=BASELINE_PATH):
+    if os.getenv("UPDATE_QUERY_BASELINE"):
+        save_baseline(results, path)
+        return []
+    baseline = load_baseline(path)
+    failures = []
+    for name, r in results.items():
+        if name not in baseline:
+            failures.append(f"{name}: no baseline (run with UPDATE_QUERY_BASELINE=1)")
+        elif r.queries > baseline[name]:
+            failures.append(f"{name}: {r.queries} queries, baseline {baseline[name]}")
+    return failures
+
+
+# mixin for TestCases that talk to the API as the seeded owner
+# seed_options are passed to seed(); the default skips comments and attachments
+class SeededClientMixin:
+    seed_options = {"comments": 0, "attachments": 0}
+
+    def setUp(self):
+        super().setUp()
+        self.data = seed(**self.seed_options)
+        self.client = APIClient()
+        self.authenticate(self.data.owner)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+
+# mixin for the per-app benchmark TestCases: subclasses implement get_endpoints()
+class EndpointBenchmarkMixin(SeededClientMixin):
+    seed_options = {}
+
+    def setUp(self):
+        cache.clear()
+        response_cache = get_response_cache()
+        if response_cache is not None:
+            response_cache.clear()
+        # the daily user throttle would reject a long benchmark run
+        patcher = mock.patch("rest_framework.views.APIView.get_throttles", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # keep the per-request instrumentation log lines out of the test output
+        instrumentation = logging.getLogger("task_management.instrumentation")
+        self.addCleanup(instrumentation.setLevel, instrumentation.level)
+        instrumentation.setLevel(logging.ERROR)
+        super().setUp()
+        self.benchmark = Benchmark(self.client)
+
+    # enough objects for warm-up, the timed iterations and the instrumented run
+    def consumable(self, factory):
+        return [factory(i) for i in range(self.benchmark.iterations + 2)]
+
+    def get_endpoints(self):
+        raise NotImplementedError
+
+    def test_endpoint_query_counts(self):
+        self.benchmark.run_all(self.get_endpoints())
+        if os.getenv("BENCHMARK_REPORT"):
+            self.benchmark.report()
+        failures = check_baseline(self.benchmark.results)
+        self.assertEqual(failures, [], "Query count regressions:\n" + "\n".join(failures))
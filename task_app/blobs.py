@@ -0,0 +1,127 @@
+import hashlib
+
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import transaction
+from django.db.models import F
+
+from .jobs import enqueue
+from .models import FileAttachment, FileBlob
+
+
+# content-addressed attachment storage
+# file bodies are stored once under blobs/<sha256> and shared by every
+# attachment with the same bytes. FileBlob.ref_count counts the attachments;
+# deleting the last one deletes the blob and its file. Blob rows are locked
+# while their count changes, so a release and a concurrent upload of the same
+# bytes cannot both decide the file's fate.
+
+BLOB_PREFIX = "blobs"
+BLOCK_SIZE = 64 * 1024
+
+
+def get_storage():
+    return FileAttachment._meta.get_field("file").storage
+
+
+def blob_name(sha256):
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def hash_file(file):
+    digest = hashlib.sha256()
+    size = 0
+    if hasattr(file, "chunks"):
+        blocks = file.chunks(BLOCK_SIZE)
+    else:
+        blocks = iter(lambda: file.read(BLOCK_SIZE), b"")
+    for block in blocks:
+        digest.update(block)
+        size += len(block)
+    return digest.hexdigest(), size
+
+
+# first in request.upload_handlers: hashes each multipart file while Django
+# parses it, then hands the data on to the regular memory / temp-file handlers
+class HashingUploadHandler(FileUploadHandler):
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.hashes = {}
+        self.digest = None
+
+    @classmethod
+    def install(cls, request):
+        handler = cls(request)
+        request.upload_handlers.insert(0, handler)
+        return handler
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.hashes[self.field_name] = self.digest.hexdigest()
+        return None
+
+
+# +1 reference on an existing blob, or None when these bytes are new
+def acquire_blob(sha256):
+    with transaction.atomic():
+        blob = FileBlob.objects.select_for_update().filter(sha256=sha256).first()
+        if blob is None:
+            return None
+        FileBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+        blob.ref_count += 1
+        return blob
+
+
+# store new bytes (read from `content`) and take the first reference; the file
+# is written before the row exists, outside any lock
+def store_blob(sha256, size, content):
+    return adopt_blob(sha256, size, get_storage().save(blob_name(sha256), content))
+
+
+# register bytes already written to `name` as the blob for sha256; new blobs
+# are post-processed in the background (task_app/job_handlers.py)
+def adopt_blob(sha256, size, name):
+    storage = get_storage()
+    with transaction.atomic():
+        blob, created = FileBlob.objects.select_for_update().get_or_create(
+            sha256=sha256, defaults={"name": name, "size": size, "ref_count": 1}
+        )
+        if created:
+            enqueue("process_blob", {"blob_id": blob.pk}, key=f"process_blob:{blob.pk}")
+        else:
+            FileBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+            blob.ref_count += 1
+    if not created:
+        # a concurrent upload of the same bytes won; drop our copy
+        storage.delete(name)
+    return blob
+
+
+def acquire_or_store_blob(sha256, size, content):
+    return acquire_blob(sha256) or store_blob(sha256, size, content)
+
+
+def release_blob(blob_id):
+    with transaction.atomic():
+        blob = FileBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            FileBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+            return
+        names = [name for name in (blob.name, blob.thumbnail) if name]
+        blob.delete()
+        transaction.on_commit(lambda: delete_files(names))
+
+
+def delete_files(names):
+    storage = get_storage()
+    for name in names:
+        storage.delete(name)
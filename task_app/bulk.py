@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .events import EVENT_FIELDS, record_events, task_saved_event
+from .models import Task
+from .response_cache import invalidate_user
+from .stats import STAT_FIELDS, record_changes
+from .tags import get_batch_size
+
+
+# set-wise task edits behind bulk-update / bulk-delete
+# each batch of ids costs one SELECT (ownership check and the old values) and
+# one UPDATE ... WHERE id IN. QuerySet.update() sends no signals and skips
+# auto_now, so updated_at and the version (task_app/tracking.py) are written
+# here and the counters, the change feed and cached responses are kept in
+# sync explicitly. The search index covers title, description and tags only,
+# none of which change here. Each batch commits on its own, stamped just before
+# its UPDATE: delta sync (task_app/sync.py) only waits SETTLE_SECONDS for a
+# stamped row to commit, so no transaction may hold a stamp for longer.
+
+COLUMNS = tuple(dict.fromkeys(("id",) + STAT_FIELDS + EVENT_FIELDS))
+
+
+# {id: "updated" | "unchanged" | "not_found"}; `changes` maps columns
+# (status, assigned_to_id, ...) to their new values
+def update_tasks(user, task_ids, changes, batch_size=None):
+    return apply_changes(user, task_ids, changes, "updated", batch_size)
+
+
+# {id: "deleted" | "not_found"}
+def soft_delete_tasks(user, task_ids, batch_size=None):
+    return apply_changes(user, task_ids, {"is_deleted": True, "deleted_at": timezone.now()}, "deleted", batch_size)
+
+
+def apply_changes(user, task_ids, changes, applied, batch_size=None):
+    batch_size = batch_size or get_batch_size()
+    # tasks of other users and soft-deleted ones are reported as not found
+    results = dict.fromkeys(task_ids, "not_found")
+    tracked = [name for name in changes if name in COLUMNS]
+    for start in range(0, len(task_ids), batch_size):
+        with transaction.atomic():
+            rows = (
+                Task.objects.select_for_update()
+                .filter(id__in=task_ids[start:start + batch_size], created_by=user, is_deleted=False)
+                .values(*COLUMNS)
+            )
+            changed = []
+            for row in rows:
+                if any(row[name] != changes[name] for name in tracked):
+                    changed.append(row)
+                    results[row["id"]] = applied
+                else:
+                    results[row["id"]] = "unchanged"
+            if not changed:
+                continue
+            Task.objects.filter(id__in=[row["id"] for row in changed]).update(
+                **changes, updated_at=timezone.now(), version=F("version") + 1
+            )
+            after = [{**row, **changes} for row in changed]
+            record_changes(changed, after)
+            record_events(
+                [task_saved_event(old, Task(**new)) for old, new in zip(changed, after)],
+                batch_size=batch_size,
+            )
+            invalidate_user(user.id)
+    return results
@@ -0,0 +1,111 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.views import set_rollback
+
+from .tracking import VersionConflict
+
+
+# conditional GET for list / retrieve
+# validators come from one aggregate query (latest timestamp + row count) over
+# the filtered queryset, so an If-None-Match / If-Modified-Since hit returns
+# 304 before anything is serialized. Paginators that never count the set
+# (keyset pages, task_app/pagination.py) are tagged from the page they return
+# instead, so a deep page does not cost a scan of the whole set.
+class ConditionalGetMixin:
+    last_modified_field = "updated_at"
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(self.paginator, "counts_rows", True):
+            return self.page_conditional_response(request, super().list, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(request, queryset, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return self.conditional_response(request, queryset, super().retrieve, *args, allow_empty=False, **kwargs)
+
+    # (etag, last modified timestamp or None, row count)
+    def get_validators(self, request, queryset):
+        stats = queryset.order_by().aggregate(last=Max(self.last_modified_field), rows=Count("pk"), top=Max("pk"))
+        last = stats["last"]
+        # the query string is part of the tag: two pages share the aggregate
+        etag = self.build_etag(request, last.isoformat() if last else None, stats["rows"], stats["top"])
+        return etag, int(last.timestamp()) if last else None, stats["rows"]
+
+    def build_etag(self, request, *state):
+        params = sorted((k, v) for k in request.query_params for v in request.query_params.getlist(k))
+        raw = repr((request.user.pk, request.path, params, request.accepted_media_type, *state))
+        return "W/" + quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+    def conditional_response(self, request, queryset, view, *args, allow_empty=True, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        etag, last_modified, rows = self.get_validators(request, queryset)
+        if not rows and not allow_empty:
+            return view(request, *args, **kwargs)
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+    # the page is computed first and its own data is the tag; a match still
+    # saves sending the body
+    def page_conditional_response(self, request, view, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.method not in ("GET", "HEAD") or response.status_code != 200:
+            return response
+        etag = self.build_etag(request, response.data)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response["ETag"] = etag
+        return response
+
+
+# optimistic concurrency for writes (task_app/tracking.py)
+# a write may name the version it was based on, as "version" in the body or
+# ?version=. A stale version, or another save landing between our read and
+# write, answers 409 Conflict with the current version.
+class VersionCheckMixin:
+
+    def get_object(self):
+        instance = super().get_object()
+        if self.request.method not in SAFE_METHODS:
+            self.check_version(instance)
+        return instance
+
+    def check_version(self, instance):
+        data = self.request.data if hasattr(self.request.data, "get") else {}
+        expected = data.get("version", self.request.query_params.get("version"))
+        if expected in (None, ""):
+            return
+        try:
+            expected = int(expected)
+        except (TypeError, ValueError):
+            raise ValidationError({"version": "version must be an integer"})
+        if expected != instance.version:
+            raise VersionConflict(instance)
+
+    def handle_exception(self, exc):
+        if not isinstance(exc, VersionConflict):
+            return super().handle_exception(exc)
+        set_rollback()
+        instance = exc.instance
+        current = type(instance)._base_manager.filter(pk=instance.pk).values_list("version", flat=True).first()
+        return Response({"detail": str(exc), "version": current}, status=status.HTTP_409_CONFLICT)
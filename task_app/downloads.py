@@ -0,0 +1,208 @@
+import hashlib
+import json
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from rest_framework.renderers import BaseRenderer
+
+
+# protected attachment downloads
+# after the permission check the bytes are handed off instead of being copied
+# through Python:
+#   "x-accel"    nginx serves X_ACCEL_PREFIX + name from an internal location
+#   "x-sendfile" Apache / lighttpd serve the absolute path
+#   "django"     FileResponse; WSGI servers with wsgi.file_wrapper (gunicorn)
+#                use sendfile(), and Range / If-Range requests get a 206
+# Remote storages (S3 through django-storages) redirect to a short-lived
+# presigned URL instead.
+
+DEFAULTS = {
+    "BACKEND": "django",
+    "X_ACCEL_PREFIX": "/protected-media/",
+    "PRESIGNED_EXPIRES": 300,
+}
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "TASK_DOWNLOADS", {})}
+
+
+# the task owner, its assignee and the uploader may download
+def can_download(user, attachment):
+    task = attachment.task
+    return user.id in (task.created_by_id, task.assigned_to_id, attachment.uploaded_by_id)
+
+
+# strong validator: the content hash for blobs, otherwise name + size + upload time
+def attachment_etag(attachment):
+    if attachment.blob_id is not None:
+        return f'"{attachment.blob.sha256}"'
+    raw = f"{attachment.file.name}:{attachment.size}:{attachment.uploaded_at.isoformat()}"
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def local_path(storage, name):
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+# (start, end) inclusive, None to send the whole file, or "unsatisfiable"
+def parse_range(header, size):
+    match = RANGE.match(header.replace(" ", ""))
+    if not match:
+        # multiple or malformed ranges: a full response is always allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return "unsatisfiable"
+    return start, end
+
+
+# If-Range names the representation the client already has part of
+def range_applies(request, etag, last_modified):
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+# a window of an open file; keeps fileno()/tell() so sendfile() still applies
+class RangeFile:
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def download_response(request, attachment):
+    name = attachment.file.name
+    return serve_file(
+        request, attachment.file.storage, name,
+        filename=attachment.filename or name.rsplit("/", 1)[-1],
+        content_type=attachment.content_type,
+        etag=attachment_etag(attachment),
+        last_modified=attachment.uploaded_at,
+    )
+
+
+def thumbnail_response(request, attachment):
+    blob = attachment.blob
+    if blob is None or not blob.thumbnail:
+        raise Http404("No thumbnail for this file.")
+    return serve_file(
+        request, attachment.file.storage, blob.thumbnail,
+        filename=f"{attachment.filename.rsplit('.', 1)[0] or 'thumbnail'}.jpg",
+        content_type="image/jpeg",
+        etag=f'"{blob.sha256}-thumbnail"',
+        last_modified=blob.processed_at,
+    )
+
+
+# `name` in `storage`, for any caller that has already checked access
+def serve_file(request, storage, name, filename, content_type, etag, last_modified):
+    config = get_config()
+    content_type = content_type or "application/octet-stream"
+    disposition = content_disposition_header(True, filename)
+
+    path = local_path(storage, name)
+    if path is None:
+        try:
+            url = storage.url(name, parameters={
+                "ResponseContentDisposition": disposition,
+                "ResponseContentType": content_type,
+            }, expire=config["PRESIGNED_EXPIRES"])
+        except TypeError:
+            url = storage.url(name)
+        return HttpResponseRedirect(url)
+
+    last_modified = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = file_response(request, config, storage, name, path, etag, last_modified)
+        if response.status_code in (200, 206):
+            response["Content-Type"] = content_type
+            response["Content-Disposition"] = disposition
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private"
+    return response
+
+
+def file_response(request, config, storage, name, path, etag, last_modified):
+    backend = config["BACKEND"]
+    if backend == "x-accel":
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = config["X_ACCEL_PREFIX"].rstrip("/") + "/" + quote(name)
+        return response
+    if backend == "x-sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = path
+        return response
+
+    size = storage.size(name)
+    byte_range = None
+    if request.method == "GET" and "HTTP_RANGE" in request.META and range_applies(request, etag, last_modified):
+        byte_range = parse_range(request.META["HTTP_RANGE"], size)
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = open(path, "rb")
+    if byte_range is None:
+        response = FileResponse(file)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), status=206)
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+# lets a download be requested with any Accept header (the view returns the
+# file response itself; only error payloads are rendered)
+class PassthroughRenderer(BaseRenderer):
+    media_type = "*/*"
+    format = "bin"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
@@ -0,0 +1,179 @@
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+
+# task change feed
+# writes append TaskEvent rows for the task owner; readers ask for the events
+# after a cursor (the last event id they saw), either long-polling or over
+# server-sent events. While waiting, readers only look at a per-user "changed"
+# stamp in the cache and hit the database when it moves (or every
+# RECHECK_INTERVAL seconds, for caches that are not shared between workers).
+# A waiting reader holds a sync worker for up to MAX_WAIT (long-poll) or
+# STREAM_SECONDS (SSE), so both stay well under the WSGI server's worker timeout
+# (gunicorn: 30s); clients simply poll again or reconnect with Last-Event-ID.
+# Event ids are handed out at insert, not at commit, so a slower transaction can
+# commit an id below one a reader already moved past. As in delta sync
+# (task_app/sync.py), events from the last SETTLE_SECONDS are held back, and so
+# is everything after the first of them: a cursor never passes an id that may
+# still be in flight.
+
+DEFAULTS = {
+    "POLL_INTERVAL": 1.0,
+    "RECHECK_INTERVAL": 5.0,
+    "MAX_WAIT": 10,
+    "STREAM_SECONDS": 20,
+    "HEARTBEAT_INTERVAL": 10,
+    "RETRY_MS": 3000,
+    "PAGE_SIZE": 100,
+    "RETENTION_DAYS": 30,
+    "SETTLE_SECONDS": 1.0,
+}
+EVENT_FIELDS = ("title", "description", "status", "priority", "due_date", "assigned_to_id", "is_deleted")
+STAMP_KEY = "task_events:stamp:{user_id}"
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "TASK_EVENTS", {})}
+
+
+# {field: new value} for the tracked fields that differ from `before`
+def task_changes(before, task):
+    changes = {}
+    for name in EVENT_FIELDS:
+        value = getattr(task, name)
+        if before is None or before[name] != value:
+            changes[name.removesuffix("_id")] = value
+    return changes
+
+
+def build_event(task, kind, actor_id=None, data=None):
+    from .models import TaskEvent
+
+    return TaskEvent(user_id=task.created_by_id, task_id=task.pk, actor_id=actor_id, kind=kind, data=data or {})
+
+
+def task_saved_event(before, task, created=False):
+    if created:
+        return build_event(task, "created", actor_id=task.created_by_id, data={"changes": task_changes(None, task)})
+    changes = task_changes(before, task)
+    if not changes:
+        return None
+    if changes.get("is_deleted"):
+        kind = "deleted"
+    elif "assigned_to" in changes:
+        kind = "assigned"
+    else:
+        kind = "updated"
+    return build_event(task, kind, data={"changes": changes})
+
+
+def record_events(events, batch_size=None):
+    from .models import TaskEvent
+
+    events = [event for event in events if event is not None]
+    if not events:
+        return []
+    events = TaskEvent.objects.bulk_create(events, batch_size=batch_size)
+    notify({event.user_id for event in events})
+    return events
+
+
+# readers compare stamps, so any new value wakes them; set after commit so a
+# woken reader can see the rows
+def notify(user_ids):
+    stamps = {STAMP_KEY.format(user_id=user_id): time.time_ns() for user_id in user_ids}
+    transaction.on_commit(lambda: cache.set_many(stamps, None))
+
+
+def settle_horizon():
+    return timezone.now() - timedelta(seconds=get_config()["SETTLE_SECONDS"])
+
+
+# the settled events after `cursor`, up to the first one that has not settled
+def events_after(user_id, cursor, limit):
+    from .models import TaskEvent
+
+    horizon = settle_horizon()
+    events = []
+    for event in TaskEvent.objects.filter(user_id=user_id, id__gt=cursor).order_by("id")[:limit]:
+        if event.created_at >= horizon:
+            break
+        events.append(event)
+    return events
+
+
+def latest_cursor(user_id):
+    from .models import TaskEvent
+
+    events = TaskEvent.objects.filter(user_id=user_id, created_at__lt=settle_horizon())
+    return events.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+# events after `cursor`, waiting up to `wait` seconds for the first one
+def wait_for_events(user_id, cursor, wait, limit):
+    config = get_config()
+    key = STAMP_KEY.format(user_id=user_id)
+    deadline = time.monotonic() + wait
+    # read the stamp before querying: a commit after this point changes it
+    stamp = cache.get(key)
+    events = events_after(user_id, cursor, limit)
+    checked = time.monotonic()
+    # events that are still settling do not move the stamp again, so look
+    # again once they have settled
+    recheck = config["SETTLE_SECONDS"]
+    while not events:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        time.sleep(min(config["POLL_INTERVAL"], deadline - now))
+        current = cache.get(key)
+        if current == stamp and time.monotonic() - checked < recheck:
+            continue
+        recheck = config["SETTLE_SECONDS"] if current != stamp else config["RECHECK_INTERVAL"]
+        stamp = current
+        events = events_after(user_id, cursor, limit)
+        checked = time.monotonic()
+    return events
+
+
+def format_sse(event_id, kind, payload):
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(payload, cls=DjangoJSONEncoder)}\n\n"
+
+
+# server-sent events for up to STREAM_SECONDS; the client reconnects with
+# Last-Event-ID and carries on where the stream stopped
+def stream_events(user_id, cursor, serialize, limit=None):
+    config = get_config()
+    limit = limit or config["PAGE_SIZE"]
+    deadline = time.monotonic() + config["STREAM_SECONDS"]
+    yield f"retry: {config['RETRY_MS']}\n\n"
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = wait_for_events(user_id, cursor, min(remaining, config["HEARTBEAT_INTERVAL"]), limit)
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        for event in events:
+            yield format_sse(event.id, event.kind, serialize(event))
+        cursor = events[-1].id
+
+
+# lets DRF content negotiation accept "Accept: text/event-stream" / ?format=sse;
+# the view streams the body itself
+class EventStreamRenderer(BaseRenderer):
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
@@ -0,0 +1,148 @@
+from operator import itemgetter
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+from task_management.instrumentation import measure_serialization
+
+from .models import Tag
+
+
+# read-only fast path for task lists
+# builds TaskSerializer's output straight from .values() rows: one query for
+# the page (users joined in) and one for its tags, no model instances and no
+# per-field serializer dispatch. The output is the same JSON, key for key, for
+# any ?fields= / ?expand= choice (task_app/fieldsets.py); anything that writes
+# or needs instances keeps using TaskSerializer.
+
+TASK_FIELDS = (
+    "id", "title", "description", "status", "priority", "due_date",
+    "tags", "assigned_to", "created_by", "created_at", "updated_at", "version",
+)
+DATETIME_FIELDS = ("due_date", "created_at", "updated_at")
+DEFAULT_EXPAND = ("assigned_to", "tags")
+# values() columns per field: nested form, compact form
+RELATION_COLUMNS = {
+    "assigned_to": (("assigned_to_id", "assigned_to__username", "assigned_to__email"), ("assigned_to_id",)),
+    "created_by": (("created_by_id", "created_by__username", "created_by__email"), ("created_by__username",)),
+    "tags": ((), ()),
+}
+
+
+# DateTimeField.to_representation without the per-call field lookups
+def datetime_formatter():
+    if (api_settings.DATETIME_FORMAT or "").lower() != ISO_8601:
+        return DateTimeField().to_representation
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def format_datetime(value):
+        if not value:
+            return None
+        if tz is not None:
+            value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    return format_datetime
+
+
+def user_getter(prefix):
+    id_key, username_key, email_key = f"{prefix}_id", f"{prefix}__username", f"{prefix}__email"
+
+    def get(row):
+        user_id = row[id_key]
+        if user_id is None:
+            return None
+        return {"id": user_id, "username": row[username_key], "email": row[email_key]}
+
+    return get
+
+
+# one field selection (?fields= / ?expand=) of TaskSerializer
+class TaskRows:
+
+    def __init__(self, fields=None, expand=None, extra_columns=()):
+        expand = DEFAULT_EXPAND if expand is None else expand
+        self.fields = [name for name in TASK_FIELDS if fields is None or name in fields]
+        self.nested = {name for name in RELATION_COLUMNS if name in expand}
+        # loaded but not rendered, e.g. the sort keys a cursor is built from
+        self.extra_columns = extra_columns
+
+    def columns(self):
+        columns = dict.fromkeys(["id", *self.extra_columns])
+        for name in self.fields:
+            if name in RELATION_COLUMNS:
+                nested, compact = RELATION_COLUMNS[name]
+                columns.update(dict.fromkeys(nested if name in self.nested else compact))
+            else:
+                columns[name] = None
+        return list(columns)
+
+    def values(self, queryset):
+        return queryset.select_related(None).prefetch_related(None).values(*self.columns())
+
+    # same query shape and order as prefetch_related("tags")
+    def tag_query(self, task_ids):
+        return Tag.objects.filter(task__in=task_ids).values_list("task__id", "id", "name")
+
+    def group_tags(self, tag_rows):
+        tags = {}
+        nested = "tags" in self.nested
+        for task_id, tag_id, name in tag_rows:
+            tags.setdefault(task_id, []).append({"id": tag_id, "name": name} if nested else tag_id)
+        return tags
+
+    def tags(self, rows):
+        ids = [row["id"] for row in rows] if "tags" in self.fields else []
+        return self.group_tags(self.tag_query(ids)) if ids else {}
+
+    async def atags(self, rows):
+        ids = [row["id"] for row in rows] if "tags" in self.fields else []
+        return self.group_tags([row async for row in self.tag_query(ids)]) if ids else {}
+
+    def getters(self, tags):
+        format_datetime = datetime_formatter()
+        getters = []
+        for name in self.fields:
+            if name in DATETIME_FIELDS:
+                get = (lambda key: lambda row: format_datetime(row[key]))(name)
+            elif name == "tags":
+                get = lambda row: tags.get(row["id"], [])
+            elif name == "assigned_to":
+                get = user_getter("assigned_to") if name in self.nested else itemgetter("assigned_to_id")
+            elif name == "created_by":
+                get = user_getter("created_by") if name in self.nested else itemgetter("created_by__username")
+            else:
+                get = itemgetter(name)
+            getters.append((name, get))
+        return getters
+
+    def serialize(self, rows, tags):
+        getters = self.getters(tags)
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+    def serialize_page(self, rows):
+        rows = list(rows)
+        return self.serialize(rows, self.tags(rows))
+
+
+# list() for task viewsets: filters, search, ordering and both paginators run
+# unchanged on the values() queryset
+class FastTaskListMixin:
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_list:
+            return super().list(request, *args, **kwargs)
+        task_rows = TaskRows(*self.get_fieldset(), extra_columns=getattr(self, "ordering_fields", ()))
+        rows = task_rows.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        rows = list(rows if page is None else page)
+        tags = task_rows.tags(rows)
+        with measure_serialization(request):
+            data = task_rows.serialize(rows, tags)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
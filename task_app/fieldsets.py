@@ -0,0 +1,113 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from task_management.instrumentation import measure_serialization
+
+
+# sparse fieldsets and relation expansion
+# ?fields=id,title,status keeps only those top-level fields in the response;
+# ?expand=assigned_to,tags lists the relations rendered as nested objects, the
+# other expandable ones collapse to their compact form (an id, ids or a
+# username). Without the parameters every serializer keeps its usual shape.
+# Viewsets read the same choice to load only the columns and relations the
+# response will use.
+
+
+def parse_names(value):
+    return list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+
+
+# serializer side: expandable_fields maps a field name to factories for its
+# (nested, compact) fields; default_expand are the ones declared nested.
+# Only the output changes: on writes every declared field still takes input
+# and ?fields= trims the rendered response instead of the serializer.
+class ExpandableFieldsMixin:
+    expandable_fields = {}
+    default_expand = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        reading = request is None or request.method in SAFE_METHODS
+        fields, expand = self.context.get("fields"), self.context.get("expand")
+        if expand is not None:
+            for name, (nested, compact) in self.expandable_fields.items():
+                if name not in self.fields or (name in expand) == (name in self.default_expand):
+                    continue
+                # a writable field keeps taking input on writes
+                if reading or self.fields[name].read_only:
+                    self.fields[name] = nested() if name in expand else compact()
+        self.output_fields = None
+        if fields is not None:
+            if reading:
+                for name in list(self.fields):
+                    if name not in fields:
+                        self.fields.pop(name)
+            else:
+                self.output_fields = fields
+
+    def to_representation(self, instance):
+        # rows of the response only; nested serializers are inside their time
+        if self.root in (self, self.parent):
+            with measure_serialization(self.context.get("request")):
+                data = super().to_representation(instance)
+        else:
+            data = super().to_representation(instance)
+        if self.output_fields is not None:
+            for name in list(data):
+                if name not in self.output_fields:
+                    data.pop(name)
+        return data
+
+
+# viewset side: validates the parameters against the serializer class and
+# passes them on in the serializer context
+class SparseFieldsetMixin:
+
+    def get_fieldset(self):
+        if not hasattr(self, "_fieldset"):
+            serializer_class = self.get_serializer_class()
+            params = self.request.query_params
+            fields = expand = None
+            if params.get("fields"):
+                fields = parse_names(params["fields"])
+                allowed = list(serializer_class.Meta.fields)
+                unknown = [name for name in fields if name not in allowed]
+                if unknown:
+                    raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"})
+            if "expand" in params:
+                expand = parse_names(params["expand"])
+                allowed = list(getattr(serializer_class, "expandable_fields", {}))
+                unknown = [name for name in expand if name not in allowed]
+                if unknown:
+                    raise ValidationError({"expand": f"Cannot expand: {', '.join(unknown)}. Allowed: {', '.join(allowed) or 'none'}"})
+            self._fieldset = (fields, expand)
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if getattr(self, "request", None) is not None:
+            context["fields"], context["expand"] = self.get_fieldset()
+        return context
+
+    def wants_field(self, name):
+        fields, _ = self.get_fieldset()
+        return fields is None or name in fields
+
+    def expands_field(self, name):
+        _, expand = self.get_fieldset()
+        if expand is None:
+            expand = getattr(self.get_serializer_class(), "default_expand", ())
+        return self.wants_field(name) and name in expand
+
+    # .only() arguments for the requested fields; `columns` maps a field to the
+    # model columns it reads, or to {True: nested, False: compact} columns
+    def get_only_fields(self, columns):
+        only = set()
+        for name, needed in columns.items():
+            if not self.wants_field(name):
+                continue
+            if isinstance(needed, dict):
+                needed = needed[self.expands_field(name)]
+            only.update(needed)
+        return sorted(only)
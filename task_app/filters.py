@@ -0,0 +1,17 @@
+from rest_framework.filters import SearchFilter
+
+from .search import search_tasks
+
+
+# ?search= backed by the full-text index, ranked by relevance
+# falls back to the icontains SearchFilter on databases without a backend
+class TaskSearchFilter(SearchFilter):
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip():
+            return queryset
+        results = search_tasks(queryset, query)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        return results
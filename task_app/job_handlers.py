@@ -0,0 +1,92 @@
+import io
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from .blobs import get_storage
+from .jobs import job
+from .models import FileAttachment, FileBlob
+from .stats import rebuild_stats
+
+
+# background work run by `manage.py run_jobs` (task_app/jobs.py); the export
+# job lives with the export code in auth_app/exports.py
+
+SNIFF_BYTES = 64
+SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+]
+# client-sent types that the sniffed type may replace
+GENERIC_TYPES = ("", "application/octet-stream")
+THUMBNAIL_TYPES = ("image/png", "image/jpeg", "image/gif", "image/webp")
+THUMBNAIL_SIZE = (320, 320)
+
+
+def sniff_content_type(head):
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return ""
+
+
+# JPEG preview next to the blob; needs Pillow, skipped without it
+def make_thumbnail(storage, blob):
+    try:
+        from PIL import Image
+    except ImportError:
+        return ""
+    buffer = io.BytesIO()
+    with storage.open(blob.name, "rb") as source:
+        try:
+            image = Image.open(source)
+            # JPEG decoders can scale down while decoding
+            image.draft("RGB", THUMBNAIL_SIZE)
+            image.thumbnail(THUMBNAIL_SIZE)
+            image.convert("RGB").save(buffer, "JPEG", quality=85)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return ""
+    name = f"thumbnails/{blob.sha256[:2]}/{blob.sha256}.jpg"
+    # a retried job overwrites its earlier attempt
+    storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+# new blobs: record the sniffed type (fixing attachments uploaded as
+# application/octet-stream) and render a thumbnail for images
+@job("process_blob", priority=10)
+def process_blob(job):
+    blob = FileBlob.objects.filter(pk=job.payload["blob_id"]).first()
+    if blob is None:
+        return {"skipped": "blob was deleted"}
+    storage = get_storage()
+    with storage.open(blob.name, "rb") as file:
+        content_type = sniff_content_type(file.read(SNIFF_BYTES))
+    thumbnail = make_thumbnail(storage, blob) if content_type in THUMBNAIL_TYPES else ""
+    updated = FileBlob.objects.filter(pk=blob.pk).update(
+        content_type=content_type, thumbnail=thumbnail, processed_at=timezone.now()
+    )
+    if not updated and thumbnail:
+        # released while we were working
+        storage.delete(thumbnail)
+    # the attachments render both, so their file list ETags have to move
+    now = timezone.now()
+    if content_type:
+        FileAttachment.objects.filter(blob=blob, content_type__in=GENERIC_TYPES).update(
+            content_type=content_type, updated_at=now
+        )
+    if thumbnail:
+        FileAttachment.objects.filter(blob=blob).update(updated_at=now)
+    return {"content_type": content_type, "thumbnail": thumbnail}
+
+
+# payload {"user_ids": [...]} or {} for everyone
+@job("rebuild_stats")
+def rebuild_task_stats(job):
+    return {"counters": rebuild_stats(user_ids=job.payload.get("user_ids"))}
@@ -0,0 +1,240 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+# database-backed background jobs
+# a request enqueues a row (in its own transaction, so a job never runs for
+# work that was rolled back) and returns; `manage.py run_jobs` claims ready
+# rows highest priority first and runs them on a thread pool. A claimed job is
+# invisible to other workers until VISIBILITY_TIMEOUT passes without a
+# heartbeat, so a crashed worker's jobs are picked up again. Failures are
+# retried with exponential backoff until max_attempts, so a handler must be
+# safe to run more than once.
+#
+# handlers are registered with @job("name") and receive the Job row:
+#
+#     @job("rebuild_stats")
+#     def rebuild(job):
+#         return {"counters": rebuild_stats(job.payload.get("user_ids"))}
+
+DEFAULTS = {
+    "WORKERS": 4,
+    "POLL_INTERVAL": 1.0,
+    "VISIBILITY_TIMEOUT": 300,
+    "MAX_ATTEMPTS": 5,
+    # retry n waits RETRY_BASE * 2 ** (n - 1) seconds, plus jitter
+    "RETRY_BASE": 10,
+    "RETRY_MAX": 3600,
+    "RETENTION_DAYS": 7,
+}
+
+Handler = namedtuple("Handler", ["func", "priority", "max_attempts"])
+HANDLERS = {}
+
+logger = logging.getLogger(__name__)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "TASK_JOBS", {})}
+
+
+def job(name, priority=0, max_attempts=None):
+    def register(func):
+        HANDLERS[name] = Handler(func, priority, max_attempts)
+        return func
+    return register
+
+
+# a job with the same key that is still queued or running absorbs the new
+# request; job_pending_key_uniq (a partial unique index) settles concurrent
+# enqueues, the loser returns the winner's job
+def enqueue(name, payload=None, user=None, priority=None, delay=0, key=""):
+    handler = HANDLERS.get(name)
+    if handler is None:
+        raise LookupError(f"No job handler registered for {name!r}")
+    job = Job(
+        name=name,
+        payload=payload or {},
+        created_by=user,
+        priority=handler.priority if priority is None else priority,
+        max_attempts=handler.max_attempts or get_config()["MAX_ATTEMPTS"],
+        run_at=timezone.now() + timedelta(seconds=delay),
+        key=key,
+    )
+    if not key:
+        job.save(force_insert=True)
+        return job
+    with transaction.atomic():
+        pending = Job.objects.select_for_update().filter(key=key, status__in=Job.PENDING_STATUSES).first()
+        if pending is not None:
+            return pending
+        try:
+            with transaction.atomic():
+                job.save(force_insert=True)
+        except IntegrityError:
+            return Job.objects.get(key=key, status__in=Job.PENDING_STATUSES)
+    return job
+
+
+def ready_jobs(now):
+    return Q(status="queued", run_at__lte=now) | Q(status="running", locked_until__lt=now)
+
+
+# lock up to `limit` ready jobs for this worker
+def claim_jobs(worker_id, limit, now=None):
+    config = get_config()
+    now = now or timezone.now()
+    with transaction.atomic():
+        candidates = Job.objects.filter(ready_jobs(now)).order_by("-priority", "run_at")
+        if connections[DEFAULT_DB_ALIAS].features.has_select_for_update_skip_locked:
+            # PostgreSQL: concurrent workers skip each other's rows; SQLite
+            # serializes the whole claim with its write lock instead
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list("id", flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.filter(ready_jobs(now), id__in=ids).update(
+            status="running",
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=config["VISIBILITY_TIMEOUT"]),
+            attempts=F("attempts") + 1,
+            started_at=now,
+        )
+        return list(Job.objects.filter(id__in=ids, locked_by=worker_id, status="running").order_by("-priority", "run_at"))
+
+
+# push back the visibility timeout of jobs that are still running
+def extend_locks(worker_id, ids):
+    until = timezone.now() + timedelta(seconds=get_config()["VISIBILITY_TIMEOUT"])
+    return Job.objects.filter(id__in=ids, locked_by=worker_id, status="running").update(locked_until=until)
+
+
+def retry_delay(attempts):
+    config = get_config()
+    delay = min(config["RETRY_MAX"], config["RETRY_BASE"] * 2 ** max(0, attempts - 1))
+    return delay + random.uniform(0, delay / 4)
+
+
+# updates only apply while this worker still holds the job
+def finish_job(job, worker_id, **fields):
+    return Job.objects.filter(pk=job.pk, locked_by=worker_id, status="running").update(
+        locked_until=None, finished_at=timezone.now(), **fields
+    )
+
+
+def fail_job(job, worker_id, error):
+    if job.attempts < job.max_attempts:
+        return Job.objects.filter(pk=job.pk, locked_by=worker_id, status="running").update(
+            status="queued",
+            locked_by="",
+            locked_until=None,
+            run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            error=error,
+        )
+    return finish_job(job, worker_id, status="failed", error=error)
+
+
+def run_job(job, worker_id):
+    handler = HANDLERS.get(job.name)
+    if handler is None:
+        return finish_job(job, worker_id, status="failed", error=f"No job handler registered for {job.name!r}")
+    if job.attempts > job.max_attempts:
+        # claimed again after its worker died on the last attempt
+        return finish_job(job, worker_id, status="failed", error=job.error or "Visibility timeout expired.")
+    try:
+        return finish_job(job, worker_id, status="done", result=handler.func(job), error="")
+    except Exception:
+        logger.exception("job %s (%s) failed, attempt %s of %s", job.pk, job.name, job.attempts, job.max_attempts)
+        return fail_job(job, worker_id, traceback.format_exc())
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+# claims jobs while it has free threads, heartbeats the running ones and
+# waits for them to finish on stop()
+class Worker:
+
+    def __init__(self, concurrency=None, poll_interval=None):
+        config = get_config()
+        self.id = worker_name()
+        self.concurrency = concurrency or config["WORKERS"]
+        self.poll_interval = config["POLL_INTERVAL"] if poll_interval is None else poll_interval
+        self.heartbeat_interval = config["VISIBILITY_TIMEOUT"] / 3
+        self.stopping = threading.Event()
+        self.processed = 0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def execute(self, claimed):
+        try:
+            run_job(claimed, self.id)
+        finally:
+            # each pool thread has its own connection
+            connections.close_all()
+
+    # burst: exit once nothing is ready or running
+    def run(self, burst=False):
+        running = {}
+        next_heartbeat = timezone.now() + timedelta(seconds=self.heartbeat_interval)
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="job") as pool:
+            while not self.stopping.is_set():
+                free = self.concurrency - len(running)
+                claimed = claim_jobs(self.id, free) if free else []
+                for item in claimed:
+                    running[pool.submit(self.execute, item)] = item.pk
+                if running and timezone.now() >= next_heartbeat:
+                    extend_locks(self.id, list(running.values()))
+                    next_heartbeat = timezone.now() + timedelta(seconds=self.heartbeat_interval)
+                if not running:
+                    if burst:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.collect(future, running.pop(future))
+            # stop(): let the running jobs finish, nothing new is claimed
+            for future, pk in running.items():
+                self.collect(future, pk)
+        return self.processed
+
+    # run_job records handler errors on the job; anything escaping it (a lost
+    # database connection, say) would otherwise vanish with the future
+    def collect(self, future, pk):
+        error = future.exception()
+        self.processed += 1
+        if error is not None:
+            logger.error("worker %s lost job %s", self.id, pk, exc_info=error)
+
+
+# finished jobs and their artifacts (result["file"]) older than RETENTION_DAYS
+def prune_jobs(days=None, now=None):
+    days = get_config()["RETENTION_DAYS"] if days is None else days
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    finished = Job.objects.filter(status__in=("done", "failed"), finished_at__lt=cutoff)
+    count = 0
+    for pk, result in finished.values_list("pk", "result").iterator():
+        if isinstance(result, dict) and result.get("file"):
+            default_storage.delete(result["file"])
+        Job.objects.filter(pk=pk).delete()
+        count += 1
+    return count
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task_app.benchmark import percentile, seed
+
+
+ENDPOINTS = [
+    ("tasks-list", "/api/tasks-routes/tasks/", "/api/async/tasks-routes/tasks/"),
+    ("comments-list", "/api/tasks-routes/comments/?task_pk={task}", "/api/async/tasks-routes/comments/?task_pk={task}"),
+    ("files-list", "/api/tasks-routes/file-upload/?task_pk={task}", "/api/async/tasks-routes/file-upload/?task_pk={task}"),
+    ("analytics-overview", "/api/auth-routes/analytics/overview/", "/api/async/auth-routes/analytics/overview/"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the read endpoints on a throwaway test database and compare "
+        "DRF views behind the WSGI handler, the same views behind the ASGI handler "
+        "and the native async views."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and mode.")
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--users", type=int, default=3)
+        parser.add_argument("--tasks", type=int, default=100, help="Tasks per user.")
+
+    def handle(self, *args, **options):
+        logging.getLogger("task_management.instrumentation").setLevel(logging.ERROR)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with mock.patch("rest_framework.views.APIView.get_throttles", return_value=[]):
+                self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run_benchmark(self, options):
+        data = seed(users=options["users"], tasks=options["tasks"])
+        headers = {
+            "Authorization": f"Bearer {RefreshToken.for_user(data.owner).access_token}",
+            # measure the views, not the response cache
+            "Cache-Control": "no-cache",
+        }
+        task = data.owner_tasks()[0].id
+        total, concurrency = options["requests"], options["concurrency"]
+
+        self.stdout.write(f"{'endpoint':22} {'mode':18} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, sync_path, async_path in ENDPOINTS:
+            runs = [
+                ("drf / wsgi", self.run_wsgi(sync_path.format(task=task), headers, total, concurrency)),
+                ("drf / asgi", asyncio.run(self.run_asgi(sync_path.format(task=task), headers, total, concurrency))),
+                ("async / asgi", asyncio.run(self.run_asgi(async_path.format(task=task), headers, total, concurrency))),
+            ]
+            for mode, (elapsed, samples) in runs:
+                self.stdout.write(
+                    f"{name:22} {mode:18} {total / elapsed:9.1f} "
+                    f"{statistics.median(samples):9.2f} {percentile(samples, 95):9.2f}"
+                )
+
+    def run_wsgi(self, path, headers, total, concurrency):
+        def call(_):
+            client = Client()
+            start = time.perf_counter()
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, (path, response.status_code)
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(call, range(total)))
+        return time.perf_counter() - start, samples
+
+    async def run_asgi(self, path, headers, total, concurrency):
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with limit:
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200, (path, response.status_code)
+                return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(*(call() for _ in range(total)))
+        return time.perf_counter() - start, samples
@@ -0,0 +1,78 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from task_app.benchmark import seed
+from task_app.fast_serializers import TaskRows
+from task_app.models import Task
+from task_app.serializers import TaskSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark one task list page on a throwaway test database: TaskSerializer "
+        "on model instances against the values() fast path, checking that both render the same JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=500, help="Tasks per user.")
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=30)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run_benchmark(self, options):
+        data = seed(users=3, tasks=options["tasks"], comments=0, attachments=0)
+        size, repeat = options["page_size"], options["repeat"]
+        page = (
+            Task.objects.select_related("assigned_to", "created_by").prefetch_related("tags")
+            .filter(created_by=data.owner).order_by("-created_at")
+        )
+
+        def drf_fetch():
+            return list(page[:size])
+
+        task_rows = TaskRows()
+
+        def fast_fetch():
+            rows = list(task_rows.values(page)[:size])
+            return rows, task_rows.tags(rows)
+
+        instances = drf_fetch()
+        rows, tags = fast_fetch()
+        render = JSONRenderer().render
+        if render(TaskSerializer(instances, many=True).data) != render(task_rows.serialize(rows, tags)):
+            raise CommandError("The fast path renders different JSON than TaskSerializer.")
+
+        runs = [
+            ("TaskSerializer", "serialize", lambda: TaskSerializer(instances, many=True).data),
+            ("values() fast path", "serialize", lambda: task_rows.serialize(rows, tags)),
+            ("TaskSerializer", "fetch + serialize", lambda: TaskSerializer(drf_fetch(), many=True).data),
+            ("values() fast path", "fetch + serialize", lambda: task_rows.serialize_page(task_rows.values(page)[:size])),
+        ]
+        self.stdout.write(f"{len(instances)} tasks per page, median of {repeat} runs")
+        self.stdout.write(f"{'serializer':20} {'work':18} {'ms/page':>9} {'us/row':>9} {'speedup':>8}")
+        baseline = {}
+        for name, work, run in runs:
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                samples.append(time.perf_counter() - start)
+            median = statistics.median(samples)
+            baseline.setdefault(work, median)
+            self.stdout.write(
+                f"{name:20} {work:18} {median * 1000:9.2f} {median / len(instances) * 1e6:9.1f} "
+                f"{baseline[work] / median:7.1f}x"
+            )
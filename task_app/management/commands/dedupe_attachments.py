@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from task_app.blobs import acquire_or_store_blob, get_storage, hash_file
+from task_app.models import FileAttachment
+
+
+# move attachments stored before content addressing onto shared blobs
+class Command(BaseCommand):
+    help = "Move legacy attachment files into content-addressed blobs, storing each distinct file once."
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        moved = missing = 0
+        for attachment in FileAttachment.objects.filter(blob__isnull=True).exclude(file="").iterator():
+            old_name = attachment.file.name
+            if not storage.exists(old_name):
+                missing += 1
+                continue
+            with storage.open(old_name, "rb") as f:
+                sha256, size = hash_file(f)
+                f.seek(0)
+                blob = acquire_or_store_blob(sha256, size, f)
+            FileAttachment.objects.filter(pk=attachment.pk).update(file=blob.name, blob=blob, updated_at=timezone.now())
+            if not FileAttachment.objects.filter(file=old_name).exists():
+                storage.delete(old_name)
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} attachments ({missing} with missing files skipped)."))
@@ -0,0 +1,145 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from task_app.benchmark import seed
+from task_app.models import Comment, FileAttachment, Task, TaskEvent
+
+
+API = "/api/tasks-routes"
+# the read paths behind the task board; {task} is one of the user's tasks
+HOT_PATHS = [
+    ("tasks-list", f"{API}/tasks/"),
+    ("tasks-list-status", f"{API}/tasks/?status=todo"),
+    ("tasks-list-priority", f"{API}/tasks/?ordering=-priority"),
+    ("tasks-list-due-cursor", f"{API}/tasks/?ordering=due_date&pagination=cursor"),
+    ("tasks-list-status-cursor", f"{API}/tasks/?status=in_progress&pagination=cursor"),
+    ("tasks-trash", f"{API}/tasks/?include_deleted=true"),
+    ("tasks-detail", f"{API}/tasks/{{task}}/"),
+    ("tasks-changes", f"{API}/tasks/changes/"),
+    ("tasks-events", f"{API}/tasks/events/?cursor=0&wait=0"),
+    ("comments-list", f"{API}/comments/?task_pk={{task}}"),
+    ("files-list", f"{API}/file-upload/?task_pk={{task}}"),
+    ("users-directory", "/api/auth-routes/all-users/?mode=directory&include=task_summary"),
+]
+# a full scan of these tables grows with the data set
+WATCHED_TABLES = [model._meta.db_table for model in (Task, Comment, FileAttachment, TaskEvent)]
+
+
+# (table scans, indexes used, sorts) of one EXPLAIN
+def sqlite_plan(rows):
+    scans, indexes, sorts = [], [], 0
+    for row in rows:
+        detail = row[-1]
+        words = detail.split()
+        if words[0] in ("SCAN", "SEARCH") and " INDEX " in f" {detail} ":
+            indexes.append(words[words.index("INDEX") + 1])
+        elif words[0] == "SEARCH":
+            indexes.append("primary key")
+        elif words[0] == "SCAN" and words[1:3] != ["CONSTANT", "ROW"]:
+            scans.append(words[1])
+        elif detail.startswith("USE TEMP B-TREE"):
+            sorts += 1
+    return scans, indexes, sorts
+
+
+def postgresql_plan(rows):
+    scans, indexes, sorts = [], [], 0
+    plan = rows[0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        kind = node["Node Type"]
+        if kind == "Seq Scan":
+            scans.append(node["Relation Name"])
+        elif "Index Name" in node:
+            indexes.append(node["Index Name"])
+        elif kind in ("Sort", "Incremental Sort"):
+            sorts += 1
+        nodes.extend(node.get("Plans", []))
+    return scans, indexes, sorts
+
+
+PLAN_PARSERS = {"sqlite": sqlite_plan, "postgresql": postgresql_plan}
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN every SELECT behind the hot task endpoints and report whether it is served by an index. "
+        "Runs on a seeded throwaway database, or on the configured one with --user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Explain as this user against the configured database (read-only requests).")
+        parser.add_argument("--tasks", type=int, default=2000, help="Tasks per user on the throwaway database.")
+        parser.add_argument("--fail-on-scan", action="store_true",
+                            help="Exit with an error when a query scans a whole task, comment, file or event table.")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in PLAN_PARSERS:
+            raise CommandError(f"EXPLAIN output of {connection.vendor} is not understood; use SQLite or PostgreSQL.")
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}.")
+            return self.explain_all(user, options)
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            data = seed(users=3, tasks=options["tasks"])
+            Task.objects.filter(pk__in=[task.pk for task in data.owner_tasks()[::10]]).update(is_deleted=True)
+            # planner statistics, so the plans match a populated database
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            self.explain_all(data.owner, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def explain_all(self, user, options):
+        task = Task.objects.filter(created_by=user, is_deleted=False).order_by("-created_at").first()
+        client = APIClient()
+        client.force_authenticate(user)
+        parse = PLAN_PARSERS[connection.vendor]
+        prefix = connection.ops.explain_query_prefix(format="json" if connection.vendor == "postgresql" else None)
+        watched_scans = []
+        for name, path in HOT_PATHS:
+            if "{task}" in path and task is None:
+                continue
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(path.format(task=task.pk if task else ""), HTTP_CACHE_CONTROL="no-cache")
+            if response.status_code != 200:
+                self.stderr.write(f"{name}: {path} answered {response.status_code}")
+                continue
+            statements = dict.fromkeys(
+                query["sql"] for query in ctx.captured_queries if query["sql"].lstrip().upper().startswith("SELECT")
+            )
+            for number, sql in enumerate(statements, 1):
+                with connection.cursor() as cursor:
+                    cursor.execute(f"{prefix} {sql}")
+                    rows = cursor.fetchall()
+                scans, indexes, sorts = parse(rows)
+                scanned = [table for table in scans if table in WATCHED_TABLES]
+                watched_scans.extend(f"{name}#{number}: {table}" for table in scanned)
+                verdict = self.style.ERROR("SCAN ") if scanned else self.style.SUCCESS("index")
+                details = []
+                if indexes:
+                    details.append("indexes " + ", ".join(dict.fromkeys(indexes)))
+                if scans:
+                    details.append("scans " + ", ".join(dict.fromkeys(scans)))
+                if sorts:
+                    details.append("sorts")
+                self.stdout.write(f"{name + '#' + str(number):28} {verdict} {'; '.join(details)}")
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"    {sql}")
+                    for row in rows:
+                        self.stdout.write(f"    {row[-1] if connection.vendor == 'sqlite' else row[0]}")
+        if watched_scans and options["fail_on_scan"]:
+            raise CommandError("Full table scans: " + ", ".join(watched_scans))
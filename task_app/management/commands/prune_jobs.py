@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from task_app.jobs import get_config, prune_jobs
+
+
+class Command(BaseCommand):
+    help = "Delete finished background jobs and their export files older than the retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Keep this many days (default: TASK_JOBS RETENTION_DAYS).")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else get_config()["RETENTION_DAYS"]
+        total = prune_jobs(days)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} jobs older than {days} days."))
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from task_app.events import get_config
+from task_app.models import TaskEvent
+
+
+class Command(BaseCommand):
+    help = "Delete change-feed events older than the retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Keep this many days (default: TASK_EVENTS RETENTION_DAYS).")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else get_config()["RETENTION_DAYS"]
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = TaskEvent.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} events older than {days} days."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from task_app.uploads import prune_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete expired resumable upload sessions and their chunk files."
+
+    def handle(self, *args, **options):
+        total = prune_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired upload sessions."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from task_app.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the full-text search index for tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if get_backend() is None:
+            self.stdout.write(self.style.WARNING("No full-text backend for this database; search uses icontains."))
+            return
+        total = rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} tasks."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from task_app.jobs import enqueue
+from task_app.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized dashboard counters from the task table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users", help="Only rebuild these user ids.")
+        parser.add_argument("--background", action="store_true", help="Queue the rebuild for the job worker.")
+
+    def handle(self, *args, **options):
+        if options["background"]:
+            users = options["users"]
+            job = enqueue("rebuild_stats", {"user_ids": users}, key="" if users else "rebuild_stats:all")
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+        total = rebuild_stats(user_ids=options["users"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} counters."))
@@ -0,0 +1,22 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from task_app.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (attachment processing, exports, stats rebuilds) on a thread pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, help="Worker threads (default: TASK_JOBS WORKERS).")
+        parser.add_argument("--burst", action="store_true", help="Exit once no job is ready instead of polling.")
+
+    def handle(self, *args, **options):
+        worker = Worker(concurrency=options["concurrency"])
+        # finish the running jobs, claim nothing new
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(f"Worker {worker.id} running {worker.concurrency} threads.")
+        total = worker.run(burst=options["burst"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} jobs."))
@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from task_management.replicas import replica_aliases
+
+
+# local stand-in for replication: copy the primary SQLite file over each replica
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database to the replica files (local replica testing)."
+
+    def handle(self, *args, **options):
+        databases = settings.DATABASES
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError("No replicas configured (set DB_REPLICA_NAMES).")
+        if any(not databases[a]["ENGINE"].endswith("sqlite3") for a in [DEFAULT_DB_ALIAS, *aliases]):
+            raise CommandError("Only SQLite primaries and replicas can be synced this way.")
+
+        source = sqlite3.connect(databases[DEFAULT_DB_ALIAS]["NAME"])
+        try:
+            for alias in aliases:
+                target = sqlite3.connect(databases[alias]["NAME"])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias}: {databases[alias]['NAME']}")
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f"Synced {len(aliases)} replica(s)."))
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from task_app.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    backend.create_index()
+
+    Task = apps.get_model("task_app", "Task")
+    Through = Task.tags.through
+    task_ids = list(Task.objects.values_list("id", flat=True))
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(0, len(task_ids), 500):
+            batch = task_ids[start:start + 500]
+            tags = {}
+            for task_id, name in Through.objects.filter(task_id__in=batch).values_list("task_id", "tag__name"):
+                tags.setdefault(task_id, []).append(name)
+            rows = [
+                (pk, title or "", description or "", " ".join(tags.get(pk, [])))
+                for pk, title, description in Task.objects.filter(id__in=batch).values_list("id", "title", "description")
+            ]
+            backend.insert(cursor, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    from task_app.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend is not None:
+        backend.drop_index()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task_app", "0002_task_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
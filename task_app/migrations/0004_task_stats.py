@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_task_stats(apps, schema_editor):
+    from task_app.stats import rebuild_stats
+
+    rebuild_stats(apps.get_model('task_app', 'Task'), apps.get_model('task_app', 'TaskStat'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0003_task_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('status', 'Tasks by status'), ('priority', 'Tasks by priority'), ('done_by', 'Done tasks by assignee'), ('day', 'Tasks created per day')], max_length=20)),
+                ('key', models.CharField(max_length=64)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'kind', 'key'), name='task_stat_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_task_stats, migrations.RunPython.noop),
+    ]
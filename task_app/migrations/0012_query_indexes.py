@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0011_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_app_ta_status_9862fe_idx',
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='is_deleted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['task', '-created_at'], name='comment_live_task_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileattachment',
+            index=models.Index(fields=['task', '-uploaded_at'], name='file_task_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_by', 'status', 'created_at', 'id'], name='task_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['created_by', 'created_at', 'id'], name='task_owner_deleted_idx'),
+        ),
+    ]
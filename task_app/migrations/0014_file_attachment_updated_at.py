@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0013_upload_session_assembling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileattachment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
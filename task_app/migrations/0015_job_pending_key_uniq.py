@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# a job could be queued while another with its key ran; keep the running (or
+# oldest) one keyed and let the others run unkeyed
+def release_duplicate_keys(apps, schema_editor):
+    Job = apps.get_model('task_app', 'Job')
+    pending = Job.objects.filter(status__in=['queued', 'running']).exclude(key='')
+    duplicated = pending.values('key').annotate(jobs=Count('id')).filter(jobs__gt=1).values_list('key', flat=True)
+    for key in list(duplicated):
+        jobs = list(pending.filter(key=key).order_by('-status', 'created_at').values_list('id', flat=True))
+        Job.objects.filter(id__in=jobs[1:]).update(key='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0014_file_attachment_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(release_duplicate_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running']), models.Q(('key', ''), _negated=True)), fields=('key',), name='job_pending_key_uniq'),
+        ),
+    ]
@@ -1,18 +1,24 @@
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
+from .tracking import TrackedModel
+
 
 User = settings.AUTH_USER_MODEL
 
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
     def __str__(self):
         return self.name
-class Task(models.Model):
+class Task(TrackedModel):
     STATUS_CHOICES = [
         ('todo', 'To Do'),
         ('in_progress', 'In Progress'),
@@ -33,13 +39,23 @@ class Task(models.Model):
     due_date = models.DateTimeField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    is_deleted = models.BooleanField(default=False, db_index=True)
+    is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
 
     class Meta:
+        # every task query is scoped to its owner, so each index leads with created_by
         indexes = [
-        models.Index(fields=['status','priority']),
+        # ?status= (board columns, bulk edits by filter) in the default order
+        models.Index(fields=['created_by','status','created_at','id'], name='task_owner_status_idx'),
+        # keyset pagination: owner + every ordering field + id tie-breaker
+        models.Index(fields=['created_by','created_at','id'], name='task_owner_created_idx'),
+        models.Index(fields=['created_by','due_date','id'], name='task_owner_due_idx'),
+        models.Index(fields=['created_by','priority','id'], name='task_owner_priority_idx'),
+        # delta sync: owner's tasks changed after a (updated_at, id) token
+        models.Index(fields=['created_by','updated_at','id'], name='task_owner_updated_idx'),
+        # ?include_deleted=true: the few soft-deleted rows, without indexing the live ones again
+        models.Index(fields=['created_by','created_at','id'], name='task_owner_deleted_idx', condition=models.Q(is_deleted=True)),
         ]
 
 
@@ -53,7 +69,7 @@ class Task(models.Model):
         return self.title
 
 
-class Comment(models.Model):
+class Comment(TrackedModel):
     task = models.ForeignKey(Task, related_name='comments', on_delete=models.CASCADE)
     author = models.ForeignKey(User, related_name='comments', on_delete=models.CASCADE)
     content = models.TextField()
@@ -62,19 +78,52 @@ class Comment(models.Model):
     is_deleted = models.BooleanField(default=False)
 
 
+    class Meta:
+        indexes = [
+            # comment lists: WHERE task_id = ? AND NOT is_deleted ORDER BY created_at DESC
+            models.Index(fields=['task', '-created_at'], name='comment_live_task_idx', condition=models.Q(is_deleted=False)),
+        ]
+
+
     def soft_delete(self):
         self.is_deleted = True
         self.save()
 
 
+# content-addressed file body shared by every attachment with the same bytes
+# (task_app/blobs.py); deleted with its file when the last reference goes
+class FileBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    # storage path of the stored bytes
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    # filled in by the process_blob job (task_app/job_handlers.py)
+    content_type = models.CharField(max_length=100, blank=True)
+    thumbnail = models.CharField(max_length=255, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class FileAttachment(models.Model):
     task = models.ForeignKey(Task, related_name='files', on_delete=models.CASCADE)
     uploaded_by = models.ForeignKey(User, related_name='uploads', on_delete=models.CASCADE)
     file = models.FileField(upload_to='task_files/%Y/%m/%d/')
+    # set for deduplicated uploads; `file` then points at the blob's path
+    blob = models.ForeignKey(FileBlob, related_name='attachments', null=True, blank=True, on_delete=models.PROTECT)
     filename = models.CharField(max_length=255)
     content_type = models.CharField(max_length=100, blank=True)
     size = models.PositiveIntegerField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # file list ETags; writes that skip save() (background jobs) set it themselves
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+    class Meta:
+        indexes = [
+            # file lists: WHERE task_id = ? ORDER BY uploaded_at DESC
+            models.Index(fields=['task', '-uploaded_at'], name='file_task_uploaded_idx'),
+        ]
 
 
     def save(self, *args, **kwargs):
@@ -85,4 +134,143 @@ class FileAttachment(models.Model):
                 self.size = self.file.size
             except Exception:
                 pass
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+# materialized per-user dashboard counters, kept up to date by task_app/stats.py
+class TaskStat(models.Model):
+    KIND_CHOICES = [
+        ('status', 'Tasks by status'),
+        ('priority', 'Tasks by priority'),
+        ('done_by', 'Done tasks by assignee'),
+        ('day', 'Tasks created per day'),
+    ]
+
+    user = models.ForeignKey(User, related_name='task_stats', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    key = models.CharField(max_length=64)
+    count = models.IntegerField(default=0)
+
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind', 'key'], name='task_stat_unique'),
+        ]
+
+
+# append-only change feed read by /tasks/events/ (task_app/events.py)
+# one row per change, addressed to the task owner whose task list it affects
+class TaskEvent(models.Model):
+    KIND_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('assigned', 'Assigned'),
+        ('tagged', 'Tagged'),
+        ('deleted', 'Deleted'),
+        ('commented', 'Commented'),
+        ('file_uploaded', 'File uploaded'),
+    ]
+
+    user = models.ForeignKey(User, related_name='task_events', on_delete=models.CASCADE)
+    # no constraint: the log outlives hard-deleted tasks
+    task = models.ForeignKey(Task, related_name='events', on_delete=models.DO_NOTHING, db_constraint=False)
+    actor = models.ForeignKey(User, related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+    class Meta:
+        indexes = [
+            # feed reads: WHERE user_id = ? AND id > ? ORDER BY id
+            models.Index(fields=['user', 'id'], name='task_event_feed_idx'),
+        ]
+
+
+# resumable upload in progress (task_app/uploads.py); chunks are stored as
+# separate files until the upload is completed into a FileAttachment
+class UploadSession(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('assembling', 'Assembling'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, related_name='upload_sessions', on_delete=models.CASCADE)
+    uploaded_by = models.ForeignKey(User, related_name='upload_sessions', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    # optional client-announced hash: a known blob completes without any chunks
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attachment = models.ForeignKey(FileAttachment, related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, related_name='chunks', on_delete=models.CASCADE)
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    # storage path of the chunk file
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='upload_chunk_unique'),
+        ]
+
+
+# background job queue (task_app/jobs.py), drained by `manage.py run_jobs`
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    # not finished yet: a keyed enqueue joins these instead of adding a job
+    PENDING_STATUSES = ('queued', 'running')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    # higher runs first
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    # at most one queued or running job per key (job_pending_key_uniq)
+    key = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, related_name='jobs', null=True, blank=True, on_delete=models.CASCADE)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # not before this time (initial delay / retry backoff)
+    run_at = models.DateTimeField(default=timezone.now)
+    # a running job whose lock expired is handed to another worker
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+
+    class Meta:
+        indexes = [
+            # claim: WHERE status = ? AND run_at <= ? ORDER BY priority DESC, run_at
+            models.Index(fields=['status', '-priority', 'run_at'], name='job_claim_idx'),
+            models.Index(fields=['key', 'status'], name='job_key_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status__in=['queued', 'running']) & ~models.Q(key=''),
+                name='job_pending_key_uniq',
+            ),
+        ]
@@ -0,0 +1,180 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# keyset (cursor) pagination
+# pages are located with "WHERE (sort_key, id) > (last_value, last_id)" instead of
+# OFFSET, and no COUNT(*) is issued, so every page costs the same index range scan
+class KeysetPagination(BasePagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    default_ordering = ("-created_at",)
+    tie_breaker = "id"
+    invalid_cursor_message = "Invalid cursor"
+    # ConditionalGetMixin tags the page instead of aggregating the whole set
+    counts_rows = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["r"])
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if cursor:
+            queryset = queryset.filter(self.get_after_filter(cursor["v"], cursor["id"], reverse))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    # reuse the view's OrderingFilter so only `ordering_fields` are accepted
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        if view is not None:
+            ordering = OrderingFilter().get_ordering(request, queryset, view)
+        ordering = [o for o in (ordering or self.default_ordering) if o.lstrip("-") != self.tie_breaker]
+        # the tie-breaker follows the direction of the last sort key
+        last_desc = ordering[-1].startswith("-") if ordering else False
+        return tuple(ordering) + (("-" if last_desc else "") + self.tie_breaker,)
+
+    def get_order_by(self, reverse=False):
+        order_by = []
+        for term in self.ordering:
+            name = term.lstrip("-")
+            descending = term.startswith("-") != reverse
+            # NULLs always sort after the real values so the cursor stays comparable
+            nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+            expression = F(name).desc(**nulls) if descending else F(name).asc(**nulls)
+            order_by.append(expression)
+        return order_by
+
+    # lexicographic "row comes after (values, id)" for the current ordering
+    def get_after_filter(self, values, last_id, reverse=False):
+        position = list(values) + [last_id]
+        condition = Q(pk__in=[])
+        equal = Q()
+        for term, value in zip(self.ordering, position):
+            name = term.lstrip("-")
+            descending = term.startswith("-") != reverse
+            nullable = self.model._meta.get_field(name).null
+            lookup = "lt" if descending else "gt"
+
+            if value is None:
+                after = Q(**{f"{name}__isnull": False}) if reverse else Q(pk__in=[])
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                after = Q(**{f"{name}__{lookup}": value})
+                if nullable and not reverse:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+
+            condition |= equal & after
+            equal &= same
+        return condition
+
+    # pages may hold model instances or .values() dicts
+    def get_position(self, instance):
+        get = instance.get if isinstance(instance, dict) else lambda name: getattr(instance, name)
+        values = []
+        for term in self.ordering[:-1]:
+            value = get(term.lstrip("-"))
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            values.append(value)
+        return values, get(self.tie_breaker)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        values, last_id = self.get_position(self.page[-1])
+        return self.encode_cursor(values, last_id, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        values, first_id = self.get_position(self.page[0])
+        return self.encode_cursor(values, first_id, reverse=True)
+
+    def encode_cursor(self, values, last_id, reverse):
+        payload = {"o": list(self.ordering), "v": values, "id": last_id, "r": int(reverse)}
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            ordering, values, last_id = payload["o"], payload["v"], int(payload["id"])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(ordering, list) or not isinstance(values, list):
+            raise NotFound(self.invalid_cursor_message)
+        # a cursor is only meaningful for the ordering it was issued with
+        if tuple(ordering) != self.ordering or len(values) != len(self.ordering) - 1:
+            raise NotFound(self.invalid_cursor_message)
+
+        parsed = []
+        for term, value in zip(self.ordering, values):
+            field = self.model._meta.get_field(term.lstrip("-"))
+            try:
+                parsed.append(None if value is None else field.to_python(value))
+            except Exception:
+                raise NotFound(self.invalid_cursor_message)
+        return {"v": parsed, "id": last_id, "r": bool(payload.get("r"))}
@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+
+
+# read-through cache for task list / detail responses
+# entries are keyed on (user, action, pk, normalized query params) plus two
+# version stamps: one per user, bumped on writes to that user's tasks, and a
+# global one bumped when tags or users change. Bumping a version orphans every
+# older entry at once; they age out through LRU / TTL eviction.
+
+DEFAULTS = {
+    "ENABLED": False,
+    # "django" (a CACHES alias shared by the workers, e.g. Redis/Memcached),
+    # "local" (in-process, a single worker only) or a dotted class path
+    "BACKEND": "django",
+    "CACHE_ALIAS": "default",
+    "MAX_ENTRIES": 2000,
+    "TTL": 30,
+}
+KEY_PREFIX = "taskresp"
+GLOBAL_SCOPE = "all"
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "TASK_RESPONSE_CACHE", {})}
+
+
+# in-process LRU with per-entry TTL
+class LocalMemoryBackend:
+
+    def __init__(self, max_entries=2000, ttl=30, **options):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        # versions are tiny and must never be evicted before the entries they guard
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_version(self, scope):
+        with self.lock:
+            return self.versions.setdefault(scope, time.time_ns())
+
+    def bump_version(self, scope):
+        with self.lock:
+            self.versions[scope] = time.time_ns()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.versions.clear()
+
+
+# shared backend on top of a Django cache alias; eviction is the cache server's
+class DjangoCacheBackend:
+
+    def __init__(self, cache_alias="default", ttl=30, **options):
+        self.cache = caches[cache_alias]
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.ttl)
+
+    # a missing version starts at "now", so an evicted version never
+    # resurrects entries written under an older one
+    def get_version(self, scope):
+        key = f"{KEY_PREFIX}:v:{scope}"
+        version = self.cache.get(key)
+        if version is None:
+            version = time.time_ns()
+            self.cache.add(key, version, None)
+            version = self.cache.get(key, version)
+        return version
+
+    def bump_version(self, scope):
+        self.cache.set(f"{KEY_PREFIX}:v:{scope}", time.time_ns(), None)
+
+    def clear(self):
+        pass
+
+
+BACKENDS = {"local": LocalMemoryBackend, "django": DjangoCacheBackend}
+_backend = None
+_backend_config = None
+_backend_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _backend, _backend_config
+    config = get_config()
+    if not config["ENABLED"]:
+        return None
+    with _backend_lock:
+        if _backend is None or _backend_config != config:
+            name = config["BACKEND"]
+            backend_class = BACKENDS.get(name) or import_string(name)
+            _backend = backend_class(
+                max_entries=config["MAX_ENTRIES"], ttl=config["TTL"], cache_alias=config["CACHE_ALIAS"]
+            )
+            _backend_config = config
+        return _backend
+
+
+# bump now and again on commit: a reader between the two could otherwise cache
+# pre-commit rows under the new version
+def invalidate_user(user_id):
+    backend = get_response_cache()
+    if backend is not None and user_id is not None:
+        backend.bump_version(user_id)
+        transaction.on_commit(lambda: backend.bump_version(user_id))
+
+
+def invalidate_users(user_ids):
+    for user_id in set(user_ids):
+        invalidate_user(user_id)
+
+
+def invalidate_all():
+    backend = get_response_cache()
+    if backend is not None:
+        backend.bump_version(GLOBAL_SCOPE)
+        transaction.on_commit(lambda: backend.bump_version(GLOBAL_SCOPE))
+
+
+def build_key(backend, request, action, pk=None):
+    user_id = request.user.pk
+    params = sorted((k, v) for k in request.query_params for v in request.query_params.getlist(k))
+    raw = repr((request.get_host(), request.path, params, request.accepted_media_type))
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    versions = f"{backend.get_version(GLOBAL_SCOPE)}.{backend.get_version(user_id)}"
+    return f"{KEY_PREFIX}:{user_id}:{versions}:{action}:{pk}:{digest}:h"
+
+
+# serves list / retrieve from the response cache; a hit skips the ORM and the
+# serializer. "Cache-Control: no-cache" forces a fresh response. Entries keep
+# the ETag / Last-Modified of the response (task_app/conditional.py, which runs
+# after this mixin), so a revalidating hit is answered with 304 from the
+# cache as well.
+class CachedResponseMixin:
+    cache_status_header = "X-Cache"
+    cached_headers = ("ETag", "Last-Modified")
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, "list", super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, "retrieve", super().retrieve, *args, **kwargs)
+
+    def cached_response(self, request, action, view, *args, **kwargs):
+        backend = get_response_cache()
+        if backend is None or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        # versions are read before computing, so a concurrent write is never hidden
+        key = build_key(backend, request, action, kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+        if "no-cache" not in request.META.get("HTTP_CACHE_CONTROL", ""):
+            entry = backend.get(key)
+            if entry is not None:
+                data, headers = entry
+                response = get_conditional_response(
+                    request, etag=headers.get("ETag"), last_modified=parse_http_date_safe(headers.get("Last-Modified", ""))
+                ) or Response(data, headers=headers)
+                response[self.cache_status_header] = "HIT"
+                return response
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {name: response[name] for name in self.cached_headers if response.has_header(name)}
+            backend.set(key, (response.data, headers))
+        response[self.cache_status_header] = "MISS"
+        return response
@@ -0,0 +1,232 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection as default_connection
+from django.db.models.expressions import RawSQL
+
+
+# full-text search index for tasks
+# every task gets one document (title, description, tag names) in a backend
+# specific inverted index: an FTS5 virtual table on SQLite and a tsvector
+# column with a GIN index on PostgreSQL. Other databases fall back to icontains.
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 8
+
+# task ids collected by deferred_indexing() instead of being indexed right away
+_deferred = ContextVar("search_deferred", default=None)
+
+
+def tokenize(query):
+    return TOKEN_RE.findall((query or "").lower())[:MAX_TERMS]
+
+
+class SearchBackend:
+    vendor = None
+    table = None
+    # weights for title, description and tags
+    weights = (10.0, 1.0, 5.0)
+    rank_descending = False
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_index(self):
+        raise NotImplementedError
+
+    def drop_index(self):
+        raise NotImplementedError
+
+    def delete(self, cursor, task_ids):
+        raise NotImplementedError
+
+    def insert(self, cursor, rows):
+        raise NotImplementedError
+
+    def build_query(self, terms):
+        raise NotImplementedError
+
+    # SQL returning the ids of matching tasks, used as "id IN (...)"
+    def match_sql(self):
+        raise NotImplementedError
+
+    # correlated SQL returning the rank of the outer task row
+    def rank_sql(self, task_table):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    vendor = "sqlite"
+    table = "task_app_task_fts"
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                "USING fts5(title, description, tags, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def delete(self, cursor, task_ids):
+        cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in task_ids])
+
+    def insert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {self.table} (rowid, title, description, tags) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+    # every term must match, the last one as a prefix ("spec pd" finds "spec pdf")
+    def build_query(self, terms):
+        quoted = ['"%s"' % term.replace('"', '""') for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def match_sql(self):
+        return f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s"
+
+    def rank_sql(self, task_table):
+        weights = ", ".join(str(w) for w in self.weights)
+        return (
+            f"SELECT bm25({self.table}, {weights}) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid = {task_table}.id"
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    vendor = "postgresql"
+    table = "task_app_task_search"
+    config = "simple"
+    rank_descending = True
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "task_id bigint PRIMARY KEY REFERENCES task_app_task (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_document_gin ON {self.table} USING GIN (document)"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def delete(self, cursor, task_ids):
+        cursor.execute(f"DELETE FROM {self.table} WHERE task_id = ANY(%s)", [list(task_ids)])
+
+    def insert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {self.table} (task_id, document) VALUES (%s, "
+            f"setweight(to_tsvector('{self.config}', %s), 'A') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'D') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'B')) "
+            "ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document",
+            rows,
+        )
+
+    def build_query(self, terms):
+        escaped = [term.replace("'", "''") for term in terms]
+        return " & ".join(f"'{term}':*" for term in escaped)
+
+    def match_sql(self):
+        return f"SELECT task_id FROM {self.table} WHERE document @@ to_tsquery('{self.config}', %s)"
+
+    def rank_sql(self, task_table):
+        return (
+            f"SELECT ts_rank_cd(document, to_tsquery('{self.config}', %s)) FROM {self.table} "
+            f"WHERE task_id = {task_table}.id"
+        )
+
+
+BACKENDS = {backend.vendor: backend for backend in (SQLiteFTSBackend, PostgresSearchBackend)}
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    backend_class = BACKENDS.get(connection.vendor)
+    return backend_class(connection) if backend_class else None
+
+
+def _documents(task_ids):
+    from .models import Task
+
+    tags = {}
+    through = Task.tags.through.objects.filter(task_id__in=task_ids)
+    for task_id, name in through.values_list("task_id", "tag__name"):
+        tags.setdefault(task_id, []).append(name)
+    for task_id, title, description in Task.objects.filter(id__in=task_ids).values_list("id", "title", "description"):
+        yield task_id, title or "", description or "", " ".join(tags.get(task_id, []))
+
+
+# (re)index the given tasks; bulk paths that skip signals call this directly
+def index_tasks(task_ids, batch_size=500):
+    backend = get_backend()
+    if backend is None:
+        return
+    pending = _deferred.get()
+    if pending is not None:
+        pending.update(task_ids)
+        return
+    task_ids = list(task_ids)
+    with backend.connection.cursor() as cursor:
+        for start in range(0, len(task_ids), batch_size):
+            batch = task_ids[start:start + batch_size]
+            backend.delete(cursor, batch)
+            backend.insert(cursor, list(_documents(batch)))
+
+
+# index each task once for a block that saves it and then sets its tags;
+# nothing is indexed if the block raises
+@contextmanager
+def deferred_indexing():
+    pending = set()
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+    index_tasks(sorted(pending))
+
+
+def remove_tasks(task_ids):
+    backend = get_backend()
+    if backend is None:
+        return
+    with backend.connection.cursor() as cursor:
+        backend.delete(cursor, list(task_ids))
+
+
+def rebuild_index(batch_size=500):
+    from .models import Task
+
+    backend = get_backend()
+    if backend is None:
+        return 0
+    backend.drop_index()
+    backend.create_index()
+    task_ids = list(Task.objects.order_by("id").values_list("id", flat=True))
+    index_tasks(task_ids, batch_size=batch_size)
+    return len(task_ids)
+
+
+# narrow a Task queryset to the search hits and annotate `search_rank`
+# returns None when the database has no full-text backend
+def search_tasks(queryset, query):
+    backend = get_backend()
+    if backend is None:
+        return None
+    terms = tokenize(query)
+    if not terms:
+        return queryset
+    match = backend.build_query(terms)
+    table = queryset.model._meta.db_table
+    queryset = queryset.filter(id__in=RawSQL(backend.match_sql(), [match]))
+    queryset = queryset.annotate(search_rank=RawSQL(backend.rank_sql(table), [match]))
+    return queryset.order_by("-search_rank" if backend.rank_descending else "search_rank", "-id")
@@ -1,6 +1,16 @@
 from rest_framework import serializers
-from .models import Task, Comment, FileAttachment, Tag
+from .events import build_event, record_events, task_changes
+from .fieldsets import ExpandableFieldsMixin
+from .models import Task, Comment, FileAttachment, Tag, TaskEvent, UploadSession, Job
+from .response_cache import invalidate_user
+from .search import index_tasks
+from .stats import record_changes, snapshot
+from .tags import get_batch_size, resolve_tags, tag_name
+from .uploads import chunk_count, received_chunks
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
 
 
 User = get_user_model()
@@ -12,9 +22,16 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id','name']
 
 #file attachment serializer  
-class FileAttachmentSerializer(serializers.ModelSerializer):
-    uploaded_by = serializers.ReadOnlyField(source='uploaded_by.id')
+class FileAttachmentSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    uploaded_by = serializers.ReadOnlyField(source='uploaded_by_id')
+    # upload only: its storage URL would skip the access check, clients read file_url
+    file = serializers.FileField(write_only=True)
     file_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    # ?expand= / ?fields= (task_app/fieldsets.py)
+    expandable_fields = {
+        'uploaded_by': (lambda: AssignUserSerializer(read_only=True), lambda: serializers.ReadOnlyField(source='uploaded_by_id')),
+    }
 
     class Meta:
         model = FileAttachment
@@ -23,6 +40,7 @@ class FileAttachmentSerializer(serializers.ModelSerializer):
             'filename',
             'file',
             'file_url',
+            'thumbnail_url',
             'content_type',
             'size',
             'uploaded_at',
@@ -32,17 +50,25 @@ class FileAttachmentSerializer(serializers.ModelSerializer):
             'id',
             'filename',         # <--- ADD THIS
             'file_url',
+            'thumbnail_url',
             'uploaded_at',
             'uploaded_by',
             'content_type',     # <--- OPTIONAL (recommended)
             'size',             # <--- OPTIONAL (recommended)
         ]
 
+    # the protected download endpoint; media URLs are only served in DEBUG
     def get_file_url(self, obj):
         request = self.context.get('request')
         if obj.file and request:
-            print("obje",request.build_absolute_uri(obj.file.url))
-            return request.build_absolute_uri(obj.file.url)
+            return request.build_absolute_uri(reverse('task-files-download', args=[obj.pk]))
+        return None
+
+    # rendered in the background for images (task_app/job_handlers.py)
+    def get_thumbnail_url(self, obj):
+        request = self.context.get('request')
+        if obj.blob_id and obj.blob.thumbnail and request:
+            return request.build_absolute_uri(reverse('task-files-download', args=[obj.pk]) + '?variant=thumbnail')
         return None
 
     
@@ -54,15 +80,24 @@ class AssignUserSerializer(serializers.ModelSerializer):
         fields = ['id','username','email']
         
 # task serializer
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.username')
     assigned_to = AssignUserSerializer(read_only=True) 
     tags = TagSerializer(many=True, required=False)
+    # ?expand= / ?fields= (task_app/fieldsets.py); unexpanded relations collapse to ids
+    expandable_fields = {
+        'assigned_to': (lambda: AssignUserSerializer(read_only=True), lambda: serializers.PrimaryKeyRelatedField(read_only=True)),
+        'tags': (lambda: TagSerializer(many=True, read_only=True), lambda: serializers.PrimaryKeyRelatedField(many=True, read_only=True)),
+        'created_by': (lambda: AssignUserSerializer(read_only=True), lambda: serializers.ReadOnlyField(source='created_by.username')),
+    }
+    default_expand = ('assigned_to', 'tags')
 
 
     class Meta:
         model = Task
-        fields = ['id','title','description','status','priority','due_date','tags','assigned_to','created_by','created_at','updated_at']
+        fields = ['id','title','description','status','priority','due_date','tags','assigned_to','created_by','created_at','updated_at','version']
+        # the version is only ever bumped by saves (task_app/tracking.py)
+        read_only_fields = ['id','created_at','updated_at','version']
 
 
     
@@ -76,27 +111,165 @@ class TaskSerializer(serializers.ModelSerializer):
 
 
 # comment serializer
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
+    expandable_fields = {
+        'author': (lambda: AssignUserSerializer(read_only=True), lambda: serializers.ReadOnlyField(source='author.username')),
+    }
     class Meta:
         model = Comment
-        fields = ['id','author','content','created_at','updated_at']
-        read_only_fields = ['id','author','created_at','updated_at',"task"]
+        fields = ['id','author','content','created_at','updated_at','version']
+        read_only_fields = ['id','author','created_at','updated_at','version',"task"]
 
 
 
     
     
+# tag given as "name" or {"name": ...} (write only)
+class TagNameField(serializers.Field):
+    default_error_messages = {
+        "invalid": "Tag must be a name or an object with a name.",
+        "max_length": "Tag name must be at most 50 characters.",
+    }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, (str, dict)):
+            self.fail("invalid")
+        name = tag_name(data)
+        if not name:
+            self.fail("invalid")
+        if len(name) > Tag._meta.get_field("name").max_length:
+            self.fail("max_length")
+        return name
+
+
+# single item of a bulk create payload
+class BulkTaskItemSerializer(TaskSerializer):
+    tags = serializers.ListField(child=TagNameField(), required=False)
+
+
 # bulk task create serializer
+# N tasks cost a fixed number of statements per batch: one INSERT for the
+# tasks, the tag lookup/insert, one INSERT into the through table and the
+# updated_at restamp
 class BulkTaskCreateSerializer(serializers.ListSerializer):
-    child = TaskSerializer()
+    child = BulkTaskItemSerializer()
 
 
     def create(self, validated_data):
         user = self.context['request'].user
-        instances = []
-        print("Vaidated data:", validated_data)
-        for item in validated_data:
-            tags = item.pop('tags', [])
-            t = Task.objects.create(created_by=user, **item)
-        return instances
\ No newline at end of file
+        batch_size = self.context.get('batch_size') or get_batch_size()
+        tag_lists = [item.pop('tags', []) for item in validated_data]
+
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(
+                [Task(created_by=user, **item) for item in validated_data],
+                batch_size=batch_size,
+            )
+            tags = resolve_tags([name for names in tag_lists for name in names], batch_size=batch_size)
+            Through = Task.tags.through
+            Through.objects.bulk_create(
+                [
+                    Through(task_id=task.id, tag_id=tags[name].id)
+                    for task, names in zip(tasks, tag_lists)
+                    for name in dict.fromkeys(names)
+                ],
+                batch_size=batch_size,
+            )
+            task_ids = [task.id for task in tasks]
+            # bulk_create sends no signals, so index and count explicitly
+            index_tasks(task_ids, batch_size=batch_size)
+            record_changes([], [snapshot(task) for task in tasks])
+            invalidate_user(user.id)
+            # a large import can run past the delta sync / change feed settle
+            # window, so stamp the rows and write the events last, right before commit
+            stamped = timezone.now()
+            for start in range(0, len(task_ids), batch_size):
+                Task.objects.filter(id__in=task_ids[start:start + batch_size]).update(updated_at=stamped)
+            record_events([
+                build_event(task, "created", user.id, {"changes": {**task_changes(None, task), "tags": list(dict.fromkeys(names))}})
+                for task, names in zip(tasks, tag_lists)
+            ], batch_size=batch_size)
+
+        # re-read with the relations the response serializer needs
+        instances = {}
+        for start in range(0, len(task_ids), batch_size):
+            qs = Task.objects.filter(id__in=task_ids[start:start + batch_size])
+            instances.update(qs.select_related("assigned_to", "created_by").prefetch_related("tags").in_bulk())
+        return [instances[pk] for pk in task_ids]
+
+
+# tasks picked by id or by a filter on the list's filterset fields
+class BulkTaskSelectionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    filter = serializers.DictField(required=False, allow_empty=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Give either ids or filter.")
+        return attrs
+
+
+# fields a bulk update may set, each a single column
+class BulkTaskChangesSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    due_date = serializers.DateTimeField(required=False, allow_null=True)
+    assigned_to = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False, allow_null=True)
+
+    # validated as column values for QuerySet.update()
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Give at least one of: status, priority, due_date, assigned_to.")
+        if 'assigned_to' in attrs:
+            user = attrs.pop('assigned_to')
+            attrs['assigned_to_id'] = user.pk if user else None
+        return attrs
+
+
+class BulkTaskUpdateSerializer(BulkTaskSelectionSerializer):
+    changes = BulkTaskChangesSerializer()
+
+
+class TaskEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TaskEvent
+        fields = ['id', 'task', 'kind', 'actor', 'data', 'created_at']
+
+
+# resumable upload session; `received` lists the chunk indexes already stored
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_count = serializers.SerializerMethodField()
+    received = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'task', 'filename', 'content_type', 'size', 'chunk_size', 'chunk_count',
+                  'received', 'status', 'attachment', 'expires_at']
+
+    def get_chunk_count(self, obj):
+        return chunk_count(obj)
+
+    def get_received(self, obj):
+        return received_chunks(obj)
+
+
+# background job status; only the last line of a failure is shown
+class JobSerializer(serializers.ModelSerializer):
+    error = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'status', 'attempts', 'max_attempts', 'result', 'error', 'download_url',
+                  'created_at', 'started_at', 'finished_at']
+
+    def get_error(self, obj):
+        lines = obj.error.strip().splitlines()
+        return lines[-1] if lines else ""
+
+    def get_download_url(self, obj):
+        request = self.context.get('request')
+        if obj.status == 'done' and isinstance(obj.result, dict) and obj.result.get('file') and request:
+            return request.build_absolute_uri(reverse('jobs-download', args=[obj.pk]))
+        return None
@@ -0,0 +1,194 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .blobs import release_blob
+from .events import EVENT_FIELDS, build_event, record_events, task_saved_event
+from .models import Comment, FileAttachment, Tag, Task
+from .response_cache import invalidate_all, invalidate_user
+from .search import index_tasks, remove_tasks
+from .stats import STAT_FIELDS, record_changes, snapshot
+
+
+# keep the full-text index in sync with task and tag writes
+
+# task columns in the search document (tags are indexed by set_task_tags / m2m_changed)
+INDEXED_FIELDS = {"title", "description"}
+
+
+@receiver(post_save, sender=Task)
+def index_saved_task(sender, instance, raw=False, update_fields=None, **kwargs):
+    # tracked saves name their changed columns, so status or assignee edits skip the index
+    if raw or (update_fields is not None and not INDEXED_FIELDS & set(update_fields)):
+        return
+    index_tasks([instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def unindex_deleted_task(sender, instance, **kwargs):
+    remove_tasks([instance.pk])
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def index_task_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # tag.task_set.clear(): remember the tasks before the rows are gone
+        instance._search_task_ids = list(instance.task_set.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        index_tasks([instance.pk])
+    elif action == "post_clear":
+        index_tasks(getattr(instance, "_search_task_ids", []))
+    else:
+        index_tasks(pk_set or [])
+
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        index_tasks(instance.task_set.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def collect_tag_tasks(sender, instance, **kwargs):
+    instance._search_task_ids = list(instance.task_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def index_deleted_tag(sender, instance, **kwargs):
+    index_tasks(getattr(instance, "_search_task_ids", []))
+
+
+# keep the materialized dashboard counters in sync with task writes
+
+# the stored row before the save serves both the counters and the change feed
+@receiver(pre_save, sender=Task)
+def remember_task_state(sender, instance, raw=False, **kwargs):
+    instance._saved_before = None
+    if raw or not instance.pk:
+        return
+    fields = dict.fromkeys(STAT_FIELDS + EVENT_FIELDS)
+    loaded = getattr(instance, "_loaded_values", {})
+    if all(name in loaded for name in fields):
+        # the version check (task_app/tracking.py) only lets the save through
+        # while the row still holds the values it was loaded with
+        instance._saved_before = {name: loaded[name] for name in fields}
+    else:
+        instance._saved_before = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_changes([getattr(instance, "_saved_before", None)], [snapshot(instance)])
+
+
+@receiver(post_delete, sender=Task)
+def count_deleted_task(sender, instance, **kwargs):
+    record_changes([snapshot(instance)], [])
+
+
+# append to the task change feed (task_app/events.py)
+
+@receiver(post_save, sender=Task)
+def record_task_event(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record_events([task_saved_event(getattr(instance, "_saved_before", None), instance, created)])
+
+
+@receiver(post_save, sender=Comment)
+def record_comment_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_events([build_event(instance.task, "commented", instance.author_id, {"comment": instance.pk})])
+
+
+@receiver(post_save, sender=FileAttachment)
+def record_file_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        data = {"file": instance.pk, "filename": instance.filename}
+        record_events([build_event(instance.task, "file_uploaded", instance.uploaded_by_id, data)])
+
+
+# drop cached task responses (task_app/response_cache.py) after writes
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_responses(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_user(instance.created_by_id)
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def invalidate_tagged_task_responses(sender, instance, action, reverse, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        if reverse:
+            invalidate_all()
+        else:
+            invalidate_user(instance.created_by_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_responses(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_all()
+
+
+# usernames and emails are embedded in task and comment responses; other user
+# writes (logins, password changes, profile edits) leave those responses alone
+EMBEDDED_USER_FIELDS = ("username", "email")
+
+
+@receiver(pre_save, sender=get_user_model())
+def remember_user_identity(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._identity_changed = False
+    if raw or not instance.pk:
+        return
+    if update_fields is not None and not set(EMBEDDED_USER_FIELDS) & set(update_fields):
+        return
+    before = sender.objects.filter(pk=instance.pk).values(*EMBEDDED_USER_FIELDS).first()
+    instance._identity_changed = before is not None and any(
+        before[name] != getattr(instance, name) for name in EMBEDDED_USER_FIELDS
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_responses(sender, instance, raw=False, **kwargs):
+    if not raw and getattr(instance, "_identity_changed", False):
+        invalidate_all()
+
+
+# tag names, usernames and emails are embedded in task and comment responses:
+# move updated_at on the rows that embed them so ETags (task_app/conditional.py)
+# and delta sync see the change. The version stays, the rows did not change.
+
+@receiver(post_save, sender=Tag)
+def touch_renamed_tag_tasks(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        Task.objects.filter(tags=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Tag)
+def touch_deleted_tag_tasks(sender, instance, **kwargs):
+    Task.objects.filter(id__in=getattr(instance, "_search_task_ids", [])).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=get_user_model())
+def touch_renamed_user_rows(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, "_identity_changed", False):
+        return
+    now = timezone.now()
+    Task.objects.filter(Q(created_by=instance) | Q(assigned_to=instance)).update(updated_at=now)
+    Comment.objects.filter(author=instance).update(updated_at=now)
+
+
+# drop a reference to the shared file body, also for cascaded deletes
+
+@receiver(post_delete, sender=FileAttachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    if instance.blob_id is not None:
+        release_blob(instance.blob_id)
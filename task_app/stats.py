@@ -0,0 +1,155 @@
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+# materialized dashboard counters
+# every live (not soft-deleted) task contributes +1 to a handful of
+# (user, kind, key) counters in TaskStat. Writes apply the difference between
+# a task's old and new contributions, so dashboards read a few rows per user
+# instead of grouping the whole task table.
+
+STAT_FIELDS = ("created_by_id", "assigned_to_id", "status", "priority", "created_at", "is_deleted")
+CACHE_KEY = "task_stats:{user_id}"
+CACHE_TIMEOUT = 60 * 60
+# numbers read from a (possibly lagging) replica are only cached briefly
+REPLICA_CACHE_TIMEOUT = 30
+# grouped rows are streamed (server-side cursor on PostgreSQL) when rebuilding
+CHUNK_SIZE = 2000
+
+
+def snapshot(task):
+    return {name: getattr(task, name) for name in STAT_FIELDS}
+
+
+def contributions(row):
+    if not row or row["is_deleted"]:
+        return []
+    creator, assignee = row["created_by_id"], row["assigned_to_id"]
+    items = [
+        (creator, "status", row["status"]),
+        (creator, "priority", row["priority"]),
+    ]
+    if row["status"] == "done":
+        items.append((creator, "done_by", str(assignee or "")))
+    if row["created_at"]:
+        day = timezone.localdate(row["created_at"]).isoformat()
+        for user_id in {creator, assignee} - {None}:
+            items.append((user_id, "day", day))
+    return items
+
+
+# before/after are lists of snapshots (None for "did not exist")
+def record_changes(before, after):
+    deltas = Counter()
+    for row in before:
+        deltas.subtract(contributions(row))
+    for row in after:
+        deltas.update(contributions(row))
+    apply_deltas(deltas)
+
+
+def apply_deltas(deltas):
+    from .models import TaskStat
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        missing = []
+        for (user_id, kind, key), delta in deltas.items():
+            updated = TaskStat.objects.filter(user_id=user_id, kind=kind, key=key).update(count=F("count") + delta)
+            if not updated:
+                missing.append(TaskStat(user_id=user_id, kind=kind, key=key, count=0))
+        if missing:
+            TaskStat.objects.bulk_create(missing, ignore_conflicts=True)
+            for stat in missing:
+                TaskStat.objects.filter(user_id=stat.user_id, kind=stat.kind, key=stat.key).update(
+                    count=F("count") + deltas[(stat.user_id, stat.kind, stat.key)]
+                )
+    invalidate({user_id for user_id, _, _ in deltas})
+
+
+def invalidate(user_ids):
+    keys = [CACHE_KEY.format(user_id=user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # a concurrent read may have cached pre-commit numbers in the meantime
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+# {kind: {key: count}} for one user, served from the cache when possible
+def get_user_stats(user_id):
+    from .models import TaskStat
+
+    cache_key = CACHE_KEY.format(user_id=user_id)
+    stats = cache.get(cache_key)
+    if stats is None:
+        stats = {kind: {} for kind, _ in TaskStat.KIND_CHOICES}
+        rows = TaskStat.objects.filter(user_id=user_id, count__gt=0).values_list("kind", "key", "count")
+        for kind, key, count in rows:
+            stats[kind][key] = count
+        cache.set(cache_key, stats, CACHE_TIMEOUT if rows.db == DEFAULT_DB_ALIAS else REPLICA_CACHE_TIMEOUT)
+    return stats
+
+
+# same, for the native async views
+async def aget_user_stats(user_id):
+    from .models import TaskStat
+
+    cache_key = CACHE_KEY.format(user_id=user_id)
+    stats = await cache.aget(cache_key)
+    if stats is None:
+        stats = {kind: {} for kind, _ in TaskStat.KIND_CHOICES}
+        rows = TaskStat.objects.filter(user_id=user_id, count__gt=0).values_list("kind", "key", "count")
+        async for kind, key, count in rows:
+            stats[kind][key] = count
+        await cache.aset(cache_key, stats, CACHE_TIMEOUT if rows.db == DEFAULT_DB_ALIAS else REPLICA_CACHE_TIMEOUT)
+    return stats
+
+
+# recompute counters from the task table (drift repair / backfill)
+def compute_stats(task_model, user_ids=None):
+    tasks = task_model.objects.filter(is_deleted=False)
+    if user_ids is not None:
+        user_ids = set(user_ids)
+        tasks = tasks.filter(Q(created_by__in=user_ids) | Q(assigned_to__in=user_ids))
+    counts = Counter()
+    for field in ("status", "priority"):
+        for row in tasks.values("created_by_id", field).annotate(total=Count("id")).order_by().iterator(CHUNK_SIZE):
+            counts[(row["created_by_id"], field, row[field])] += row["total"]
+    done = tasks.filter(status="done").values("created_by_id", "assigned_to_id").annotate(total=Count("id")).order_by()
+    for row in done.iterator(CHUNK_SIZE):
+        counts[(row["created_by_id"], "done_by", str(row["assigned_to_id"] or ""))] += row["total"]
+    days = tasks.annotate(day=TruncDate("created_at"))
+    for row in days.values("created_by_id", "day").annotate(total=Count("id")).order_by().iterator(CHUNK_SIZE):
+        counts[(row["created_by_id"], "day", row["day"].isoformat())] += row["total"]
+    assigned = days.filter(assigned_to__isnull=False).exclude(assigned_to=F("created_by"))
+    for row in assigned.values("assigned_to_id", "day").annotate(total=Count("id")).order_by().iterator(CHUNK_SIZE):
+        counts[(row["assigned_to_id"], "day", row["day"].isoformat())] += row["total"]
+    if user_ids is not None:
+        counts = Counter({key: total for key, total in counts.items() if key[0] in user_ids})
+    return counts
+
+
+def rebuild_stats(task_model=None, stat_model=None, user_ids=None):
+    if task_model is None or stat_model is None:
+        from .models import Task, TaskStat
+        task_model, stat_model = task_model or Task, stat_model or TaskStat
+
+    counts = compute_stats(task_model, user_ids)
+    with transaction.atomic():
+        existing = stat_model.objects.all()
+        if user_ids is not None:
+            existing = existing.filter(user_id__in=user_ids)
+        affected = set(existing.values_list("user_id", flat=True)) | {key[0] for key in counts}
+        existing.delete()
+        stat_model.objects.bulk_create(
+            [stat_model(user_id=u, kind=k, key=key, count=c) for (u, k, key), c in counts.items() if c],
+            batch_size=500,
+        )
+    invalidate(affected)
+    return len(counts)
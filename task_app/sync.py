@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+# delta sync for offline / mobile clients
+# a sync token is the (updated_at, id) position of the last task a client has
+# seen; the next call returns the owner's tasks after it in (updated_at, id)
+# order, a range scan on task_owner_updated_idx. Soft deletes go through save()
+# and bump updated_at, so they show up as deletions. Rows stamped in the last
+# SETTLE_SECONDS are held back: updated_at is set before commit, and a slower
+# transaction could otherwise land behind a token that was already handed out.
+# Writers therefore keep the time between stamping and committing below that:
+# bulk edits commit per batch (task_app/bulk.py) and bulk create, which has to
+# stay one transaction, restamps its rows just before committing.
+
+DEFAULTS = {
+    "PAGE_SIZE": 200,
+    "MAX_PAGE_SIZE": 1000,
+    "SETTLE_SECONDS": 1.0,
+}
+INVALID_TOKEN = {"since": "Invalid sync token"}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "TASK_SYNC", {})}
+
+
+def encode_token(updated_at, last_id):
+    payload = {"t": updated_at.isoformat(), "id": last_id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+# (updated_at, id) or None for a full sync
+def decode_token(token):
+    if not token:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        updated_at, last_id = parse_datetime(payload["t"]), int(payload["id"])
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+        raise ValidationError(INVALID_TOKEN)
+    if updated_at is None:
+        raise ValidationError(INVALID_TOKEN)
+    return updated_at, last_id
+
+
+# (tasks, next token, has_more) for the tasks changed after `since`
+def changed_tasks(queryset, since, limit):
+    horizon = timezone.now() - timedelta(seconds=get_config()["SETTLE_SECONDS"])
+    queryset = queryset.filter(updated_at__lt=horizon)
+    if since is None:
+        # a first sync has nothing to delete
+        queryset = queryset.filter(is_deleted=False)
+    else:
+        updated_at, last_id = since
+        queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=last_id))
+
+    rows = list(queryset.order_by("updated_at", "id")[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        token = encode_token(rows[-1].updated_at, rows[-1].id)
+    else:
+        # everything before the horizon has been seen
+        token = encode_token(horizon, 0)
+    return rows, token, has_more
@@ -0,0 +1,74 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from .events import build_event, record_events
+from .models import Tag, Task
+from .response_cache import invalidate_user
+from .search import index_tasks
+
+
+def get_batch_size():
+    return getattr(settings, "TASK_BULK_BATCH_SIZE", 500)
+
+
+# accept "name" or {"name": ...} and return the cleaned name (or None)
+def tag_name(tag):
+    name = tag.get("name") if isinstance(tag, dict) else tag
+    if name is None:
+        return None
+    name = str(name).strip()
+    return name or None
+
+
+# the cleaned names of a tags payload, with the rules of TagNameField for every
+# write path; raises a ValidationError (400) before a name reaches the database
+def clean_tag_names(tags):
+    from .serializers import TagNameField
+
+    try:
+        return serializers.ListField(child=TagNameField()).run_validation(tags)
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({"tags": exc.detail})
+
+
+# map tag names to Tag rows: one SELECT ... IN per batch for the existing
+# names, one INSERT for the missing ones and one SELECT to read their ids.
+# ignore_conflicts makes concurrent inserts of the same name safe.
+def resolve_tags(names, batch_size=None):
+    batch_size = batch_size or get_batch_size()
+    names = list(dict.fromkeys(clean_tag_names(names)))
+    resolved = {}
+    for start in range(0, len(names), batch_size):
+        resolved.update(Tag.objects.in_bulk(names[start:start + batch_size], field_name="name"))
+
+    missing = [name for name in names if name not in resolved]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], batch_size=batch_size, ignore_conflicts=True)
+        for start in range(0, len(missing), batch_size):
+            resolved.update(Tag.objects.in_bulk(missing[start:start + batch_size], field_name="name"))
+    return resolved
+
+
+# link tags to a task with a single through-table write.
+# replace=True also drops the links that are not in `tags`; touch=False skips
+# bumping the task's updated_at / version (a task created a moment ago).
+def set_task_tags(task, tags, replace=False, batch_size=None, touch=True):
+    resolved = resolve_tags(tags, batch_size=batch_size)
+    Through = Task.tags.through
+    if replace:
+        Through.objects.filter(task_id=task.pk).exclude(tag_id__in=[t.pk for t in resolved.values()]).delete()
+    Through.objects.bulk_create(
+        [Through(task_id=task.pk, tag_id=t.pk) for t in resolved.values()],
+        batch_size=batch_size or get_batch_size(),
+        ignore_conflicts=True,
+    )
+    # tags are part of the task for ETags, delta sync and version checks
+    if touch:
+        task.touch()
+    # drop a stale prefetch and refresh the search document (no m2m signals here)
+    getattr(task, "_prefetched_objects_cache", {}).pop("tags", None)
+    index_tasks([task.pk])
+    invalidate_user(task.created_by_id)
+    if resolved or replace:
+        record_events([build_event(task, "tagged", data={"tags": list(resolved), "replace": replace})])
+    return list(resolved.values())
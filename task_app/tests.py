@@ -1,3 +1,1262 @@
-from django.test import TestCase
+import base64
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, router, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from storages.utils import is_seekable
+from task_management.database import database_config
+from task_management.replicas import ReplicaPinMiddleware, replica_reads
+
+from .benchmark import Endpoint, EndpointBenchmarkMixin, SeededClientMixin, seed
+from .events import wait_for_events
+from . import bulk, jobs, search, sync, uploads
+from .models import Comment, FileAttachment, FileBlob, Job, Tag, Task, TaskEvent, TaskStat, UploadSession
+from .response_cache import get_response_cache
+from .stats import rebuild_stats
+from .tags import set_task_tags
+from .tracking import VersionConflict
+from .views.TaskViewSet import TaskViewSet
+
+
+API = "/api/tasks-routes"
+ASYNC_API = "/api/async/tasks-routes"
+# measure the ORM path rather than the response cache
+NO_CACHE = {"HTTP_CACHE_CONTROL": "no-cache"}
+# the response cache is off by default; one test process may use the in-process backend
+RESPONSE_CACHE = {"ENABLED": True, "BACKEND": "local"}
+
+
+# rewinds what it is given before writing, like django-storages' S3 backend
+class RewindingStorage(FileSystemStorage):
+
+    def _save(self, name, content):
+        if is_seekable(content):
+            content.seek(0)
+        return super()._save(name, content)
+
+
+# no settle window, so delta sync sees the rows seeded a moment ago
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="task-bench-"), TASK_SYNC={"SETTLE_SECONDS": 0},
+                   TASK_RESPONSE_CACHE=RESPONSE_CACHE)
+class TaskEndpointBenchmarkTests(EndpointBenchmarkMixin, TestCase):
+
+    def get_endpoints(self):
+        owner = self.data.owner
+        other = self.data.users[1]
+        task = self.data.owner_tasks()[0]
+        tag = self.data.tags[0]
+        comment = Comment.objects.create(task=task, author=owner, content="editable")
+        file = self.data.attachments[0]
+        download = task.files.create(uploaded_by=owner, file=SimpleUploadedFile("dl.txt", b"benchmark download"), filename="dl.txt")
+
+        def new_task(i):
+            return Task.objects.create(title=f"consumable {i}", description="", created_by=owner)
+
+        to_delete = self.consumable(new_task)
+        to_assign = self.consumable(new_task)
+        to_bulk_delete = self.consumable(new_task)
+        board = [t.id for t in self.data.owner_tasks()[:20]]
+        comments = self.consumable(lambda i: Comment.objects.create(task=task, author=owner, content=f"c{i}"))
+        files = self.consumable(lambda i: task.files.create(uploaded_by=owner, file=f"task_files/bench/x{i}.txt", filename=f"x{i}.txt"))
+
+        def etag(path):
+            return {"HTTP_IF_NONE_MATCH": self.client.get(path)["ETag"]}
+
+        tasks_etag = etag(f"{API}/tasks/")
+        comments_etag = etag(f"{API}/comments/?task_pk={task.id}")
+        changes_token = self.client.get(f"{API}/tasks/changes/?limit=5").data["since"]
+
+        return [
+            Endpoint("tasks-list", "get", f"{API}/tasks/", headers=NO_CACHE),
+            Endpoint("tasks-list-not-modified", "get", f"{API}/tasks/", headers=tasks_etag, status=304),
+            Endpoint("tasks-list-cached", "get", f"{API}/tasks/"),
+            Endpoint("tasks-list-page-2", "get", f"{API}/tasks/?page=2", headers=NO_CACHE),
+            Endpoint("tasks-list-filtered", "get", f"{API}/tasks/?status=todo&ordering=-priority", headers=NO_CACHE),
+            Endpoint("tasks-list-search", "get", f"{API}/tasks/?search=benchmark", headers=NO_CACHE),
+            Endpoint("tasks-list-cursor", "get", f"{API}/tasks/?pagination=cursor&ordering=due_date", headers=NO_CACHE),
+            Endpoint("tasks-list-sparse", "get", f"{API}/tasks/?fields=id,title,status,priority", headers=NO_CACHE),
+            Endpoint("tasks-list-collapsed", "get", f"{API}/tasks/?expand=", headers=NO_CACHE),
+            Endpoint("tasks-detail", "get", f"{API}/tasks/{task.id}/", headers=NO_CACHE),
+            Endpoint("tasks-detail-sparse", "get", f"{API}/tasks/{task.id}/?fields=id,title,tags&expand=",
+                     headers=NO_CACHE),
+            Endpoint("tasks-detail-cached", "get", f"{API}/tasks/{task.id}/"),
+            Endpoint("tasks-create", "post", f"{API}/tasks/",
+                     {"title": "new", "description": "", "tags": ["a", "b", {"name": "c"}]}, status=201),
+            Endpoint("tasks-partial-update", "patch", f"{API}/tasks/{task.id}/",
+                     {"status": "in_progress", "tags": ["bench-tag-0", "extra"]}),
+            Endpoint("tasks-assign-user", "post", lambda i: f"{API}/tasks/{to_assign[i].id}/assign-user/{other.id}/"),
+            Endpoint("tasks-destroy", "delete", lambda i: f"{API}/tasks/{to_delete[i].id}/", status=204),
+            Endpoint("tasks-changes", "get", f"{API}/tasks/changes/"),
+            Endpoint("tasks-changes-since", "get", f"{API}/tasks/changes/?since={changes_token}"),
+            Endpoint("tasks-events", "get", f"{API}/tasks/events/?cursor=0&wait=0"),
+            Endpoint("tasks-bulk-create", "post", f"{API}/tasks/bulk-create/",
+                     [{"title": f"bulk {n}", "tags": [f"bulk-{n % 3}"]} for n in range(25)], status=201),
+            Endpoint("tasks-bulk-update", "post", f"{API}/tasks/bulk-update/",
+                     lambda i: {"ids": board, "changes": {"status": ["todo", "done"][i % 2], "assigned_to": other.id}}),
+            Endpoint("tasks-bulk-update-filter", "post", f"{API}/tasks/bulk-update/",
+                     lambda i: {"filter": {"status": "in_progress"}, "changes": {"priority": ["low", "high"][i % 2]}}),
+            Endpoint("tasks-bulk-delete", "post", f"{API}/tasks/bulk-delete/", lambda i: {"ids": [to_bulk_delete[i].id]}),
+            Endpoint("tags-list", "get", f"{API}/tags/"),
+            Endpoint("tags-detail", "get", f"{API}/tags/{tag.id}/"),
+            Endpoint("tags-create", "post", f"{API}/tags/", lambda i: {"name": f"new-tag-{i}"}, status=201),
+            Endpoint("comments-list", "get", f"{API}/comments/?task_pk={task.id}"),
+            Endpoint("comments-list-sparse", "get", f"{API}/comments/?task_pk={task.id}&fields=id,content"),
+            Endpoint("comments-list-not-modified", "get", f"{API}/comments/?task_pk={task.id}",
+                     headers=comments_etag, status=304),
+            Endpoint("comments-create", "post", f"{API}/comments/", {"task_id": task.id, "content": "hi"}, status=201),
+            Endpoint("comments-partial-update", "patch", f"{API}/comments/{comment.id}/", {"content": "edited"}),
+            Endpoint("comments-destroy", "delete", lambda i: f"{API}/comments/{comments[i].id}/", status=204),
+            Endpoint("files-list", "get", f"{API}/file-upload/?task_pk={task.id}"),
+            Endpoint("files-list-sparse", "get", f"{API}/file-upload/?task_pk={task.id}&fields=id,filename,size"),
+            Endpoint("files-detail", "get", f"{API}/file-upload/{file.id}/"),
+            Endpoint("files-create", "post", f"{API}/file-upload/",
+                     lambda i: {"task_id": task.id, "file": SimpleUploadedFile(f"up{i}.txt", b"benchmark upload")},
+                     format="multipart", status=201),
+            Endpoint("files-upload-start", "post", f"{API}/file-upload/uploads/",
+                     {"task_id": task.id, "filename": "big.bin", "size": 10 * 1024 * 1024}, status=201),
+            Endpoint("files-download", "get", f"{API}/file-upload/{download.id}/download/"),
+            Endpoint("files-download-range", "get", f"{API}/file-upload/{download.id}/download/",
+                     headers={"HTTP_RANGE": "bytes=0-8"}, status=206),
+            Endpoint("files-destroy", "delete", lambda i: f"{API}/file-upload/{files[i].id}/", status=204),
+            Endpoint("jobs-list", "get", f"{API}/jobs/"),
+            Endpoint("async-tasks-list", "get", f"{ASYNC_API}/tasks/"),
+            Endpoint("async-tasks-detail", "get", f"{ASYNC_API}/tasks/{task.id}/"),
+            Endpoint("async-comments-list", "get", f"{ASYNC_API}/comments/?task_pk={task.id}"),
+            Endpoint("async-files-list", "get", f"{ASYNC_API}/file-upload/?task_pk={task.id}"),
+        ]
+
+
+# the values() list fast path must render exactly what TaskSerializer renders
+class FastTaskListTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        instrumentation = logging.getLogger("task_management.instrumentation")
+        self.addCleanup(instrumentation.setLevel, instrumentation.level)
+        instrumentation.setLevel(logging.ERROR)
+        super().setUp()
+        first, second = self.data.owner_tasks()[:2]
+        # tags linked out of id order, a due date and an unassigned task
+        first.tags.clear()
+        Through = Task.tags.through
+        Through.objects.bulk_create([Through(task_id=first.id, tag_id=tag.id) for tag in reversed(self.data.tags)])
+        Task.objects.filter(pk=second.pk).update(due_date=timezone.now() + timedelta(days=3), assigned_to=None)
+
+    def get_both(self, path):
+        fast = self.client.get(path, **NO_CACHE)
+        with mock.patch.object(TaskViewSet, "fast_list", False):
+            full = self.client.get(path, **NO_CACHE)
+        return fast, full
+
+    def test_list_matches_task_serializer(self):
+        paths = [
+            "/tasks/", "/tasks/?page=2&page_size=7", "/tasks/?ordering=due_date,-priority",
+            "/tasks/?status=done", "/tasks/?search=benchmark", "/tasks/?pagination=cursor&ordering=-due_date",
+            "/tasks/?fields=id,title,tags&expand=", "/tasks/?expand=created_by,tags", "/tasks/?fields=status,id",
+            "/tasks/?fields=assigned_to,created_by,due_date&pagination=cursor",
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                fast, full = self.get_both(f"{API}{path}")
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, full.content)
+                next_page = fast.json().get("next")
+                if next_page:
+                    fast, full = self.get_both(next_page)
+                    self.assertEqual(fast.content, full.content)
+
+    def test_unknown_fields_are_rejected(self):
+        for path in ["/tasks/?fields=id,secret", "/tasks/?expand=description", "/comments/?expand=task"]:
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(f"{API}{path}", **NO_CACHE).status_code, 400)
+
+
+# bulk-create / bulk-update / bulk-delete skip model signals, so check what they keep in sync
+class BulkEditTests(SeededClientMixin, TestCase):
+
+    def bulk_create(self, items):
+        return self.client.post(f"{API}/tasks/bulk-create/", items, format="json")
+
+    def test_bulk_create_is_all_or_nothing(self):
+        before = Task.objects.count()
+        response = self.bulk_create([{"title": "kept?", "tags": ["fresh"]}, {"title": "bad", "tags": ["x" * 51]}])
+        self.assertEqual(response.status_code, 400)
+        # a failure after the insert rolls the tasks and their new tags back too
+        with mock.patch("task_app.serializers.index_tasks", side_effect=DatabaseError("index down")):
+            with self.assertRaises(DatabaseError):
+                self.bulk_create([{"title": "first", "tags": ["fresh"]}, {"title": "second"}])
+        self.assertEqual(Task.objects.count(), before)
+        self.assertFalse(Tag.objects.filter(name="fresh").exists())
+
+    def test_bulk_create_ignores_client_versions(self):
+        response = self.bulk_create([{"title": "imported", "version": 999}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()[0]["version"], 1)
+        self.assertEqual(Task.objects.get(pk=response.json()[0]["id"]).version, 1)
+
+    def test_bulk_create_queries_do_not_grow_with_the_batch(self):
+        counts = []
+        for size, prefix in ((5, "small"), (50, "large")):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.bulk_create([{"title": f"{prefix} {i}", "tags": [f"{prefix}-{i % 3}"]} for i in range(size)])
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.json()), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Task.objects.get(title="large 4").tags.get().name, "large-1")
+
+    def stats(self):
+        return sorted(TaskStat.objects.filter(count__gt=0).values_list("user_id", "kind", "key", "count"))
+
+    def assertStatsConsistent(self):
+        counted = self.stats()
+        rebuild_stats()
+        self.assertEqual(counted, self.stats())
+
+    def test_bulk_update_reports_each_id(self):
+        mine = [t.id for t in self.data.owner_tasks()[:3]]
+        theirs = next(t.id for t in self.data.tasks if t.created_by_id != self.data.owner.id)
+        Task.objects.filter(pk=mine[0]).update(status="done", assigned_to=None)
+        rebuild_stats()
+        started = timezone.now()
+        response = self.client.post(f"{API}/tasks/bulk-update/", {
+            "ids": mine + [theirs], "changes": {"status": "done", "assigned_to": None},
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        results = {row["id"]: row["result"] for row in response.json()["results"]}
+        self.assertEqual(results, {mine[0]: "unchanged", mine[1]: "updated", mine[2]: "updated", theirs: "not_found"})
+        self.assertEqual(response.json()["updated"], 2)
+        updated = Task.objects.filter(pk__in=mine[1:])
+        self.assertTrue(all(t.status == "done" and t.assigned_to_id is None and t.updated_at >= started for t in updated))
+        self.assertLess(Task.objects.get(pk=theirs).updated_at, started)
+        self.assertStatsConsistent()
+
+    def test_bulk_delete_by_filter(self):
+        todo = set(Task.objects.filter(created_by=self.data.owner, status="todo").values_list("id", flat=True))
+        response = self.client.post(f"{API}/tasks/bulk-delete/", {"filter": {"status": "todo"}}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row["id"] for row in response.json()["results"]}, todo)
+        self.assertEqual(Task.objects.filter(pk__in=todo, is_deleted=True, deleted_at__isnull=False).count(), len(todo))
+        self.assertStatsConsistent()
+
+    def test_later_batches_reach_delta_sync(self):
+        tasks = sorted(t.id for t in self.data.owner_tasks()[:4])
+        queryset = Task.objects.filter(created_by=self.data.owner)
+        queryset.update(priority="low")
+        clock = [timezone.now() + timedelta(minutes=1)]
+
+        def now():
+            clock[0] += timedelta(seconds=10)
+            return clock[0]
+
+        # a client syncs after the first batch has committed
+        tokens = []
+        record_events = bulk.record_events
+
+        def sync_between_batches(events, **kwargs):
+            if not tokens:
+                tokens.append(sync.changed_tasks(queryset, None, 1000)[1])
+            return record_events(events, **kwargs)
+
+        with mock.patch("django.utils.timezone.now", side_effect=now), \
+                mock.patch.object(bulk, "record_events", side_effect=sync_between_batches):
+            bulk.update_tasks(self.data.owner, tasks, {"priority": "critical"}, batch_size=2)
+            rows = sync.changed_tasks(queryset, sync.decode_token(tokens[0]), 1000)[0]
+        self.assertEqual(sorted(t.id for t in rows if t.priority == "critical"), tasks[2:])
+
+    def test_slow_bulk_create_reaches_delta_sync(self):
+        queryset = Task.objects.filter(created_by=self.data.owner)
+        clock = [timezone.now() + timedelta(minutes=1)]
+        tokens = []
+        index_tasks = search.index_tasks
+
+        # the transaction is still open long after the rows were inserted, and a
+        # client syncs meanwhile; it cannot see the uncommitted rows yet
+        def slow_index(task_ids, **kwargs):
+            clock[0] += timedelta(seconds=30)
+            tokens.append(sync.changed_tasks(queryset.exclude(pk__in=task_ids), None, 1000)[1])
+            return index_tasks(task_ids, **kwargs)
+
+        with mock.patch("django.utils.timezone.now", side_effect=lambda: clock[0]), \
+                mock.patch("task_app.serializers.index_tasks", side_effect=slow_index):
+            created = [task["id"] for task in self.bulk_create([{"title": f"import {i}"} for i in range(3)]).json()]
+            clock[0] += timedelta(seconds=30)
+            rows = sync.changed_tasks(queryset, sync.decode_token(tokens[0]), 1000)[0]
+        self.assertEqual(sorted(t.id for t in rows), sorted(created))
+
+    def test_invalid_selection(self):
+        for body in [{"changes": {"status": "done"}}, {"filter": {"title": "x"}, "changes": {"status": "done"}},
+                     {"ids": [1], "changes": {}}]:
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post(f"{API}/tasks/bulk-update/", body, format="json").status_code, 400)
+
+
+# saves write only the changed columns, guarded by the row version
+class VersionTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+
+    def test_save_writes_changed_columns_only(self):
+        task = Task.objects.get(pk=self.task.pk)
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        self.assertEqual(len(queries), 0)
+        task.title = "renamed"
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        update = next(q["sql"] for q in queries if q["sql"].startswith('UPDATE "task_app_task"'))
+        self.assertIn('"title"', update)
+        self.assertNotIn('"description"', update)
+        self.assertEqual(Task.objects.get(pk=task.pk).version, 2)
+        # the counters and the change feed take the old values from the loaded row
+        task.status = "done"
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        self.assertFalse([q for q in queries if q["sql"].startswith('SELECT') and 'FROM "task_app_task"' in q["sql"]])
+
+    def test_concurrent_save_conflicts(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        first.title, second.title = "first", "second"
+        first.save()
+        with self.assertRaises(VersionConflict):
+            second.save()
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "first")
+
+    def test_conflict_keeps_the_transaction_usable(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        first.title, second.title = "first", "second"
+        first.save()
+        with transaction.atomic():
+            with self.assertRaises(VersionConflict):
+                second.save()
+            second.refresh_from_db()
+            second.title = "retried"
+            second.save()
+        self.assertEqual(Task.objects.get(pk=self.task.pk).version, 3)
+
+    def test_conflict_keeps_an_earlier_rollback(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        first.title, second.title = "first", "second"
+        first.save()
+        with transaction.atomic():
+            transaction.set_rollback(True)
+            # Django refuses queries in a block marked for rollback; let the save reach its UPDATE
+            with mock.patch("django.db.backends.base.base.BaseDatabaseWrapper.validate_no_broken_transaction"):
+                with self.assertRaises(VersionConflict):
+                    second.save()
+            self.assertTrue(transaction.get_rollback())
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "first")
+
+    def test_tag_edits_are_version_checked(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        first.title = "first"
+        first.save()
+        with self.assertRaises(VersionConflict), transaction.atomic():
+            set_task_tags(second, ["late"])
+        self.assertFalse(Task.objects.get(pk=self.task.pk).tags.filter(name="late").exists())
+
+    def test_stale_version_answers_409(self):
+        path = f"{API}/tasks/{self.task.pk}/"
+        self.assertEqual(self.client.patch(path, {"title": "a", "version": 1}, format="json").status_code, 200)
+        response = self.client.patch(path, {"title": "b", "version": 1}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["version"], 2)
+        self.assertEqual(self.client.delete(f"{path}?version=1").status_code, 409)
+        self.assertEqual(self.client.delete(f"{path}?version=2").status_code, 204)
+
+
+# the hot read queries stay on indexes (manage.py explain_queries)
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_use_indexes(self):
+        data = seed(attachments=0)
+        Task.objects.filter(pk=data.owner_tasks()[0].pk).update(is_deleted=True)
+        out = StringIO()
+        call_command("explain_queries", user=data.owner.username, fail_on_scan=True, stdout=out, no_color=True)
+        self.assertIn("comments-list#1", out.getvalue())
+
+
+# ?fields= / ?expand= shape responses without dropping input on writes
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="task-fields-"))
+class FieldsetWriteTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+
+    def test_comment_update_with_fields(self):
+        comment = Comment.objects.create(task=self.task, author=self.data.owner, content="original")
+        response = self.client.patch(f"{API}/comments/{comment.pk}/?fields=id&expand=author", {"content": "edited"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"id": comment.pk})
+        comment.refresh_from_db()
+        self.assertEqual(comment.content, "edited")
+
+    def test_file_upload_with_fields(self):
+        upload = SimpleUploadedFile("notes.txt", b"sparse upload")
+        response = self.client.post(f"{API}/file-upload/?fields=id,filename", {"task_id": self.task.pk, "file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(response.json()), {"id", "filename"})
+        self.assertEqual(self.task.files.get().size, len(b"sparse upload"))
+
+
+# tags live outside the task row but still count as a change of the task
+@override_settings(TASK_SYNC={"SETTLE_SECONDS": 0})
+class TagChangeTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+
+    def test_tag_only_patch_is_a_change(self):
+        path = f"{API}/tasks/{self.task.pk}/"
+        etag = self.client.get(path, **NO_CACHE)["ETag"]
+        since = self.client.get(f"{API}/tasks/changes/").json()["since"]
+        before = Task.objects.get(pk=self.task.pk)
+
+        response = self.client.patch(path, {"tags": ["fresh-tag"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        after = Task.objects.get(pk=self.task.pk)
+        self.assertEqual(after.version, before.version + 1)
+        self.assertGreater(after.updated_at, before.updated_at)
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag, **NO_CACHE).status_code, 200)
+        changed = self.client.get(f"{API}/tasks/changes/?since={since}").json()["changed"]
+        self.assertEqual([task["id"] for task in changed], [self.task.pk])
+        # the bumped version is the one a following write has to name
+        self.assertEqual(self.client.patch(path, {"title": "next", "version": after.version}, format="json").status_code, 200)
+
+    def test_invalid_tags_write_nothing(self):
+        path = f"{API}/tasks/{self.task.pk}/"
+        before = Task.objects.get(pk=self.task.pk)
+        long_tag = "x" * 80
+        for payload in ({"title": "lost", "tags": "x"}, {"title": "lost", "tags": ["x"], "tags_mode": "merge"},
+                        {"title": "lost", "tags": ["ok", long_tag]}, {"title": "lost", "tags": [{"tag": "x"}]}):
+            self.assertEqual(self.client.patch(path, payload, format="json").status_code, 400)
+        after = Task.objects.get(pk=self.task.pk)
+        self.assertEqual((after.title, after.version), (before.title, before.version))
+
+        tasks = Task.objects.count()
+        response = self.client.post(f"{API}/tasks/", {"title": "lost", "description": "", "tags": [long_tag]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"tags": {"0": ["Tag name must be at most 50 characters."]}})
+        self.assertEqual(Task.objects.count(), tasks)
+        self.assertFalse(Tag.objects.filter(name__in=["ok", long_tag]).exists())
+
+
+# ETags of task and comment responses follow the tags and users they embed
+class EmbeddedChangeTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+
+    def assertChanged(self, path, write):
+        etag = self.client.get(path, **NO_CACHE)["ETag"]
+        write()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag, **NO_CACHE)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_tag_rename(self):
+        tag = self.task.tags.first()
+        response = self.assertChanged(f"{API}/tasks/", lambda: self.client.patch(f"{API}/tags/{tag.pk}/", {"name": "renamed"}, format="json"))
+        self.assertIn("renamed", response.content.decode())
+
+    def test_username_change(self):
+        Comment.objects.create(task=self.task, author=self.data.owner, content="hi")
+        owner = self.data.owner
+
+        def rename():
+            owner.username = "renamed-owner"
+            owner.save()
+
+        response = self.assertChanged(f"{API}/tasks/{self.task.pk}/?expand=created_by", rename)
+        self.assertEqual(response.json()["created_by"]["username"], "renamed-owner")
+        owner.email = "new@example.com"
+        self.assertChanged(f"{API}/comments/?task_pk={self.task.pk}", owner.save)
+
+    def test_password_change_leaves_rows_alone(self):
+        owner = self.data.owner
+        updated_at = Task.objects.get(pk=self.task.pk).updated_at
+        owner.set_password("another-pass-456")
+        owner.first_name = "Renamed"
+        owner.save()
+        self.assertEqual(Task.objects.get(pk=self.task.pk).updated_at, updated_at)
+
+
+# the read-through response cache (task_app/response_cache.py)
+@override_settings(TASK_RESPONSE_CACHE=RESPONSE_CACHE)
+class ResponseCacheTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.addCleanup(get_response_cache().clear)
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+
+    def test_hits_skip_the_validator_query(self):
+        path = f"{API}/tasks/"
+        miss = self.client.get(path)
+        self.assertEqual(miss["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as queries:
+            hit = self.client.get(path)
+            not_modified = self.client.get(path, HTTP_IF_NONE_MATCH=miss["ETag"])
+        self.assertEqual((hit["X-Cache"], hit["ETag"], hit.content), ("HIT", miss["ETag"], miss.content))
+        self.assertEqual(not_modified.status_code, 304)
+        # only the JWT user lookups
+        self.assertEqual(len(queries), 2)
+
+
+# the project middlewares run natively under ASGI as well as WSGI
+@override_settings(REQUEST_INSTRUMENTATION={"SAMPLE_RATE": 1.0}, READ_REPLICAS={"ALIASES": ["default"]})
+class AsyncMiddlewareTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        instrumentation = logging.getLogger("task_management.instrumentation")
+        self.addCleanup(instrumentation.setLevel, instrumentation.level)
+        instrumentation.setLevel(logging.ERROR)
+        super().setUp()
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.data.owner).access_token}"}
+
+    async def test_async_requests_are_measured_and_pinned(self):
+        read = await self.async_client.get(f"{ASYNC_API}/tasks/", headers=self.headers)
+        self.assertEqual(read.status_code, 200)
+        self.assertRegex(read["Server-Timing"], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn("serialize;dur=", read["Server-Timing"])
+        self.assertNotIn("X-DB-Pin", read)
+        write = await self.async_client.post(f"{API}/tasks/", {"title": "from asgi", "description": ""}, content_type="application/json", headers=self.headers)
+        self.assertEqual(write.status_code, 201)
+        self.assertIn("X-DB-Pin", write)
+
+    def test_serialization_is_timed_apart_from_the_view(self):
+        task = self.data.owner_tasks()[0]
+        for path in (f"{API}/tasks/?page_size=50", f"{API}/tasks/{task.pk}/"):
+            with self.subTest(path=path):
+                timing = dict(re.findall(r"(\w+);dur=([\d.]+)", self.client.get(path, **NO_CACHE)["Server-Timing"]))
+                self.assertLessEqual(float(timing["serialize"]), float(timing["view"]))
+
+
+# DATABASES from DB_* environment variables (task_management/database.py)
+class DatabaseConfigTests(SimpleTestCase):
+
+    def config(self, **env):
+        with mock.patch.dict(os.environ, env, clear=True):
+            return database_config(Path("/srv/app"))
+
+    def test_sqlite_defaults_and_overrides(self):
+        default = self.config()["default"]
+        self.assertEqual((default["ENGINE"], default["NAME"]), ("django.db.backends.sqlite3", Path("/srv/app/db.sqlite3")))
+        self.assertEqual((default["CONN_MAX_AGE"], default["OPTIONS"]["transaction_mode"]), (60, "IMMEDIATE"))
+        # the checked-in database is not switched to WAL, a database of its own is
+        self.assertNotIn("journal_mode", default["OPTIONS"]["init_command"])
+        self.assertIn("PRAGMA journal_mode=WAL", self.config(DB_SQLITE_JOURNAL_MODE="WAL")["default"]["OPTIONS"]["init_command"])
+
+        tuned = self.config(DB_NAME="/data/tasks.db", DB_CONN_MAX_AGE="none", DB_SQLITE_BUSY_TIMEOUT="5",
+                            DB_SQLITE_MMAP_SIZE="0", DB_REPLICA_NAMES="/data/copy.db, ")
+        self.assertEqual((tuned["default"]["NAME"], tuned["default"]["CONN_MAX_AGE"]), ("/data/tasks.db", None))
+        self.assertEqual(tuned["default"]["OPTIONS"]["timeout"], 5)
+        self.assertIn("PRAGMA mmap_size=0", tuned["default"]["OPTIONS"]["init_command"])
+        self.assertIn("PRAGMA journal_mode=WAL", tuned["default"]["OPTIONS"]["init_command"])
+        self.assertEqual(list(tuned), ["default", "replica_1"])
+        self.assertEqual(tuned["replica_1"]["NAME"], "/data/copy.db")
+
+    def test_postgres_from_env(self):
+        databases = self.config(DB_ENGINE="postgresql", DB_NAME="tasks", DB_USER="app", DB_PASSWORD="secret",
+                                DB_HOST="primary", DB_PORT="5433", DB_CONN_MAX_AGE="0",
+                                DB_REPLICA_HOSTS="replica-a:6432,replica-b")
+        default = databases["default"]
+        self.assertEqual(default["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual([default[k] for k in ("NAME", "USER", "PASSWORD", "HOST", "PORT")],
+                         ["tasks", "app", "secret", "primary", "5433"])
+        self.assertEqual((default["CONN_MAX_AGE"], default["CONN_HEALTH_CHECKS"]), (0, True))
+        self.assertEqual(default["OPTIONS"], {"options": "-c statement_timeout=30000"})
+        # replicas share the credentials and mirror the primary's test database
+        self.assertEqual([(r["HOST"], r["PORT"], r["USER"]) for r in (databases["replica_1"], databases["replica_2"])],
+                         [("replica-a", "6432", "app"), ("replica-b", "5433", "app")])
+        self.assertEqual(databases["replica_1"]["TEST"], {"MIRROR": "default"})
+
+        no_timeout = self.config(DB_ENGINE="postgres", DB_STATEMENT_TIMEOUT_MS="0")["default"]
+        self.assertEqual((no_timeout["OPTIONS"], no_timeout["CONN_MAX_AGE"]), ({}, 300))
+
+    def test_pool_needs_psycopg_pool(self):
+        # psycopg2 deployments keep persistent connections instead
+        with mock.patch.dict(sys.modules, {"psycopg_pool": None}):
+            fallback = self.config(DB_ENGINE="postgres", DB_POOL="true")["default"]
+        self.assertNotIn("pool", fallback["OPTIONS"])
+        self.assertEqual((fallback["CONN_MAX_AGE"], fallback["CONN_HEALTH_CHECKS"]), (300, True))
+
+        pool_module = SimpleNamespace(ConnectionPool=SimpleNamespace(check_connection=object()))
+        with mock.patch.dict(sys.modules, {"psycopg_pool": pool_module}):
+            pooled = self.config(DB_ENGINE="postgres", DB_POOL="true", DB_POOL_MAX_SIZE="4")["default"]
+        self.assertEqual(pooled["OPTIONS"]["pool"], {
+            "min_size": 2, "max_size": 4, "max_idle": 300, "timeout": 10,
+            "check": pool_module.ConnectionPool.check_connection,
+        })
+        # Django refuses a pool together with persistent connections
+        self.assertEqual((pooled["CONN_MAX_AGE"], pooled["CONN_HEALTH_CHECKS"]), (0, False))
+        with mock.patch.dict(sys.modules, {"psycopg_pool": pool_module}):
+            self.assertNotIn("pool", self.config(DB_ENGINE="postgres")["default"]["OPTIONS"])
+
+
+# read routing with a second alias; the fake view only asks the router, so the
+# replica needs no connection of its own
+@override_settings(READ_REPLICAS={"ALIASES": ["replica"], "STICKY_SECONDS": 5})
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(settings.DATABASES, {"replica": settings.DATABASES["default"]})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    # a replica_reads view that reads, optionally writes, then reads again
+    def routes(self, request, write=False):
+        seen = []
+
+        @replica_reads()
+        def view(request):
+            seen.append(Task.objects.all().db)
+            if write:
+                router.db_for_write(Task)
+            seen.append(Task.objects.all().db)
+            seen.append(User.objects.all().db)
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(view)(request)
+        return seen, response
+
+    def test_reads_go_to_the_replica(self):
+        seen, response = self.routes(self.factory.get("/"))
+        # users are always read from the primary, for authentication
+        self.assertEqual(seen, ["replica", "replica", "default"])
+        self.assertNotIn("X-DB-Pin", response)
+        self.assertNotIn("db_pin", response.cookies)
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        seen, response = self.routes(self.factory.get("/"), write=True)
+        self.assertEqual(seen, ["replica", "default", "default"])
+        self.assertIn("X-DB-Pin", response)
+        self.assertEqual(response.cookies["db_pin"].value, response["X-DB-Pin"])
+        # the write flag does not leak into the next request
+        self.assertEqual(self.routes(self.factory.get("/"))[0][0], "replica")
+
+    def test_pinned_clients_read_the_primary(self):
+        until = f"{time.time() + 5:.3f}"
+        by_cookie = self.factory.get("/")
+        by_cookie.COOKIES["db_pin"] = until
+        by_header = self.factory.get("/", HTTP_X_DB_PIN=until)
+        expired = self.factory.get("/")
+        expired.COOKIES["db_pin"] = f"{time.time() - 1:.3f}"
+        for request, alias in ((by_cookie, "default"), (by_header, "default"), (expired, "replica")):
+            with self.subTest(alias=alias, cookies=request.COOKIES):
+                self.assertEqual(self.routes(request)[0][0], alias)
+
+    def test_unsafe_methods_and_transactions_read_the_primary(self):
+        seen, response = self.routes(self.factory.post("/"))
+        self.assertEqual(seen[0], "default")
+        self.assertIn("X-DB-Pin", response)
+        with mock.patch.object(connections["default"], "in_atomic_block", True):
+            self.assertEqual(self.routes(self.factory.get("/"))[0][0], "default")
+
+
+# the async endpoints share TaskViewSet's filters and refuse what they do not serve
+class AsyncTaskListTests(SeededClientMixin, TestCase):
+
+    def test_filters_match_the_drf_endpoint(self):
+        other = self.data.users[1]
+        paths = [
+            "/tasks/?status=done", "/tasks/?assigned_to={other}", "/tasks/?assigned_to=999999",
+            "/tasks/?priority=urgent", "/tasks/?ordering=-priority,due_date&page=2&page_size=5",
+            "/tasks/?search=benchmark&page_size=3",
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                path = path.format(other=other.pk)
+                sync = self.client.get(f"{API}{path}", **NO_CACHE)
+                native = self.client.get(f"{ASYNC_API}{path}")
+                self.assertEqual(native.status_code, sync.status_code)
+                self.assertEqual(native.json(), self.relink(sync.json()))
+
+    def test_drf_only_params_are_rejected(self):
+        task = self.data.owner_tasks()[0]
+        for path in ["/tasks/?pagination=cursor", "/tasks/?fields=id", f"/tasks/{task.pk}/?expand=tags",
+                     f"/comments/?task_pk={task.pk}&fields=id"]:
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(f"{ASYNC_API}{path}").status_code, 400)
+
+    # page links of the DRF response, pointed at the async endpoint
+    def relink(self, data):
+        if isinstance(data, dict):
+            for key in ("next", "previous"):
+                if data.get(key):
+                    data[key] = data[key].replace(API, ASYNC_API)
+        return data
+
+
+# the task change feed (task_app/events.py) on a fake clock: sleeping advances
+# time instead of blocking the test. Events settle at once unless a test says
+# otherwise
+@override_settings(TASK_EVENTS={"MAX_WAIT": 3, "POLL_INTERVAL": 1, "STREAM_SECONDS": 2, "HEARTBEAT_INTERVAL": 1,
+                                "SETTLE_SECONDS": 0})
+class EventFeedTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 0.0
+        self.sleeps = []
+        # called after each sleep, for writes that land while a reader waits
+        self.during_sleep = lambda: None
+        clock = SimpleNamespace(monotonic=lambda: self.now, sleep=self.sleep, time=time.time, time_ns=time.time_ns)
+        patcher = mock.patch("task_app.events.time", clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cursor = self.client.get(f"{API}/tasks/events/").json()["cursor"]
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        self.during_sleep()
+
+    def create_task(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Task.objects.create(title=title, description="", created_by=self.data.owner)
+
+    def poll(self, cursor, wait):
+        response = self.client.get(f"{API}/tasks/events/", {"cursor": cursor, "wait": wait})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_poll_returns_new_events_and_advances_the_cursor(self):
+        task = self.create_task("watched")
+        feed = self.poll(self.cursor, 0)
+        self.assertEqual([(e["task"], e["kind"]) for e in feed["events"]], [(task.pk, "created")])
+        self.assertEqual(feed["cursor"], feed["events"][-1]["id"])
+        self.assertEqual(self.poll(feed["cursor"], 0), {"events": [], "cursor": feed["cursor"]})
+        self.assertEqual(self.sleeps, [])
+
+    def test_wait_is_capped_at_max_wait(self):
+        self.assertEqual(self.poll(self.cursor, 60)["events"], [])
+        self.assertEqual(self.now, 3)
+
+    def test_waiting_reader_wakes_on_a_new_event(self):
+        def write():
+            if len(self.sleeps) == 2:
+                self.create_task("arrives while waiting")
+
+        self.during_sleep = write
+        events = wait_for_events(self.data.owner.id, self.cursor, wait=3, limit=10)
+        self.assertEqual([e.kind for e in events], ["created"])
+        self.assertEqual(self.now, 2)
+
+    def test_unsettled_events_hold_back_the_cursor(self):
+        start = timezone.now()
+        wall_clock = mock.patch("django.utils.timezone.now", lambda: start + timedelta(seconds=self.now))
+        with wall_clock, self.settings(TASK_EVENTS={"POLL_INTERVAL": 1, "RECHECK_INTERVAL": 5, "SETTLE_SECONDS": 1}):
+            first = self.create_task("committed late")
+            self.now = 4.5
+            self.create_task("committed early")
+            # the lower id is still settling, so the settled one behind it waits too
+            TaskEvent.objects.filter(task=first).update(created_at=timezone.now())
+            self.now = 5.0
+            self.assertEqual(self.poll(self.cursor, 0), {"events": [], "cursor": self.cursor})
+            self.assertEqual(self.client.get(f"{API}/tasks/events/").json()["cursor"], self.cursor)
+            # nothing moves the stamp once they settle, so the reader looks again
+            events = wait_for_events(self.data.owner.id, self.cursor, wait=3, limit=10)
+        self.assertEqual([e.task_id for e in events], [first.pk, first.pk + 1])
+        self.assertEqual(self.now, 6.0)
+
+    def test_sse_framing(self):
+        task = self.create_task("streamed")
+        response = self.client.get(f"{API}/tasks/events/", {"cursor": self.cursor}, HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual((response["Cache-Control"], response["X-Accel-Buffering"]), ("no-cache", "no"))
+        blocks = b"".join(response.streaming_content).decode().split("\n\n")
+        self.assertEqual(blocks[0], "retry: 3000")
+        event_id, kind, data = blocks[1].split("\n")
+        self.assertEqual(kind, "event: created")
+        payload = json.loads(data.removeprefix("data: "))
+        self.assertEqual((event_id, payload["task"]), (f"id: {payload['id']}", task.pk))
+        # heartbeats until STREAM_SECONDS, then the stream ends for the client to reconnect
+        self.assertEqual(blocks[2:], [": keepalive", ": keepalive", ""])
+        self.assertEqual(self.now, 2)
+
+        # reconnecting with Last-Event-ID resumes after the last event seen
+        self.now = 0.0
+        response = self.client.get(f"{API}/tasks/events/", HTTP_ACCEPT="text/event-stream", HTTP_LAST_EVENT_ID=str(payload["id"]))
+        self.assertNotIn("event: created", b"".join(response.streaming_content).decode())
+
+
+# full-text search over title, description and tags (task_app/search.py)
+class SearchTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+
+    def search(self, query):
+        return [task["id"] for task in self.client.get(f"{API}/tasks/", {"search": query}, **NO_CACHE).json()["results"]]
+
+    def test_only_indexed_columns_reindex(self):
+        path = f"{API}/tasks/{self.task.pk}/"
+        with mock.patch("task_app.signals.index_tasks") as index_tasks:
+            self.client.patch(path, {"status": "done", "priority": "low"}, format="json")
+            index_tasks.assert_not_called()
+        self.client.patch(path, {"title": "quarterly zeppelin review"}, format="json")
+        self.assertEqual(self.search("zeppelin"), [self.task.pk])
+
+    def test_create_with_tags_indexes_once(self):
+        insert = search.SQLiteFTSBackend.insert
+        with mock.patch.object(search.SQLiteFTSBackend, "insert", autospec=True, side_effect=insert) as spy:
+            response = self.client.post(f"{API}/tasks/", {"title": "new", "description": "", "tags": ["zeppelin"]}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(self.search("zeppelin"), [response.json()["id"]])
+
+    def zeppelin_tasks(self):
+        owner = self.data.owner
+        in_title = Task.objects.create(title="zeppelin notes", description="plain text", created_by=owner)
+        in_description = Task.objects.create(title="weekly notes", description="zeppelin text here", created_by=owner)
+        in_tags = Task.objects.create(title="other notes", description="plain text here", created_by=owner)
+        set_task_tags(in_tags, ["zeppelin"])
+        Task.objects.create(title="zeppelin", description="", created_by=self.data.users[1])
+        return [in_title.pk, in_tags.pk, in_description.pk]
+
+    def test_matches_are_ranked_title_tags_description(self):
+        ranked = self.zeppelin_tasks()
+        self.assertEqual(self.search("zeppelin"), ranked)
+        # the last term matches as a prefix, and every term must match
+        self.assertEqual(self.search("Zepp"), ranked)
+        self.assertEqual(self.search("zeppelin here"), ranked[1:])
+        self.assertEqual(self.search("zeppelin nowhere"), [])
+
+    def test_backfill_and_rebuild(self):
+        ranked = self.zeppelin_tasks()
+        backend = search.get_backend()
+
+        def empty_index():
+            backend.drop_index()
+            backend.create_index()
+            self.assertEqual(self.search("zeppelin"), [])
+
+        empty_index()
+        migration = importlib.import_module("task_app.migrations.0003_task_search_index")
+        migration.create_search_index(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(self.search("zeppelin"), ranked)
+
+        empty_index()
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out, no_color=True)
+        self.assertIn(f"Indexed {Task.objects.count()} tasks.", out.getvalue())
+        self.assertEqual(self.search("zeppelin"), ranked)
+
+
+# database-backed background jobs (task_app/jobs.py)
+@override_settings(TASK_JOBS={"VISIBILITY_TIMEOUT": 60, "RETRY_BASE": 10, "MAX_ATTEMPTS": 3})
+class JobTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        for name, func in (("tests.ok", self.succeed), ("tests.broken", self.explode)):
+            jobs.job(name)(func)
+            self.addCleanup(jobs.HANDLERS.pop, name)
+
+    def succeed(self, job):
+        self.calls.append(job.pk)
+        return {"ok": True}
+
+    def explode(self, job):
+        raise RuntimeError("boom")
+
+    def test_claims_ready_jobs_by_priority_once(self):
+        low = jobs.enqueue("tests.ok", priority=0)
+        high = jobs.enqueue("tests.ok", priority=5)
+        later = jobs.enqueue("tests.ok", priority=9, delay=60)
+        first = jobs.claim_jobs("worker-1", 1)
+        self.assertEqual([job.pk for job in first], [high.pk])
+        self.assertEqual([job.pk for job in jobs.claim_jobs("worker-2", 5)], [low.pk])
+        self.assertEqual(jobs.claim_jobs("worker-3", 5), [])
+        self.assertEqual(first[0].attempts, 1)
+        self.assertEqual(Job.objects.get(pk=later.pk).status, "queued")
+
+    def test_failures_back_off_then_fail(self):
+        broken = jobs.enqueue("tests.broken")
+        now = timezone.now()
+        for attempt in range(1, 4):
+            [claimed] = jobs.claim_jobs("worker-1", 1, now=now)
+            failed_at = timezone.now()
+            with self.assertLogs("task_app.jobs", "ERROR"):
+                jobs.run_job(claimed, "worker-1")
+            broken.refresh_from_db()
+            self.assertEqual(broken.attempts, attempt)
+            self.assertIn("RuntimeError: boom", broken.error)
+            if attempt < 3:
+                # 10s, 20s, ... plus up to a quarter of jitter
+                base = 10 * 2 ** (attempt - 1)
+                self.assertEqual(broken.status, "queued")
+                self.assertTrue(base <= (broken.run_at - failed_at).total_seconds() <= base * 1.25 + 1)
+                self.assertEqual(jobs.claim_jobs("worker-1", 1, now=now), [])
+                now = broken.run_at
+        self.assertEqual(broken.status, "failed")
+        self.assertEqual(jobs.claim_jobs("worker-1", 1, now=now + timedelta(days=1)), [])
+
+    def test_expired_lock_is_reclaimed(self):
+        queued = jobs.enqueue("tests.ok")
+        [claimed] = jobs.claim_jobs("worker-1", 1)
+        self.assertEqual(jobs.claim_jobs("worker-2", 1), [])
+        [reclaimed] = jobs.claim_jobs("worker-2", 1, now=timezone.now() + timedelta(seconds=61))
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (queued.pk, 2))
+        # the first worker no longer holds it
+        self.assertEqual(jobs.run_job(claimed, "worker-1"), 0)
+        self.assertEqual(jobs.run_job(reclaimed, "worker-2"), 1)
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, "done")
+
+    def test_reclaimed_after_the_last_attempt_fails(self):
+        queued = jobs.enqueue("tests.ok")
+        Job.objects.filter(pk=queued.pk).update(status="running", attempts=3, locked_by="dead", locked_until=timezone.now())
+        [claimed] = jobs.claim_jobs("worker-1", 1, now=timezone.now() + timedelta(seconds=1))
+        jobs.run_job(claimed, "worker-1")
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, "failed")
+        self.assertEqual(self.calls, [])
+
+    def test_keyed_enqueue_joins_the_pending_job(self):
+        first = jobs.enqueue("tests.ok", key="k")
+        # a concurrent enqueue inserted the key between our lookup and our insert
+        with mock.patch.object(Job.objects, "select_for_update", return_value=Job.objects.none()):
+            self.assertEqual(jobs.enqueue("tests.ok", key="k").pk, first.pk)
+        Job.objects.filter(pk=first.pk).update(status="running")
+        self.assertEqual(jobs.enqueue("tests.ok", key="k").pk, first.pk)
+        self.assertEqual(Job.objects.filter(key="k").count(), 1)
+        # finished jobs and unkeyed ones do not count
+        Job.objects.filter(pk=first.pk).update(status="done")
+        self.assertNotEqual(jobs.enqueue("tests.ok", key="k").pk, first.pk)
+        self.assertNotEqual(jobs.enqueue("tests.ok").pk, jobs.enqueue("tests.ok").pk)
+
+    def test_worker_logs_errors_outside_handlers(self):
+        jobs.enqueue("tests.ok")
+        with mock.patch.object(jobs, "run_job", side_effect=ConnectionError("gone")):
+            with self.assertLogs("task_app.jobs", "ERROR") as logs:
+                self.assertEqual(jobs.Worker(concurrency=1, poll_interval=0).run(burst=True), 1)
+        self.assertIn("ConnectionError: gone", "\n".join(logs.output))
+
+
+# ?pagination=cursor walks every row exactly once, in order, both ways
+class CursorPaginationTests(TestCase):
+    orderings = {
+        "": [F("created_at").desc(nulls_last=True), F("id").desc()],
+        "due_date": [F("due_date").asc(nulls_last=True), F("id").asc()],
+        "-due_date": [F("due_date").desc(nulls_last=True), F("id").desc()],
+        "-priority,due_date": [F("priority").desc(nulls_last=True), F("due_date").asc(nulls_last=True), F("id").asc()],
+    }
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", password="x")
+        other = User.objects.create_user("other", password="x")
+        priorities = [p for p, _ in Task.PRIORITY_CHOICES]
+        Task.objects.bulk_create(
+            [Task(title=f"task {i}", priority=priorities[i % len(priorities)], created_by=self.owner) for i in range(30)]
+            + [Task(title="not mine", created_by=other)]
+        )
+        # ties on the sort keys and NULL due dates
+        day = timezone.now().replace(microsecond=0)
+        for i, task in enumerate(Task.objects.filter(created_by=self.owner)):
+            due_date = None if i % 4 == 0 else day + timedelta(days=i % 3)
+            Task.objects.filter(pk=task.pk).update(due_date=due_date, created_at=day - timedelta(hours=i % 5))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.owner).access_token}")
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([task["id"] for task in response.json()["results"]])
+            url = response.json()[link]
+        return pages
+
+    def test_traversal_has_no_gaps_or_duplicates(self):
+        for ordering, order_by in self.orderings.items():
+            with self.subTest(ordering=ordering):
+                expected = list(Task.objects.filter(created_by=self.owner).order_by(*order_by).values_list("id", flat=True))
+                pages = self.walk(f"{API}/tasks/?pagination=cursor&page_size=7&ordering={ordering}", "next")
+                self.assertGreater(len(pages), 2)
+                self.assertEqual([pk for page in pages for pk in page], expected)
+                # and back from the last page
+                last = self.client.get(f"{API}/tasks/?pagination=cursor&page_size=7&ordering={ordering}")
+                while last.json()["next"]:
+                    last = self.client.get(last.json()["next"])
+                backwards = self.walk(last.json()["previous"], "previous")
+                self.assertEqual([pk for page in reversed(backwards) for pk in page], expected[:-len(pages[-1])])
+
+    def test_pages_are_tagged_without_counting(self):
+        url = f"{API}/tasks/?pagination=cursor&page_size=5"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse([q for q in queries if "COUNT(" in q["sql"]])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        Task.objects.filter(pk=response.json()["results"][0]["id"]).update(title="changed")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_rows_added_mid_walk_do_not_shift_pages(self):
+        first = self.client.get(f"{API}/tasks/?pagination=cursor&page_size=5").json()
+        Task.objects.create(title="new", description="", created_by=self.owner)
+        rest = self.walk(first["next"], "next")
+        seen = [task["id"] for task in first["results"]] + [pk for page in rest for pk in page]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 30)
+
+    def test_malformed_cursors_are_not_found(self):
+        payloads = [{"o": 5}, {"v": 5}, {"o": 5, "v": [], "id": 1}, {"o": ["-created_at", "-id"], "v": 5, "id": 1},
+                    {"o": ["-created_at", "-id"], "v": [{}], "id": 1}, {"o": ["-created_at", "-id"], "v": [None], "id": []},
+                    [1, 2], "cursor", 5]
+        tokens = [base64.urlsafe_b64encode(json.dumps(payload).encode()).decode() for payload in payloads] + ["%%%", "e30"]
+        for token in tokens:
+            with self.subTest(token=token):
+                response = self.client.get(f"{API}/tasks/", {"pagination": "cursor", "cursor": token})
+                self.assertEqual((response.status_code, response.json()), (404, {"detail": "Invalid cursor"}))
+
+
+# resumable uploads (task_app/uploads.py), with tiny chunks
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="task-uploads-"), TASK_UPLOADS={"MIN_CHUNK_SIZE": 4})
+class ChunkUploadTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+
+    def start(self, content, **extra):
+        response = self.client.post(f"{API}/file-upload/uploads/", {
+            "task_id": self.task.pk, "filename": "notes.txt", "size": len(content), "chunk_size": 4, **extra,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        return f"{API}/file-upload/uploads/{response.json()['id']}/"
+
+    def put(self, path, content, index, body=None, **headers):
+        start = index * 4
+        end = min(start + 4, len(content)) - 1
+        body = content[start:end + 1] if body is None else body
+        return self.client.generic("PUT", path, body, content_type="application/octet-stream",
+                                   HTTP_CONTENT_RANGE=f"bytes {start}-{end}/{len(content)}", **headers)
+
+    def test_bodies_must_match_the_range(self):
+        content = b"0123456789"
+        path = self.start(content)
+        for body in (b"", b"01", b"012345"):
+            response = self.put(path, content, 0, body=body)
+            self.assertEqual(response.status_code, 400, body)
+        self.assertEqual(self.client.get(path).json()["received"], [])
+
+    def test_completing_twice_creates_one_file(self):
+        content = b"0123456789"
+        path = self.start(content)
+        for index in range(3):
+            self.assertEqual(self.put(path, content, index).status_code, 200)
+        stale = UploadSession.objects.get()
+        first = self.client.post(f"{path}complete/")
+        self.assertEqual(first.status_code, 201)
+        # a caller still holding the pending session gets the same attachment
+        self.assertEqual(uploads.complete_upload(stale).pk, first.json()["id"])
+        self.assertEqual(self.task.files.count(), 1)
+
+    def test_session_is_claimed_while_assembling(self):
+        content = b"0123456789"
+        path = self.start(content)
+        for index in range(3):
+            self.put(path, content, index)
+        assemble = uploads.assemble_blob
+
+        def assemble_once_claimed(session, names):
+            # the copy runs after the claim, and a second completion is turned away
+            self.assertEqual(UploadSession.objects.get().status, "assembling")
+            self.assertEqual(self.client.post(f"{path}complete/").status_code, 400)
+            self.assertEqual(self.put(path, content, 0).status_code, 400)
+            return assemble(session, names)
+
+        with mock.patch.object(uploads, "assemble_blob", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.client.post(f"{path}complete/")
+        self.assertEqual(self.client.get(path).json()["status"], "pending")
+        with mock.patch.object(uploads, "assemble_blob", side_effect=assemble_once_claimed):
+            self.assertEqual(self.client.post(f"{path}complete/").status_code, 201)
+        self.assertEqual(self.client.get(path).json()["status"], "complete")
+
+    def test_resumed_upload_assembles_the_file(self):
+        content = b"0123456789"
+        path = self.start(content)
+        for index in (2, 0):
+            self.assertEqual(self.put(path, content, index).status_code, 200)
+        self.assertEqual(self.client.get(path).json()["received"], [0, 2])
+        response = self.client.post(f"{path}complete/")
+        self.assertEqual((response.status_code, response.json()), (400, {"missing_chunks": ["1"]}))
+        # the missing chunk, and a resent one replacing its earlier copy
+        self.assertEqual(self.put(path, content, 1).status_code, 200)
+        self.assertEqual(self.put(path, content, 0).status_code, 200)
+        response = self.client.post(f"{path}complete/")
+        self.assertEqual(response.status_code, 201)
+        with self.task.files.get().file.open("rb") as stored:
+            self.assertEqual(stored.read(), content)
+        self.assertEqual(self.client.get(path).json()["status"], "complete")
+
+    def test_checksums_are_checked(self):
+        content = b"0123456789"
+        path = self.start(content)
+        wrong = hashlib.sha256(b"other").hexdigest()
+        self.assertEqual(self.put(path, content, 0, HTTP_X_CHUNK_SHA256=wrong).status_code, 400)
+        right = hashlib.sha256(content[:4]).hexdigest()
+        self.assertEqual(self.put(path, content, 0, HTTP_X_CHUNK_SHA256=right).json()["sha256"], right)
+        self.assertEqual(self.client.get(path).json()["received"], [0])
+
+        # a whole-file hash announced up front is checked on completion
+        path = self.start(content, sha256=wrong)
+        for index in range(3):
+            self.put(path, content, index)
+        response = self.client.post(f"{path}complete/")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("sha256", response.json())
+        self.assertFalse(self.task.files.exists())
+
+    def test_storages_that_rewind_their_content(self):
+        storage = RewindingStorage()
+        with mock.patch.object(FileAttachment._meta.get_field("file"), "storage", storage):
+            # bytes not stored yet, with and without a whole-file hash up front
+            for content, extra in ((b"0123456789", {}), (b"abcdefghij", {"sha256": hashlib.sha256(b"abcdefghij").hexdigest()})):
+                with self.subTest(**extra):
+                    path = self.start(content, **extra)
+                    for index in range(3):
+                        self.assertEqual(self.put(path, content, index).status_code, 200)
+                    response = self.client.post(f"{path}complete/")
+                    self.assertEqual(response.status_code, 201)
+                    with storage.open(FileAttachment.objects.get(pk=response.json()["id"]).file.name, "rb") as stored:
+                        self.assertEqual(stored.read(), content)
+
+
+# attachments share one stored body per content hash (task_app/blobs.py)
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="task-blobs-"))
+class BlobTests(SeededClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+
+    def upload(self, content, name="notes.txt"):
+        response = self.client.post(f"{API}/file-upload/", {"task_id": self.task.pk, "file": SimpleUploadedFile(name, content)}, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def delete(self, attachment_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f"{API}/file-upload/{attachment_id}/").status_code, 204)
+
+    def test_references_follow_the_attachments(self):
+        first = self.upload(b"shared bytes", "a.txt")
+        second = self.upload(b"shared bytes", "b.txt")
+        other = self.upload(b"other bytes")
+        blob = FileBlob.objects.get(sha256=hashlib.sha256(b"shared bytes").hexdigest())
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(FileBlob.objects.count(), 2)
+        self.assertEqual({f.file.name for f in FileAttachment.objects.filter(pk__in=[first, second])}, {blob.name})
+        storage = FileAttachment._meta.get_field("file").storage
+
+        self.delete(first)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(storage.exists(blob.name))
+
+        # the last reference takes the row and the file with it
+        self.delete(second)
+        self.assertFalse(FileBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(storage.exists(blob.name))
+        self.assertEqual(FileBlob.objects.get().attachments.get().pk, other)
+
+    def test_background_processing_refreshes_the_file_list(self):
+        upload = SimpleUploadedFile("report.bin", b"%PDF-1.4 body", content_type="application/octet-stream")
+        self.client.post(f"{API}/file-upload/", {"task_id": self.task.pk, "file": upload}, format="multipart")
+        path = f"{API}/file-upload/?task_pk={self.task.pk}"
+        etag = self.client.get(path)["ETag"]
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        for claimed in jobs.claim_jobs("worker-1", 10):
+            jobs.run_job(claimed, "worker-1")
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["content_type"], "application/pdf")
+
+
+# protected downloads with Range support (task_app/downloads.py)
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="task-downloads-"), TASK_DOWNLOADS={"BACKEND": "django"})
+class DownloadTests(SeededClientMixin, TestCase):
+    content = b"0123456789abcdef"
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.data.owner_tasks()[0]
+        upload = SimpleUploadedFile("digits.txt", self.content, content_type="text/plain")
+        self.attachment = self.client.post(f"{API}/file-upload/", {"task_id": self.task.pk, "file": upload}, format="multipart").json()
+        self.path = f"{API}/file-upload/{self.attachment['id']}/download/"
+
+    def get(self, **headers):
+        response = self.client.get(self.path, **headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_ranges(self):
+        full, body = self.get()
+        self.assertEqual((full.status_code, body, full["Accept-Ranges"]), (200, self.content, "bytes"))
+        etag = full["ETag"]
+
+        part, body = self.get(HTTP_RANGE="bytes=2-5")
+        self.assertEqual((part.status_code, body, part["Content-Range"]), (206, b"2345", "bytes 2-5/16"))
+        _, body = self.get(HTTP_RANGE="bytes=-3")
+        self.assertEqual(body, b"def")
+        # If-Range: the range only applies to the representation the client has
+        self.assertEqual(self.get(HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE=etag)[1], b"2345")
+        stale, body = self.get(HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"stale"')
+        self.assertEqual((stale.status_code, body), (200, self.content))
+
+        unsatisfiable, _ = self.get(HTTP_RANGE="bytes=16-")
+        self.assertEqual((unsatisfiable.status_code, unsatisfiable["Content-Range"]), (416, "bytes */16"))
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+    def test_responses_only_link_the_download(self):
+        listed = self.client.get(f"{API}/file-upload/", {"task_pk": self.task.pk}).json()
+        for attachment in (self.attachment, *listed):
+            self.assertNotIn("file", attachment)
+            self.assertEqual(attachment["file_url"], f"http://testserver{self.path}")
+
+    def test_only_owner_assignee_and_uploader(self):
+        stranger = User.objects.create_user("stranger", password="x")
+        self.authenticate(stranger)
+        self.assertEqual(self.get()[0].status_code, 403)
+        Task.objects.filter(pk=self.task.pk).update(assigned_to=stranger)
+        self.assertEqual(self.get()[0].status_code, 200)
+
+    @override_settings(TASK_DOWNLOADS={"BACKEND": "x-accel", "X_ACCEL_PREFIX": "/protected-media/"})
+    def test_front_server_handoff(self):
+        response, body = self.get()
+        self.assertEqual(body, b"")
+        self.assertTrue(response["X-Accel-Redirect"].startswith("/protected-media/blobs/"))
@@ -0,0 +1,103 @@
+from django.db import DatabaseError, models, router, transaction
+from django.utils import timezone
+
+
+# field-level change tracking with optimistic concurrency
+# rows loaded from the database remember their column values, and save() then
+# writes only the columns that changed (plus auto_now fields and the version),
+# with WHERE version = <the version that was loaded>. A concurrent write in
+# between raises VersionConflict instead of being silently overwritten, and
+# an instance with no changes is not written at all. New instances and ones
+# built by hand (no loaded values) save as usual.
+
+
+class VersionConflict(DatabaseError):
+
+    def __init__(self, instance):
+        super().__init__(f"{instance._meta.object_name} {instance.pk} was changed by someone else.")
+        self.instance = instance
+
+
+class TrackedModel(models.Model):
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_values()
+        return instance
+
+    def remember_values(self, fields=None):
+        if fields is None or not hasattr(self, "_loaded_values"):
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (fields is None or field.name in fields or field.attname in fields):
+                self._loaded_values[field.attname] = self.__dict__[field.attname]
+
+    # attnames changed since the row was loaded or last saved; deferred
+    # fields count once they are assigned
+    def dirty_fields(self):
+        loaded = getattr(self, "_loaded_values", {})
+        return [
+            field.attname for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__
+            and (field.attname not in loaded or self.__dict__[field.attname] != loaded[field.attname])
+        ]
+
+    # bump the auto_now fields and the version without writing any other
+    # column, for changes stored outside the row (a task's tags). Guarded like
+    # save(): a tags-only edit is the row's only version check
+    def touch(self):
+        now = timezone.now()
+        stamps = {field.attname: now for field in self._meta.concrete_fields if getattr(field, "auto_now", False)}
+        if not type(self)._base_manager.filter(pk=self.pk, version=self.version).update(**stamps, version=self.version + 1):
+            raise VersionConflict(self)
+        for name, value in stamps.items():
+            setattr(self, name, value)
+        self.version += 1
+        self.remember_values([*stamps, "version"])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if hasattr(self, "_loaded_values"):
+            self.remember_values(fields)
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if self._state.adding or not hasattr(self, "_loaded_values") or kwargs.get("force_insert"):
+            super().save(*args, update_fields=update_fields, **kwargs)
+            self.remember_values()
+            return
+        changed = self.dirty_fields() if update_fields is None else list(update_fields)
+        changed = [name for name in changed if name != "version"]
+        if not changed:
+            return
+        auto_now = [field.attname for field in self._meta.concrete_fields if getattr(field, "auto_now", False)]
+        self._expected_version = self.version
+        self.version += 1
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        in_atomic_block = transaction.get_connection(using).in_atomic_block
+        needs_rollback = in_atomic_block and transaction.get_rollback(using=using)
+        try:
+            super().save(*args, update_fields=list(dict.fromkeys(changed + auto_now + ["version"])), **kwargs)
+        except VersionConflict:
+            self.version = self._expected_version
+            # save_base marks an enclosing transaction for rollback on any
+            # error, but an UPDATE that matched no row wrote nothing: put back
+            # whatever the transaction's state was before it
+            if in_atomic_block:
+                transaction.set_rollback(needs_rollback, using=using)
+            raise
+        finally:
+            self._expected_version = None
+        self.remember_values()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, "_expected_version", None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if not super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update):
+            raise VersionConflict(self)
+        return True
@@ -0,0 +1,306 @@
+import hashlib
+import io
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from .blobs import acquire_blob, acquire_or_store_blob, adopt_blob, blob_name, delete_files, release_blob
+from .models import FileAttachment, UploadChunk, UploadSession
+
+
+# chunked, resumable uploads
+# a client starts a session (file name and total size), PUTs the chunks in any
+# order and in parallel with "Content-Range: bytes start-end/total", then
+# completes it. Each chunk is streamed from the request straight into storage
+# while its SHA-256 is computed, so no worker buffers a whole file; a failed
+# chunk is simply sent again. Completing concatenates the chunk files into the
+# attachment, reading them back one block at a time, into a content-addressed
+# blob (task_app/blobs.py). That copy runs with no transaction open: the session
+# is claimed ("assembling") and finished in two short transactions around it.
+
+DEFAULTS = {
+    "CHUNK_SIZE": 8 * 1024 * 1024,
+    "MIN_CHUNK_SIZE": 256 * 1024,
+    "MAX_CHUNK_SIZE": 64 * 1024 * 1024,
+    # FileAttachment.size is a PositiveIntegerField
+    "MAX_FILE_SIZE": 2 ** 31 - 1,
+    "SESSION_TTL_HOURS": 24,
+    # an "assembling" session whose worker died can be completed again after this
+    "ASSEMBLY_TIMEOUT_MINUTES": 30,
+}
+BLOCK_SIZE = 64 * 1024
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "TASK_UPLOADS", {})}
+
+
+def get_storage():
+    return FileAttachment._meta.get_field("file").storage
+
+
+def chunk_count(session):
+    return max(1, -(-session.size // session.chunk_size))
+
+
+def expected_chunk_size(session, index):
+    if index == chunk_count(session) - 1:
+        return session.size - index * session.chunk_size
+    return session.chunk_size
+
+
+# read-only file object over a request stream (or any file) that stops after
+# `length` bytes and hashes what passes through. Not seekable: storages that
+# rewind their content first (django-storages' S3 backend) check seekable()
+class HashingReader(io.RawIOBase):
+
+    def __init__(self, stream, length=None):
+        self.stream = stream
+        self.remaining = length
+        self.bytes_read = 0
+        self.hash = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = len(buffer)
+        if self.remaining is not None:
+            size = min(size, self.remaining)
+        if size <= 0:
+            return 0
+        data = self.stream.read(size)
+        buffer[:len(data)] = data
+        self.hash.update(data)
+        self.bytes_read += len(data)
+        if self.remaining is not None:
+            self.remaining -= len(data)
+        return len(data)
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+# the chunk files of a session, in order, as one readable stream
+class ChunkReader(io.RawIOBase):
+
+    def __init__(self, storage, names):
+        self.storage = storage
+        self.names = list(names)
+        self.current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self.current is None:
+                if not self.names:
+                    return 0
+                self.current = self.storage.open(self.names.pop(0), "rb")
+            data = self.current.read(len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+        super().close()
+
+
+def start_upload(task, user, filename, size, content_type="", chunk_size=None, sha256=""):
+    config = get_config()
+    if not filename:
+        raise ValidationError({"filename": "filename is required"})
+    sha256 = (sha256 or "").lower()
+    if sha256 and not SHA256.match(sha256):
+        raise ValidationError({"sha256": "sha256 must be 64 hex digits"})
+    try:
+        size = int(size)
+        chunk_size = int(chunk_size or config["CHUNK_SIZE"])
+    except (TypeError, ValueError):
+        raise ValidationError({"size": "size and chunk_size must be integers"})
+    if not 0 < size <= config["MAX_FILE_SIZE"]:
+        raise ValidationError({"size": f"size must be between 1 and {config['MAX_FILE_SIZE']} bytes"})
+    chunk_size = max(config["MIN_CHUNK_SIZE"], min(chunk_size, config["MAX_CHUNK_SIZE"]))
+    session = UploadSession.objects.create(
+        task=task,
+        uploaded_by=user,
+        filename=filename[:255],
+        content_type=(content_type or "")[:100],
+        size=size,
+        chunk_size=chunk_size,
+        sha256=sha256,
+        expires_at=timezone.now() + timedelta(hours=config["SESSION_TTL_HOURS"]),
+    )
+    # skip the transfer for bytes this user has uploaded before; other users'
+    # files are not matched by hash alone, so a hash never grants access to them
+    if sha256 and FileAttachment.objects.filter(blob__sha256=sha256, blob__size=size, uploaded_by=user).exists():
+        blob = acquire_blob(sha256)
+        if blob is not None:
+            finish_upload(session, blob)
+    return session
+
+
+def get_session(upload_id, user):
+    session = UploadSession.objects.filter(pk=upload_id, uploaded_by=user).first()
+    if session is None or (session.status == "pending" and session.expires_at < timezone.now()):
+        raise NotFound("Upload session not found or expired.")
+    return session
+
+
+# chunk index for a Content-Range header; chunks must start on a chunk boundary
+def parse_content_range(session, header):
+    match = CONTENT_RANGE.match(header or "")
+    if not match:
+        raise ValidationError({"Content-Range": "Use 'bytes start-end/total'."})
+    start, end, total = (int(g) for g in match.groups())
+    index = start // session.chunk_size
+    if (total != session.size or start % session.chunk_size or index >= chunk_count(session)
+            or end - start + 1 != expected_chunk_size(session, index)):
+        raise ValidationError({"Content-Range": "Range does not match a chunk of this upload."})
+    return index
+
+
+# `length` is the request's Content-Length, when it sent one
+def store_chunk(session, index, stream, sha256=None, length=None):
+    if session.status != "pending":
+        raise ValidationError({"detail": f"Upload is already {session.status}."})
+    storage = get_storage()
+    expected = expected_chunk_size(session, index)
+    # an empty body has no stream at all
+    if stream is None or (length is not None and length != expected):
+        raise ValidationError({"Content-Length": f"Chunk {index} must be {expected} bytes."})
+    reader = HashingReader(stream, expected)
+    name = storage.save(f"uploads/{session.pk}/{index:06d}", File(reader, name=f"{index:06d}"))
+    if reader.bytes_read != expected or (sha256 and sha256.lower() != reader.hexdigest()):
+        storage.delete(name)
+        raise ValidationError({"detail": "Chunk is incomplete or its checksum does not match."})
+
+    # a resent chunk replaces the previous copy
+    previous = UploadChunk.objects.filter(session=session, index=index).values_list("name", flat=True).first()
+    chunk, _ = UploadChunk.objects.update_or_create(
+        session=session, index=index,
+        defaults={"size": reader.bytes_read, "sha256": reader.hexdigest(), "name": name},
+    )
+    if previous and previous != name:
+        storage.delete(previous)
+    return chunk
+
+
+def received_chunks(session):
+    return list(session.chunks.order_by("index").values_list("index", flat=True))
+
+
+# concurrent calls for one session queue on its row lock while it is claimed;
+# the later ones find it assembling or complete. The chunk files are read and
+# the blob written outside any transaction, so the database write lock is not
+# held for the length of the copy
+def complete_upload(session):
+    config = get_config()
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().filter(pk=session.pk).first()
+        if session is None:
+            raise NotFound("Upload session not found or expired.")
+        if session.status == "complete" and session.attachment_id:
+            return session.attachment
+        if session.status == "assembling" and session.expires_at > timezone.now():
+            raise ValidationError({"detail": "Upload is already being completed."})
+        chunks = list(session.chunks.order_by("index").values_list("index", "name"))
+        missing = sorted(set(range(chunk_count(session))) - {index for index, _ in chunks})
+        if missing:
+            raise ValidationError({"missing_chunks": missing[:100]})
+        session.status = "assembling"
+        session.expires_at = timezone.now() + timedelta(minutes=config["ASSEMBLY_TIMEOUT_MINUTES"])
+        session.save(update_fields=["status", "expires_at"])
+
+    names = [name for _, name in chunks]
+    try:
+        attachment = finish_upload(session, assemble_blob(session, names))
+    except BaseException:
+        # hand the session back so the client can fix the chunks or try again
+        UploadSession.objects.filter(pk=session.pk, status="assembling").update(
+            status="pending", expires_at=timezone.now() + timedelta(hours=config["SESSION_TTL_HOURS"]),
+        )
+        raise
+    transaction.on_commit(lambda: delete_files(names))
+    return attachment
+
+
+# concatenate the chunk files into a referenced blob
+def assemble_blob(session, names):
+    storage = get_storage()
+    reader = HashingReader(ChunkReader(storage, names))
+    try:
+        if session.sha256:
+            # announced hash: write under it while hashing, keep it only if it matches
+            name = storage.save(blob_name(session.sha256), File(reader, name=session.filename))
+            if reader.hexdigest() != session.sha256:
+                storage.delete(name)
+                raise ValidationError({"sha256": "Uploaded bytes do not match sha256."})
+            return adopt_blob(session.sha256, session.size, name)
+        # hash first, so bytes we already have are never written again
+        while reader.read(BLOCK_SIZE):
+            pass
+        content = ChunkReader(storage, names)
+        try:
+            return acquire_or_store_blob(reader.hexdigest(), session.size, File(content, name=session.filename))
+        finally:
+            content.close()
+    finally:
+        reader.stream.close()
+
+
+# attach a referenced blob to the session's task and close the session
+def finish_upload(session, blob):
+    try:
+        with transaction.atomic():
+            attachment = FileAttachment.objects.create(
+                task=session.task,
+                uploaded_by=session.uploaded_by,
+                file=blob.name,
+                blob=blob,
+                filename=session.filename,
+                content_type=session.content_type,
+                size=session.size,
+            )
+            session.status = "complete"
+            session.attachment = attachment
+            session.save(update_fields=["status", "attachment"])
+            session.chunks.all().delete()
+    except Exception:
+        release_blob(blob.pk)
+        raise
+    return attachment
+
+
+def abort_upload(session):
+    if session.status == "assembling" and session.expires_at > timezone.now():
+        raise ValidationError({"detail": "Upload is being completed."})
+    storage = get_storage()
+    names = list(session.chunks.values_list("name", flat=True))
+    session.delete()
+    for name in names:
+        storage.delete(name)
+
+
+# drop expired sessions and their chunk files
+def prune_uploads(now=None):
+    now = now or timezone.now()
+    expired = UploadSession.objects.filter(status__in=("pending", "assembling"), expires_at__lt=now)
+    count = 0
+    for session in expired.iterator():
+        abort_upload(session)
+        count += 1
+    return count
@@ -0,0 +1,117 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from task_management.instrumentation import measure_serialization
+
+from ..async_api import async_api_view, json_response
+from ..fast_serializers import TaskRows
+from ..models import Comment, FileAttachment, Task
+from ..serializers import CommentSerializer, FileAttachmentSerializer, TaskSerializer
+from .TaskViewSet import StandardResultsSetPagination, TaskViewSet
+
+
+# async (ASGI) variants of the hot read endpoints
+# same filters, search, ordering and page-number pagination as TaskViewSet,
+# with the page queries going through the async ORM. Cursor pagination and
+# ?fields= / ?expand= are only served by the DRF endpoints; asking for them
+# here is a 400 rather than a silently different response.
+
+UNSUPPORTED_PARAMS = {
+    "fields": "?fields= is only supported by /api/tasks-routes/.",
+    "expand": "?expand= is only supported by /api/tasks-routes/.",
+}
+
+
+def check_params(request):
+    errors = {name: message for name, message in UNSUPPORTED_PARAMS.items() if name in request.GET}
+    if request.GET.get("pagination", "").lower() == "cursor":
+        errors["pagination"] = "Cursor pagination is only supported by /api/tasks-routes/."
+    if errors:
+        raise ValidationError(errors)
+
+
+def task_queryset(request):
+    qs = Task.objects.select_related("assigned_to", "created_by").prefetch_related("tags")
+    include_deleted = request.GET.get("include_deleted", "false").lower()
+    if include_deleted in ("true", "1", "yes"):
+        qs = qs.filter(is_deleted=True)
+    return qs.filter(created_by=request.user)
+
+
+# TaskViewSet's own filter backends; sync because the filterset validates
+# ?assigned_to= / ?created_by= against the database
+@sync_to_async
+def filter_tasks(request, qs):
+    view = TaskViewSet(request=Request(request), action="list", format_kwarg=None)
+    return view.filter_queryset(qs)
+
+
+async def paginate(request, qs):
+    paginator = StandardResultsSetPagination()
+    page_size = paginator.get_page_size(Request(request))
+    try:
+        page = int(request.GET.get(paginator.page_query_param, 1))
+    except ValueError:
+        raise NotFound(paginator.invalid_page_message)
+
+    count = await qs.acount()
+    last_page = max(1, -(-count // page_size))
+    if page < 1 or page > last_page:
+        raise NotFound(paginator.invalid_page_message)
+    start = (page - 1) * page_size
+    rows = [task async for task in qs[start:start + page_size]]
+
+    url = request.build_absolute_uri()
+    param = paginator.page_query_param
+    previous = None
+    if page > 1:
+        previous = remove_query_param(url, param) if page == 2 else replace_query_param(url, param, page - 1)
+    return {
+        "count": count,
+        "next": replace_query_param(url, param, page + 1) if page < last_page else None,
+        "previous": previous,
+        "results": rows,
+    }
+
+
+@async_api_view
+async def task_list(request):
+    check_params(request)
+    task_rows = TaskRows()
+    page = await paginate(request, task_rows.values(await filter_tasks(request, task_queryset(request))))
+    rows = page["results"]
+    tags = await task_rows.atags(rows)
+    with measure_serialization(request):
+        page["results"] = task_rows.serialize(rows, tags)
+    return json_response(page)
+
+
+@async_api_view
+async def task_detail(request, pk):
+    check_params(request)
+    task = await aget_object_or_404(task_queryset(request), pk=pk)
+    return json_response(TaskSerializer(task).data)
+
+
+@async_api_view
+async def comment_list(request):
+    check_params(request)
+    task_id = request.GET.get("task_pk")
+    if not task_id:
+        raise ValidationError({"task_pk": "task_pk is required"})
+    qs = Comment.objects.select_related("author").filter(is_deleted=False, task_id=task_id).order_by("-created_at")
+    comments = [comment async for comment in qs]
+    return json_response(CommentSerializer(comments, many=True).data)
+
+
+@async_api_view
+async def file_list(request):
+    check_params(request)
+    qs = FileAttachment.objects.select_related("uploaded_by", "blob")
+    task_id = request.GET.get("task_pk")
+    if task_id:
+        qs = qs.filter(task_id=task_id)
+    files = [f async for f in qs.order_by("-uploaded_at")]
+    return json_response(FileAttachmentSerializer(files, many=True, context={"request": request}).data)
@@ -0,0 +1,37 @@
+from django.core.files.storage import default_storage
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from ..downloads import PassthroughRenderer, serve_file
+from ..models import Job
+from ..serializers import JobSerializer
+
+# background job view
+
+# status of the caller's background jobs (exports, stats rebuilds)
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = []
+
+    def get_queryset(self):
+        return Job.objects.filter(created_by=self.request.user).order_by("-created_at")
+
+    # the artifact of a finished export job
+    @action(detail=True, methods=["get"], url_path="download",
+            renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [PassthroughRenderer])
+    def download(self, request, pk=None):
+        job = get_object_or_404(self.get_queryset(), pk=pk)
+        result = job.result if isinstance(job.result, dict) else {}
+        if job.status != "done" or not result.get("file"):
+            return Response({"detail": "This job has no file to download."}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(
+            request, default_storage, result["file"],
+            filename=result.get("filename") or result["file"].rsplit("/", 1)[-1],
+            content_type=result.get("content_type"),
+            etag=f'"{job.pk}"',
+            last_modified=job.finished_at,
+        )
@@ -4,11 +4,12 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from ..models import Tag
 from ..serializers import TagSerializer
 from rest_framework.pagination import PageNumberPagination
+from ..conditional import ConditionalGetMixin
 
 # tag view
 
 # tag view set
-class TagViewSet(viewsets.ModelViewSet): 
+class TagViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all().order_by("name")
     serializer_class = TagSerializer
     permission_classes = [IsAuthenticated]
@@ -3,7 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from ..models import Task, Comment, FileAttachment, Tag
 from ..serializers import (
     TaskSerializer,
@@ -11,13 +11,35 @@ from ..serializers import (
     FileAttachmentSerializer,
     TagSerializer,
     BulkTaskCreateSerializer,
+    BulkTaskSelectionSerializer,
+    BulkTaskUpdateSerializer,
+    TaskEventSerializer,
+    UploadSessionSerializer,
 )
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
 from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth.models import User
+from ..pagination import KeysetPagination
+from ..filters import TaskSearchFilter
+from ..search import deferred_indexing
+from ..tags import clean_tag_names, set_task_tags
+from ..response_cache import CachedResponseMixin
+from ..conditional import ConditionalGetMixin, VersionCheckMixin
+from ..fast_serializers import FastTaskListMixin
+from ..fieldsets import SparseFieldsetMixin
+from task_management.replicas import ReplicaReadMixin
+from ..events import EventStreamRenderer, get_config as get_events_config, latest_cursor, stream_events, wait_for_events
+from ..sync import changed_tasks, decode_token, get_config as get_sync_config
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from .. import uploads
+from ..downloads import PassthroughRenderer, can_download, download_response, thumbnail_response
+from ..bulk import soft_delete_tasks, update_tasks
+from ..blobs import HashingUploadHandler, acquire_or_store_blob, hash_file, release_blob
 
 
 
@@ -29,22 +51,64 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ReplicaReadMixin, CachedResponseMixin, ConditionalGetMixin, VersionCheckMixin, FastTaskListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter, OrderingFilter]
     filterset_fields = ["status", "priority", "assigned_to", "created_by"]
+    # only used when the database has no full-text backend (see task_app/search.py)
     search_fields = ["title", "description", "tags__name"]
     ordering_fields = ["due_date", "created_at", "priority"]
     pagination_class = StandardResultsSetPagination
+    cursor_pagination_class = KeysetPagination
+    max_bulk_batch_size = 5000
+    # ids one bulk-update / bulk-delete call may touch
+    max_bulk_edit_size = 10000
+    # a lagging replica could hide rows behind an issued sync token
+    primary_actions = ("changes",)
+    # columns read per response field, for ?fields= / ?expand= (task_app/fieldsets.py)
+    sparse_columns = {
+        "title": ("title",),
+        "description": ("description",),
+        "status": ("status",),
+        "priority": ("priority",),
+        "due_date": ("due_date",),
+        "assigned_to": {True: ("assigned_to", "assigned_to__username", "assigned_to__email"), False: ("assigned_to",)},
+        "created_by": {True: ("created_by", "created_by__username", "created_by__email"), False: ("created_by", "created_by__username")},
+        "created_at": ("created_at",),
+        "updated_at": ("updated_at",),
+        "version": ("version",),
+    }
     
     
+    # ?pagination=cursor opts into keyset pagination (no COUNT, no OFFSET)
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            request = getattr(self, "request", None)
+            mode = request.query_params.get("pagination", "") if request is not None else ""
+            if mode.lower() == "cursor":
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     # getting data to front end 
     def get_queryset(self):
-        # Base queryset with related fields
-        qs = Task.objects.select_related("assigned_to", "created_by").prefetch_related("tags")
-        print(qs)
+        # Base queryset with the relations the requested fields use
+        qs = Task.objects.all()
+        if self.expands_field("assigned_to"):
+            qs = qs.select_related("assigned_to")
+        if self.wants_field("created_by"):
+            qs = qs.select_related("created_by")
+        if self.wants_field("tags"):
+            qs = qs.prefetch_related("tags" if self.expands_field("tags") else Prefetch("tags", queryset=Tag.objects.only("id")))
+        if self.action in ("list", "retrieve"):
+            # keyset cursors read the sort columns off the last row
+            qs = qs.only(*self.get_only_fields(self.sparse_columns), *self.ordering_fields)
         # Filter deleted tasks unless admin explicitly requests
         include_deleted = self.request.query_params.get("include_deleted", "false").lower()
         if include_deleted  in ("true", "1", "yes") :
@@ -58,7 +122,6 @@ class TaskViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], url_path='assign-user/(?P<user_id>[^/.]+)')
     def assign_user(self, request, pk=None, user_id=None):
         task = self.get_object()
-        print("user id",user_id,pk)
         try:
             user = User.objects.get(pk=user_id)
         except User.DoesNotExist:
@@ -106,17 +169,138 @@ class TaskViewSet(viewsets.ModelViewSet):
     # bulk create endpoint
     @action(detail=False, methods=["post"], url_path="bulk-create")
     def bulk_create(self, request):
-        serializer = BulkTaskCreateSerializer(data=request.data, context={"request": request})
+        context = {"request": request}
+        batch_size = request.query_params.get("batch_size")
+        if batch_size:
+            try:
+                context["batch_size"] = max(1, min(int(batch_size), self.max_bulk_batch_size))
+            except ValueError:
+                raise ValidationError({"batch_size": "batch_size must be an integer"})
+        serializer = BulkTaskCreateSerializer(data=request.data, context=context)
         serializer.is_valid(raise_exception=True)
         instances = serializer.save()
         out = TaskSerializer(instances, many=True, context={"request": request})
         return Response(out.data, status=status.HTTP_201_CREATED)
     
+    # {"ids": [...]} or {"filter": {"status": "todo", ...}} plus
+    # {"changes": {"status": ..., "priority": ..., "due_date": ..., "assigned_to": ...}}
+    @action(detail=False, methods=["post"], url_path="bulk-update")
+    def bulk_update(self, request):
+        serializer = BulkTaskUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = self.get_bulk_ids(serializer.validated_data)
+        results = update_tasks(request.user, ids, serializer.validated_data["changes"])
+        return self.bulk_response("updated", results)
+
+    # soft-deletes the selected tasks: {"ids": [...]} or {"filter": {...}}
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        serializer = BulkTaskSelectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = soft_delete_tasks(request.user, self.get_bulk_ids(serializer.validated_data))
+        return self.bulk_response("deleted", results)
+
+    # the caller's live tasks picked by id or by the list's filterset fields
+    def get_bulk_ids(self, selection):
+        limit = self.max_bulk_edit_size
+        if "ids" in selection:
+            ids = list(dict.fromkeys(selection["ids"]))
+            if len(ids) > limit:
+                raise ValidationError({"ids": f"At most {limit} ids per call."})
+            return ids
+        unknown = [name for name in selection["filter"] if name not in self.filterset_fields]
+        if unknown:
+            raise ValidationError({"filter": f"Unknown filter fields: {', '.join(unknown)}. Allowed: {', '.join(self.filterset_fields)}"})
+        queryset = Task.objects.filter(created_by=self.request.user, is_deleted=False)
+        filterset_class = DjangoFilterBackend().get_filterset_class(self, queryset)
+        filterset = filterset_class(data=selection["filter"], queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise ValidationError({"filter": filterset.errors})
+        ids = list(filterset.qs.order_by("id").values_list("id", flat=True)[:limit + 1])
+        if len(ids) > limit:
+            raise ValidationError({"filter": f"The filter matches more than {limit} tasks."})
+        return ids
+
+    def bulk_response(self, applied, results):
+        return Response({
+            applied: sum(1 for result in results.values() if result == applied),
+            "results": [{"id": task_id, "result": result} for task_id, result in results.items()],
+        })
+
+    # change feed: events after ?cursor= (or Last-Event-ID), long-polled for up
+    # to ?wait= seconds. Accept: text/event-stream (or ?format=sse) streams them
+    # as server-sent events instead. Without a cursor the current one is returned.
+    @action(detail=False, methods=["get"], url_path="events",
+            renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer])
+    def events(self, request):
+        config = get_events_config()
+        cursor = request.query_params.get("cursor") or request.META.get("HTTP_LAST_EVENT_ID")
+        try:
+            cursor = int(cursor) if cursor not in (None, "") else None
+            wait = float(request.query_params.get("wait", config["MAX_WAIT"]))
+            limit = int(request.query_params.get("limit", config["PAGE_SIZE"]))
+        except ValueError:
+            raise ValidationError({"detail": "cursor and limit must be integers, wait a number of seconds"})
+        wait = max(0.0, min(wait, config["MAX_WAIT"]))
+        limit = max(1, min(limit, 500))
+        if cursor is None:
+            cursor = latest_cursor(request.user.id)
+            if request.accepted_renderer.format != "sse":
+                return Response({"events": [], "cursor": cursor})
+
+        if request.accepted_renderer.format == "sse":
+            serialize = lambda event: TaskEventSerializer(event).data
+            response = StreamingHttpResponse(
+                stream_events(request.user.id, cursor, serialize, limit), content_type="text/event-stream"
+            )
+            response["Cache-Control"] = "no-cache"
+            response["X-Accel-Buffering"] = "no"
+            return response
+
+        events = wait_for_events(request.user.id, cursor, wait, limit)
+        return Response({
+            "events": TaskEventSerializer(events, many=True).data,
+            "cursor": events[-1].id if events else cursor,
+        })
+
+    # delta sync: tasks created, modified or soft-deleted after the ?since= token,
+    # plus the token for the next call. No token means a full (paged) sync.
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        config = get_sync_config()
+        since = decode_token(request.query_params.get("since"))
+        try:
+            limit = int(request.query_params.get("limit", config["PAGE_SIZE"]))
+        except ValueError:
+            raise ValidationError({"limit": "limit must be an integer"})
+        limit = max(1, min(limit, config["MAX_PAGE_SIZE"]))
+
+        queryset = Task.objects.select_related("assigned_to", "created_by").filter(created_by=request.user)
+        rows, token, has_more = changed_tasks(queryset, since, limit)
+        changed = [task for task in rows if not task.is_deleted]
+        prefetch_related_objects(changed, "tags")
+        return Response({
+            "changed": self.get_serializer(changed, many=True).data,
+            "deleted": [{"id": task.id, "deleted_at": task.deleted_at} for task in rows if task.is_deleted],
+            "since": token,
+            "has_more": has_more,
+        })
+
     # perform create and update
     def partial_update(self, request, *args, **kwargs):
         instance = self.get_object()
         data = request.data
 
+        # Validate tags before anything is written
+        tags_data = data.get('tags')
+        if tags_data is not None:
+            if not isinstance(tags_data, list):
+                return Response({"tags": "tags must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+            tags_mode = str(data.get('tags_mode', 'add')).lower()
+            if tags_mode not in ('add', 'replace'):
+                return Response({"tags_mode": "tags_mode must be 'add' or 'replace'"}, status=status.HTTP_400_BAD_REQUEST)
+            tags_data = clean_tag_names(tags_data)
+
         # Update normal fields
         for field in ['title', 'description', 'status', 'priority', 'due_date', 'assigned_to']:
             if field in data:
@@ -130,17 +314,12 @@ class TaskViewSet(viewsets.ModelViewSet):
                     setattr(instance, field, data[field])
                 else:
                     setattr(instance, field, data[field])
-        instance.save()
 
-        # Handle tags manually
-        tags_data = data.get('tags')
-        if tags_data is not None:
-            for tag in tags_data:
-                # If tag is string
-                tag_name = tag.get('name') if isinstance(tag, dict) else str(tag)
-                if tag_name:
-                    tag_obj, _ = Tag.objects.get_or_create(name=tag_name)
-                    instance.tags.add(tag_obj)  # add() will avoid duplicates
+        # Fields and tags (added by default, "tags_mode": "replace" swaps the whole set) land together
+        with transaction.atomic(), deferred_indexing():
+            instance.save()
+            if tags_data is not None:
+                set_task_tags(instance, tags_data, replace=tags_mode == 'replace')
 
         # Prepare response manually
         response_data = {
@@ -153,6 +332,7 @@ class TaskViewSet(viewsets.ModelViewSet):
             "assigned_to": instance.assigned_to.id if instance.assigned_to else None,
             "created_by": instance.created_by.username,
             "tags": [{"id": t.id, "name": t.name} for t in instance.tags.all()],
+            "version": instance.version,
         }
         return Response(response_data, status=status.HTTP_200_OK)
     
@@ -161,26 +341,24 @@ class TaskViewSet(viewsets.ModelViewSet):
         data = request.data
         user = request.user
 
-        # Extract tags from payload
-        tags_data = data.pop('tags', [])
-
-        # Create task
-        task = Task.objects.create(
-            title=data.get('title'),
-            description=data.get('description'),
-            status=data.get('status', 'todo'),
-            priority=data.get('priority', 'medium'),
-            due_date=data.get('due_date'),
-            assigned_to=User.objects.get(pk=data['assigned_to']) if data.get('assigned_to') else None,
-            created_by=user
-        )
-
-        # Handle tags: create if not exists, then add to task
-        for tag in tags_data:
-            tag_name = tag.get('name') if isinstance(tag, dict) else str(tag)
-            if tag_name:
-                tag_obj, _ = Tag.objects.get_or_create(name=tag_name)
-                task.tags.add(tag_obj)
+        # Extract and validate tags from payload
+        tags_data = clean_tag_names(data.pop('tags', None) or [])
+
+        # Create task and its tags together, with one search index write
+        with transaction.atomic(), deferred_indexing():
+            task = Task.objects.create(
+                title=data.get('title'),
+                description=data.get('description'),
+                status=data.get('status', 'todo'),
+                priority=data.get('priority', 'medium'),
+                due_date=data.get('due_date'),
+                assigned_to=User.objects.get(pk=data['assigned_to']) if data.get('assigned_to') else None,
+                created_by=user
+            )
+
+            # Handle tags: create if not exists, then add to task
+            if tags_data:
+                set_task_tags(task, tags_data, touch=False)
 
         serializer = self.get_serializer(task)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -188,19 +366,29 @@ class TaskViewSet(viewsets.ModelViewSet):
 
 
 # comment view set 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, ConditionalGetMixin, VersionCheckMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = None
+    sparse_columns = {
+        "author": {True: ("author", "author__username", "author__email"), False: ("author", "author__username")},
+        "content": ("content",),
+        "created_at": ("created_at",),
+        "updated_at": ("updated_at",),
+        "version": ("version",),
+    }
     
     
     def get_queryset(self):
-        qs = Comment.objects.select_related("author").filter(is_deleted=False)
+        qs = Comment.objects.filter(is_deleted=False)
+        if self.wants_field("author"):
+            qs = qs.select_related("author")
+        if self.action in ("list", "retrieve"):
+            qs = qs.only(*self.get_only_fields(self.sparse_columns))
 
         # Only check task_pk for list() API call
         if self.action == "list":
             task_id = self.request.query_params.get("task_pk")
-            print("task id in comment", task_id)
             if not task_id:
                 raise ValidationError({"task_pk": "task_pk is required"})
             qs = qs.filter(task_id=task_id)
@@ -212,13 +400,11 @@ class CommentViewSet(viewsets.ModelViewSet):
         if not task_id:
             raise ValidationError({"task_id": "task_id is required"})
         task = get_object_or_404(Task, pk=task_id, is_deleted=False)
-        print("task",task.title)
         comment = Comment.objects.create(
             task=task,
             author=request.user,
             content=request.data.get("content", ""),
         )
-        print("comment",comment.content,comment.author)
         serializer = self.get_serializer(comment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
         
@@ -232,29 +418,51 @@ class CommentViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
     
     def partial_update(self, request, *args, **kwargs):
-        print("partial update called",request.data) 
         return super().partial_update(request, *args, **kwargs)
 
 
 
 
 # file upload view
-class FileUploadViewSet(viewsets.ModelViewSet):
+class FileUploadViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = FileAttachmentSerializer
     parser_classes = (MultiPartParser, FormParser)
+    # chunk status is read right after the chunk writes
+    primary_actions = ("upload",)
     permission_classes = [IsAuthenticated]
     pagination_class = None
+    sparse_columns = {
+        "filename": ("filename",),
+        "file_url": ("file",),
+        "thumbnail_url": ("blob", "blob__thumbnail"),
+        "content_type": ("content_type",),
+        "size": ("size",),
+        "uploaded_at": ("uploaded_at",),
+        "uploaded_by": {True: ("uploaded_by", "uploaded_by__username", "uploaded_by__email"), False: ("uploaded_by",)},
+    }
 
     # fetching files
     def get_queryset(self):
         task_id = self.request.query_params.get("task_pk")
-        qs = FileAttachment.objects.select_related("uploaded_by")
+        qs = FileAttachment.objects.all()
+        if self.expands_field("uploaded_by"):
+            qs = qs.select_related("uploaded_by")
+        if self.wants_field("thumbnail_url"):
+            qs = qs.select_related("blob")
+        if self.action in ("list", "retrieve"):
+            qs = qs.only(*self.get_only_fields(self.sparse_columns))
         if task_id:
             qs = qs.filter(task_id=task_id)
         return qs.order_by("-uploaded_at")
 
 
+    # hash multipart files while they are parsed (task_app/blobs.py)
+    def create(self, request, *args, **kwargs):
+        self.upload_hasher = HashingUploadHandler.install(request)
+        return super().create(request, *args, **kwargs)
+
     # updload files
+    # the body goes to a shared content-addressed blob; bytes we already have are not stored again
     def perform_create(self, serializer):
         task_id = self.request.data.get("task_id")
         if not task_id:
@@ -263,19 +471,94 @@ class FileUploadViewSet(viewsets.ModelViewSet):
         file_obj = serializer.validated_data.get("file")
         if not file_obj:
             raise ValidationError({"file": "No file provided."})
-        serializer.save(
-            uploaded_by=self.request.user,
-            task=task,
-            filename=file_obj.name,
-            content_type=file_obj.content_type,
-            size=file_obj.size,
+        sha256 = self.upload_hasher.hashes.get("file")
+        if sha256 is None:
+            sha256, _ = hash_file(file_obj)
+            file_obj.seek(0)
+        blob = acquire_or_store_blob(sha256, file_obj.size, file_obj)
+        try:
+            serializer.save(
+                uploaded_by=self.request.user,
+                task=task,
+                file=blob.name,
+                blob=blob,
+                filename=file_obj.name,
+                content_type=file_obj.content_type,
+                size=file_obj.size,
+            )
+        except Exception:
+            release_blob(blob.pk)
+            raise
+
+
+    # resumable uploads (task_app/uploads.py):
+    # POST uploads/ {task_id, filename, size[, content_type, chunk_size, sha256]} starts a session
+    # (already complete when the announced sha256 is a stored blob),
+    # PUT uploads/<id>/ with Content-Range (and optional X-Chunk-SHA256) stores one chunk,
+    # GET uploads/<id>/ lists the received chunks, POST uploads/<id>/complete/ creates the file
+    @action(detail=False, methods=["post"], url_path="uploads", parser_classes=[JSONParser, FormParser, MultiPartParser])
+    def start_upload(self, request):
+        task_id = request.data.get("task_id")
+        if not task_id:
+            raise ValidationError({"task_id": "task_id is required"})
+        task = get_object_or_404(Task, pk=task_id, is_deleted=False)
+        session = uploads.start_upload(
+            task, request.user,
+            filename=request.data.get("filename"),
+            size=request.data.get("size"),
+            content_type=request.data.get("content_type", ""),
+            chunk_size=request.data.get("chunk_size"),
+            sha256=request.data.get("sha256", ""),
         )
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"], url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})")
+    def upload(self, request, upload_id=None):
+        session = uploads.get_session(upload_id, request.user)
+        return Response(UploadSessionSerializer(session).data)
+
+    # the body is read straight from the request stream, never through a parser
+    @upload.mapping.put
+    def put_chunk(self, request, upload_id=None):
+        session = uploads.get_session(upload_id, request.user)
+        index = uploads.parse_content_range(session, request.META.get("HTTP_CONTENT_RANGE"))
+        try:
+            length = int(request.META["CONTENT_LENGTH"]) if request.META.get("CONTENT_LENGTH") else None
+        except ValueError:
+            raise ValidationError({"Content-Length": "Content-Length must be an integer."})
+        chunk = uploads.store_chunk(session, index, request.stream, request.META.get("HTTP_X_CHUNK_SHA256"), length)
+        return Response({"index": chunk.index, "size": chunk.size, "sha256": chunk.sha256})
+
+    @upload.mapping.delete
+    def abort_upload(self, request, upload_id=None):
+        uploads.abort_upload(uploads.get_session(upload_id, request.user))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"], url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})/complete")
+    def complete_upload(self, request, upload_id=None):
+        attachment = uploads.complete_upload(uploads.get_session(upload_id, request.user))
+        serializer = self.get_serializer(attachment)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    # protected download for the task owner, assignee or uploader; the bytes are
+    # handed to the front server, sendfile() or a presigned URL (task_app/downloads.py)
+    @action(detail=True, methods=["get"], url_path="download",
+            renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [PassthroughRenderer])
+    # ?variant=thumbnail serves the image preview instead
+    def download(self, request, pk=None):
+        attachment = get_object_or_404(FileAttachment.objects.select_related("task", "blob"), pk=pk)
+        if not can_download(request.user, attachment):
+            return Response({"detail": "You do not have permission to download this file."}, status=status.HTTP_403_FORBIDDEN)
+        if request.query_params.get("variant") == "thumbnail":
+            return thumbnail_response(request, attachment)
+        return download_response(request, attachment)
 
     # destroy files
+    # shared blobs are released by the post_delete signal, only unshared files are deleted here
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.file.delete(save=False)
+        if instance.blob_id is None:
+            instance.file.delete(save=False)
         instance.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
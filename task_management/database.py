@@ -0,0 +1,130 @@
+import os
+
+
+# environment-driven DATABASES
+# DB_ENGINE=sqlite (default) keeps the single-file setup with WAL and tuned
+# pragmas; DB_ENGINE=postgres reads DB_NAME / DB_USER / DB_PASSWORD / DB_HOST /
+# DB_PORT and keeps connections open between requests. Connection setup is
+# paid once per worker thread (or pool slot) instead of once per request.
+
+
+def env_bool(name, default=False):
+    return os.getenv(name, str(default)).lower() in ("true", "1", "yes")
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def conn_max_age(default):
+    # "none" keeps connections open for the life of the worker
+    value = os.getenv("DB_CONN_MAX_AGE", "")
+    if value.lower() == "none":
+        return None
+    return int(value) if value else default
+
+
+def sqlite_config(base_dir, name=None):
+    name = name or os.getenv("DB_NAME")
+    # WAL lets readers run while a writer commits; synchronous=NORMAL is safe
+    # under WAL (a power cut can lose the last commits, not corrupt the file).
+    # The journal mode is stored in the file, so the checked-in dev database
+    # (no DB_NAME) keeps its rollback journal unless DB_SQLITE_JOURNAL_MODE says so
+    journal_mode = os.getenv("DB_SQLITE_JOURNAL_MODE") or ("WAL" if name else "")
+    pragmas = [f"PRAGMA journal_mode={journal_mode}"] if journal_mode else []
+    pragmas += [
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={env_int('DB_SQLITE_MMAP_SIZE', 128 * 1024 * 1024)}",
+        f"PRAGMA cache_size=-{env_int('DB_SQLITE_CACHE_KB', 20000)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name or base_dir / "db.sqlite3",
+        "CONN_MAX_AGE": conn_max_age(60),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # busy timeout, seconds
+            "timeout": env_int("DB_SQLITE_BUSY_TIMEOUT", 20),
+            "init_command": "; ".join(pragmas),
+            # take the write lock up front instead of failing on lock upgrade
+            "transaction_mode": "IMMEDIATE",
+        },
+    }
+
+
+def postgres_config(prefix="DB"):
+    options = {}
+    statement_timeout = env_int(f"{prefix}_STATEMENT_TIMEOUT_MS", 30000)
+    if statement_timeout:
+        options["options"] = f"-c statement_timeout={statement_timeout}"
+    config = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.getenv(f"{prefix}_NAME", "task_management"),
+        "USER": os.getenv(f"{prefix}_USER", ""),
+        "PASSWORD": os.getenv(f"{prefix}_PASSWORD", ""),
+        "HOST": os.getenv(f"{prefix}_HOST", ""),
+        "PORT": os.getenv(f"{prefix}_PORT", ""),
+        "CONN_MAX_AGE": conn_max_age(300),
+        # re-check a persistent connection before reusing it in a new request
+        "CONN_HEALTH_CHECKS": True,
+        # .iterator() (exports, stats rebuilds) streams through server-side
+        # cursors; turn them off behind a transaction-mode PgBouncer
+        "DISABLE_SERVER_SIDE_CURSORS": env_bool(f"{prefix}_DISABLE_SERVER_SIDE_CURSORS"),
+        "OPTIONS": options,
+    }
+    pool = pool_options(prefix)
+    if pool:
+        # the pool owns connection lifetime; Django rejects it with CONN_MAX_AGE
+        options["pool"] = pool
+        config["CONN_MAX_AGE"] = 0
+        config["CONN_HEALTH_CHECKS"] = False
+    return config
+
+
+# in-process pool (Django 5.1+); only available with psycopg 3 and psycopg_pool,
+# psycopg2 deployments fall back to persistent connections
+def pool_options(prefix="DB"):
+    if not env_bool(f"{prefix}_POOL"):
+        return None
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError:
+        return None
+    return {
+        "min_size": env_int(f"{prefix}_POOL_MIN_SIZE", 2),
+        "max_size": env_int(f"{prefix}_POOL_MAX_SIZE", 10),
+        "max_idle": env_int(f"{prefix}_POOL_MAX_IDLE", 300),
+        "timeout": env_int(f"{prefix}_POOL_TIMEOUT", 10),
+        # ping a connection before handing it out
+        "check": ConnectionPool.check_connection,
+    }
+
+
+# read replicas: DB_REPLICA_HOSTS=host[:port],... (PostgreSQL, same credentials)
+# or DB_REPLICA_NAMES=file,... (SQLite files standing in for replicas locally)
+def replica_configs(primary):
+    if primary["ENGINE"].endswith("sqlite3"):
+        names = [n.strip() for n in os.getenv("DB_REPLICA_NAMES", "").split(",") if n.strip()]
+        overrides = [{"NAME": name} for name in names]
+    else:
+        hosts = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+        overrides = []
+        for host in hosts:
+            host, _, port = host.partition(":")
+            overrides.append({"HOST": host, "PORT": port or primary["PORT"]})
+    replicas = {}
+    for n, override in enumerate(overrides, start=1):
+        # tests run against the primary's test database
+        replicas[f"replica_{n}"] = {**primary, **override, "TEST": {"MIRROR": "default"}}
+    return replicas
+
+
+def database_config(base_dir):
+    engine = os.getenv("DB_ENGINE", "sqlite").lower()
+    if engine in ("postgres", "postgresql"):
+        primary = postgres_config()
+    else:
+        primary = sqlite_config(base_dir)
+    return {"default": primary, **replica_configs(primary)}
@@ -0,0 +1,194 @@
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger("task_management.instrumentation")
+
+DEFAULTS = {
+    "ENABLED": True,
+    # sampled requests cost a query wrapper and a log line each
+    "SAMPLE_RATE": 0.01,
+    "SLOW_REQUEST_MS": 500,
+    "DUPLICATE_QUERY_THRESHOLD": 3,
+    "SERVER_TIMING": True,
+    # long-poll / streaming views are slow by design
+    "SLOW_EXEMPT_VIEWS": (),
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "REQUEST_INSTRUMENTATION", {})}
+
+
+# collects every SQL statement run through django.db while a request is sampled
+class QueryRecorder:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            # same SQL text with different params is the N+1 signature
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+
+# time spent turning rows into response data, for the "serialize" part of the
+# view time; a no-op outside instrumented requests (request may be DRF's)
+@contextmanager
+def measure_serialization(request):
+    marks = getattr(getattr(request, "_request", request), "_instrumentation", None)
+    if marks is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        marks["serialize"] += time.perf_counter() - start
+
+
+# per-request SQL and timing instrumentation
+# sampled requests get query count, DB time, duplicate-query detection and the
+# view / serialize / render split as a Server-Timing header plus one JSON log
+# line. serialize (serializers and the fast list rows) is part of view; render
+# is the renderer turning the data into bytes after the view returned.
+# Requests slower than SLOW_REQUEST_MS are always logged at WARNING.
+class RequestInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        config = get_config()
+        if not config["ENABLED"]:
+            return self.get_response(request)
+        recorder, start = self.start(request, config)
+        with self.record_queries(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, start, config)
+
+    async def __acall__(self, request):
+        config = get_config()
+        if not config["ENABLED"]:
+            return await self.get_response(request)
+        recorder, start = self.start(request, config)
+        if recorder is None:
+            response = await self.get_response(request)
+            return self.finish(request, response, recorder, start, config)
+        # the async ORM runs its queries on the thread-sensitive sync thread,
+        # whose connections are not the ones this coroutine sees
+        stack = await sync_to_async(self.record_queries)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder, start, config)
+
+    # (recorder or None when the request is not sampled, start time)
+    def start(self, request, config):
+        sampled = random.random() < config["SAMPLE_RATE"]
+        request._instrumentation = {"view_start": None, "render_start": None, "render_end": None, "serialize": 0.0}
+        return (QueryRecorder() if sampled else None), time.perf_counter()
+
+    def record_queries(self, recorder):
+        stack = ExitStack()
+        if recorder is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, recorder, start, config):
+        total = (time.perf_counter() - start) * 1000
+        sampled = recorder is not None
+        timings = self.split_timings(request._instrumentation, start, total)
+        match = getattr(request, "resolver_match", None)
+        exempt = match is not None and match.view_name in config["SLOW_EXEMPT_VIEWS"]
+        slow = total >= config["SLOW_REQUEST_MS"] and not exempt
+        if sampled and config["SERVER_TIMING"]:
+            response["Server-Timing"] = self.server_timing(recorder, timings, total)
+        if sampled or slow:
+            self.log(request, response, recorder, timings, total, slow, config)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        marks = getattr(request, "_instrumentation", None)
+        if marks is not None:
+            marks["view_start"] = time.perf_counter()
+
+    # DRF responses are rendered (serialized to bytes) after the view returns
+    def process_template_response(self, request, response):
+        marks = getattr(request, "_instrumentation", None)
+        if marks is not None:
+            marks["render_start"] = time.perf_counter()
+
+            def rendered(response):
+                marks["render_end"] = time.perf_counter()
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def split_timings(self, marks, start, total):
+        view_start = marks["view_start"] or start
+        view_end = marks["render_start"] or (start + total / 1000)
+        render = 0.0
+        if marks["render_start"] and marks["render_end"]:
+            render = (marks["render_end"] - marks["render_start"]) * 1000
+        return {"view": max(0.0, (view_end - view_start) * 1000), "serialize": marks["serialize"] * 1000, "render": render}
+
+    def server_timing(self, recorder, timings, total):
+        parts = []
+        if recorder is not None:
+            parts.append(f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"')
+        parts.append(f"view;dur={timings['view']:.1f}")
+        parts.append(f"serialize;dur={timings['serialize']:.1f}")
+        parts.append(f"render;dur={timings['render']:.1f}")
+        parts.append(f"total;dur={total:.1f}")
+        return ", ".join(parts)
+
+    def log(self, request, response, recorder, timings, total, slow, config):
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total, 1),
+            "view_ms": round(timings["view"], 1),
+            "serialize_ms": round(timings["serialize"], 1),
+            "render_ms": round(timings["render"], 1),
+            "slow": slow,
+        }
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            record["view"] = match.view_name
+        if recorder is not None:
+            duplicates = recorder.duplicates(config["DUPLICATE_QUERY_THRESHOLD"])
+            record.update({
+                "queries": recorder.count,
+                "db_ms": round(recorder.duration * 1000, 1),
+                "duplicate_queries": [{"sql": sql[:200], "count": n} for sql, n in duplicates.items()],
+            })
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record))
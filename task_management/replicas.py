@@ -0,0 +1,156 @@
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# read-replica routing
+# reads go to a replica only inside views that opt in (ReplicaReadMixin /
+# replica_reads) and only for GET / HEAD. Everything else stays on the primary:
+# writes, reads inside a transaction, reads after a write in the same request,
+# and - for STICKY_SECONDS after a write - every read by that client, which is
+# pinned with a cookie and an X-DB-Pin header it may echo back.
+
+DEFAULTS = {
+    "ALIASES": [],
+    "STICKY_SECONDS": 5,
+    "COOKIE": "db_pin",
+    "HEADER": "X-DB-Pin",
+}
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_wrote = ContextVar("replica_wrote", default=False)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "READ_REPLICAS", {})}
+
+
+def replica_aliases():
+    return [alias for alias in get_config()["ALIASES"] if alias in settings.DATABASES]
+
+
+# the client wrote recently (cookie or echoed header still in the future)
+def is_pinned(request):
+    config = get_config()
+    header = "HTTP_" + config["HEADER"].upper().replace("-", "_")
+    for value in (request.COOKIES.get(config["COOKIE"]), request.META.get(header)):
+        try:
+            if value and float(value) > time.time():
+                return True
+        except ValueError:
+            pass
+    return False
+
+
+# context manager / view decorator letting the ORM read from replicas
+class replica_reads:
+
+    def __init__(self, request=None):
+        self.request = request
+        self.tokens = []
+
+    def __enter__(self):
+        allowed = self.request is None or (self.request.method in SAFE_METHODS and not is_pinned(self.request))
+        self.tokens.append(_replica_reads.set(allowed))
+        return self
+
+    def __exit__(self, *exc_info):
+        _replica_reads.reset(self.tokens.pop())
+
+    def __call__(self, view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            with replica_reads(request):
+                return view(request, *args, **kwargs)
+        return wrapped
+
+
+# for viewsets; actions listed in primary_actions always read the primary
+class ReplicaReadMixin:
+    primary_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        action = getattr(self, "action_map", {}).get(request.method.lower())
+        if action in self.primary_actions:
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads(request):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or _wrote.get():
+            return None
+        # authentication must see users registered a moment ago
+        if model is get_user_model():
+            return None
+        aliases = replica_aliases()
+        if not aliases or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    # replicas get their schema from replication
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+# pins clients to the primary after a write; also clears the per-request state
+class ReplicaPinMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _wrote.reset(token)
+        return self.pin(request, response, wrote)
+
+    # sync_to_async hands context variable changes back, so ORM writes made
+    # from async views are seen here too
+    async def __acall__(self, request):
+        token = _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _wrote.reset(token)
+        return self.pin(request, response, wrote)
+
+    def pin(self, request, response, wrote):
+        if replica_aliases() and (wrote or request.method not in SAFE_METHODS):
+            config = get_config()
+            until = f"{time.time() + config['STICKY_SECONDS']:.3f}"
+            response.set_cookie(config["COOKIE"], until, max_age=config["STICKY_SECONDS"], httponly=True, samesite="Lax")
+            response[config["HEADER"]] = until
+        return response
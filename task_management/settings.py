@@ -17,6 +17,7 @@ load_dotenv()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 from datetime import timedelta
+from .database import database_config
 
 
 # Quick-start development settings - unsuitable for production
@@ -57,6 +58,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    "task_management.instrumentation.RequestInstrumentationMiddleware",
+    "task_management.replicas.ReplicaPinMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -73,6 +76,8 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+# read-your-writes pin, echoed back by API clients that do not keep cookies
+CORS_EXPOSE_HEADERS = ["X-DB-Pin"]
 CORS_ALLOW_HEADERS = [
     "*",
 ]
@@ -136,11 +141,15 @@ WSGI_APPLICATION = "task_management.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+# DB_ENGINE=sqlite|postgres plus DB_* variables, see task_management/database.py
+DATABASES = database_config(BASE_DIR)
+
+# list / search / analytics reads go to replicas (task_management/replicas.py);
+# clients stay on the primary for READ_REPLICAS STICKY_SECONDS after a write
+DATABASE_ROUTERS = ["task_management.replicas.ReplicaRouter"]
+READ_REPLICAS = {
+    "ALIASES": [alias for alias in DATABASES if alias != "default"],
+    "STICKY_SECONDS": int(os.getenv("DB_REPLICA_STICKY_SECONDS", 5)),
 }
 
 
@@ -195,4 +204,99 @@ MEDIA_ROOT = BASE_DIR / 'media'
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-}
\ No newline at end of file
+}
+
+
+# rows per INSERT / IN (...) batch for bulk task writes (?batch_size= overrides per call)
+TASK_BULK_BATCH_SIZE = int(os.getenv("TASK_BULK_BATCH_SIZE", 500))
+
+
+# per-request SQL / timing instrumentation (task_management/instrumentation.py)
+# sampled requests get a Server-Timing header and a JSON log line; requests slower
+# than SLOW_REQUEST_MS are always logged as warnings
+REQUEST_INSTRUMENTATION = {
+    "ENABLED": os.getenv("REQUEST_INSTRUMENTATION", "true").lower() in ("true", "1", "yes"),
+    "SAMPLE_RATE": float(os.getenv("REQUEST_SAMPLE_RATE", 0.01)),
+    "SLOW_REQUEST_MS": int(os.getenv("SLOW_REQUEST_MS", 500)),
+    "DUPLICATE_QUERY_THRESHOLD": 3,
+    "SERVER_TIMING": True,
+    "SLOW_EXEMPT_VIEWS": ("tasks-events",),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "task_management.instrumentation": {
+            "handlers": ["console"],
+            "level": os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+
+# per-user response cache for task list / detail (task_app/response_cache.py)
+# off unless TASK_RESPONSE_CACHE is set. Writes invalidate through CACHE_ALIAS,
+# which must be a cache shared by all workers (Redis/Memcached); the in-process
+# "local" backend only sees its own worker's writes, so use it with one worker only
+TASK_RESPONSE_CACHE = {
+    "ENABLED": os.getenv("TASK_RESPONSE_CACHE", "false").lower() in ("true", "1", "yes"),
+    "BACKEND": os.getenv("TASK_RESPONSE_CACHE_BACKEND", "django"),
+    "CACHE_ALIAS": "default",
+    "MAX_ENTRIES": 2000,
+    "TTL": int(os.getenv("TASK_RESPONSE_CACHE_TTL", 30)),
+}
+
+
+# task change feed (task_app/events.py): long-poll / server-sent events at /tasks/events/
+# waiting readers watch a per-user stamp in the default cache, so use a shared
+# cache (Redis/Memcached) with several workers or they fall back to RECHECK_INTERVAL.
+# Each waiting reader occupies a worker: keep MAX_WAIT and STREAM_SECONDS well
+# below the server's worker timeout (gunicorn --timeout, 30s by default).
+# Events from the last SETTLE_SECONDS wait until slower transactions have committed
+TASK_EVENTS = {
+    "POLL_INTERVAL": 1.0,
+    "RECHECK_INTERVAL": 5.0,
+    "MAX_WAIT": int(os.getenv("TASK_EVENTS_MAX_WAIT", 10)),
+    "STREAM_SECONDS": int(os.getenv("TASK_EVENTS_STREAM_SECONDS", 20)),
+    "HEARTBEAT_INTERVAL": 10,
+    "PAGE_SIZE": 100,
+    "RETENTION_DAYS": int(os.getenv("TASK_EVENTS_RETENTION_DAYS", 30)),
+    "SETTLE_SECONDS": 1.0,
+}
+
+
+# delta sync at /tasks/changes/?since=<token> (task_app/sync.py)
+# rows written in the last SETTLE_SECONDS wait for the next call, so a slow
+# transaction cannot commit behind a token that was already handed out
+TASK_SYNC = {
+    "PAGE_SIZE": int(os.getenv("TASK_SYNC_PAGE_SIZE", 200)),
+    "MAX_PAGE_SIZE": int(os.getenv("TASK_SYNC_MAX_PAGE_SIZE", 1000)),
+    "SETTLE_SECONDS": float(os.getenv("TASK_SYNC_SETTLE_SECONDS", 1.0)),
+}
+
+
+# protected attachment downloads at /file-upload/<id>/download/ (task_app/downloads.py)
+# "x-accel" hands the file to nginx (internal location X_ACCEL_PREFIX aliased to
+# MEDIA_ROOT), "x-sendfile" to Apache/lighttpd; "django" streams it with Range support
+TASK_DOWNLOADS = {
+    "BACKEND": os.getenv("TASK_DOWNLOADS_BACKEND", "django"),
+    "X_ACCEL_PREFIX": "/protected-media/",
+    "PRESIGNED_EXPIRES": int(os.getenv("TASK_DOWNLOADS_PRESIGNED_EXPIRES", 300)),
+}
+
+
+# background jobs (task_app/jobs.py), run with `python manage.py run_jobs`
+TASK_JOBS = {
+    "WORKERS": int(os.getenv("TASK_JOBS_WORKERS", 4)),
+    "POLL_INTERVAL": 1.0,
+    "VISIBILITY_TIMEOUT": int(os.getenv("TASK_JOBS_VISIBILITY_TIMEOUT", 300)),
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BASE": 10,
+    "RETRY_MAX": 3600,
+    "RETENTION_DAYS": int(os.getenv("TASK_JOBS_RETENTION_DAYS", 7)),
+}
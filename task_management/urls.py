@@ -23,6 +23,9 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/tasks-routes/",include("task_app.urls")),
     path("api/auth-routes/",include("auth_app.urls")),
+    # native async read endpoints for ASGI deployments
+    path("api/async/tasks-routes/",include("task_app.async_urls")),
+    path("api/async/auth-routes/",include("auth_app.async_urls")),
     
 ]
 